@@ -0,0 +1,64 @@
+"""
+Latência do chatbot com o LLM em streaming, usando o stub local no lugar do Gemini.
+
+Compara o tempo até ter o código pronto lendo a resposta inteira (como era com
+generate_content) e parando no fim do bloco ```python (extrair_codigo_stream). O stub
+simula o tempo até o primeiro token e o intervalo entre as partes:
+
+    python -m benchmarks.bench_chatbot_latencia --latencia 0.5 --latencia-token 0.02
+"""
+import argparse
+import statistics
+import time
+from core.chatbot import _extrair_codigo, _montar_prompt, extrair_codigo_stream
+from core.llm import BackendHTTP
+from core.stub_server import iniciar_servidor_stub
+
+PERGUNTAS = [
+    "Qual dia da semana tem mais acidentes?",
+    "Quais os 3 tipos de acidente mais comuns em MG com chuva?",
+    "Qual hora tem mais acidentes aos sábados em SP?",
+]
+
+
+def _completo(backend, prompt):
+    inicio = time.perf_counter()
+    texto = "".join(backend.gerar_stream(prompt))
+    _extrair_codigo(texto)
+    return time.perf_counter() - inicio
+
+
+def _parada_antecipada(backend, prompt):
+    inicio = time.perf_counter()
+    primeira = []
+    extrair_codigo_stream(backend.gerar_stream(prompt), lambda _: primeira or primeira.append(time.perf_counter()))
+    fim = time.perf_counter()
+    return fim - inicio, primeira[0] - inicio
+
+
+def executar(latencia, latencia_token, repeticoes, gravacoes=None):
+    servidor, url_base = iniciar_servidor_stub(latencia=latencia, latencia_token=latencia_token, gravacoes=gravacoes)
+    backend = BackendHTTP(f"{url_base}/llm/generate")
+    try:
+        print(f"latência {latencia:.2f} s + {latencia_token * 1000:.0f} ms por parte\n")
+        print(f"{'pergunta':<60} {'1º token (ms)':>14} {'completo (ms)':>14} {'streaming (ms)':>15}")
+        for pergunta in PERGUNTAS:
+            prompt, _ = _montar_prompt(pergunta)
+            completo = statistics.median(_completo(backend, prompt) for _ in range(repeticoes))
+            medidas = [_parada_antecipada(backend, prompt) for _ in range(repeticoes)]
+            streaming = statistics.median(m[0] for m in medidas)
+            primeiro = statistics.median(m[1] for m in medidas)
+            print(f"{pergunta:<60} {primeiro * 1000:>14.0f} {completo * 1000:>14.0f} {streaming * 1000:>15.0f}")
+        print(f"\nrespostas interrompidas no fim do código: {servidor.contagem['llm_interrompidas']} de {servidor.contagem['llm']}")
+    finally:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de latência do chatbot com o LLM em streaming.")
+    parser.add_argument("--latencia", type=float, default=0.5, help="Tempo até o primeiro token (s)")
+    parser.add_argument("--latencia-token", type=float, default=0.02, help="Intervalo entre partes (s)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--gravacoes", default=None, help="JSONL de respostas gravadas (LLM_GRAVACOES)")
+    args = parser.parse_args()
+    executar(args.latencia, args.latencia_token, args.repeticoes, args.gravacoes)
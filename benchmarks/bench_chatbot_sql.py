@@ -0,0 +1,114 @@
+"""
+Compara os modos pandas e SQL (DuckDB) do chatbot em um conjunto fixo de perguntas.
+
+O código de cada pergunta é fixo (sem chamar o Gemini) e roda sobre dados sintéticos no
+formato do df_chatbot, medindo só a execução. O modo pandas é medido com as colunas de texto
+como dtype object (o que o load_data produz no pandas 2) e com o dtype de texto padrão da
+versão instalada:
+
+    python -m benchmarks.bench_chatbot_sql --linhas 2000000 --repeticoes 3
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from core.consulta_sql import ConsultaSQL
+
+# (pergunta, código pandas, código SQL); ambos definem 'final_result'
+PERGUNTAS = [
+    (
+        "Qual dia da semana tem mais acidentes?",
+        "final_result = df['dia_semana'].value_counts().idxmax()",
+        "final_result = sql(\"SELECT dia_semana FROM acidentes GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1\").iloc[0, 0]",
+    ),
+    (
+        "Quais os 3 tipos de acidente mais comuns em MG com chuva?",
+        "f = df[(df['uf'] == 'mg') & (df['condicao_metereologica'] == 'chuva')]\n"
+        "final_result = list(f['tipo_acidente'].value_counts().head(3).index)",
+        "final_result = list(sql(\"SELECT tipo_acidente FROM acidentes WHERE uf = 'mg' AND condicao_metereologica = 'chuva' "
+        "GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 3\")['tipo_acidente'])",
+    ),
+    (
+        "Qual hora tem mais acidentes aos sábados em SP?",
+        "f = df[(df['uf'] == 'sp') & (df['dia_semana'] == 'sabado')]\n"
+        "final_result = int(f['hora'].value_counts().idxmax())",
+        "final_result = int(sql(\"SELECT hora FROM acidentes WHERE uf = 'sp' AND dia_semana = 'sabado' "
+        "GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1\").iloc[0, 0])",
+    ),
+    (
+        "Quantos acidentes por ano no período noturno?",
+        "f = df[(df['hora'] >= 18) | (df['hora'] < 6)]\n"
+        "final_result = f.groupby(f['data_inversa'].dt.year).size().to_dict()",
+        "r = sql(\"SELECT year(data_inversa) AS ano, COUNT(*) AS n FROM acidentes WHERE hora >= 18 OR hora < 6 GROUP BY 1 ORDER BY 1\")\n"
+        "final_result = dict(zip(r['ano'], r['n']))",
+    ),
+    (
+        "Qual município com mais acidentes de colisão traseira?",
+        "final_result = df[df['tipo_acidente'] == 'colisao traseira']['municipio'].value_counts().idxmax()",
+        "final_result = sql(\"SELECT municipio FROM acidentes WHERE tipo_acidente = 'colisao traseira' "
+        "GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1\").iloc[0, 0]",
+    ),
+]
+
+
+def _sem_acentos(valores):
+    return pd.Series(valores).str.lower().str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('utf-8').tolist()
+
+
+def dados_sinteticos(linhas, semente=0):
+    """DataFrame no formato do df_chatbot (texto minúsculo e sem acentos) com domínios reais."""
+    rng = np.random.default_rng(semente)
+    with open("label_encoder_mappings.json", encoding="utf-8") as f:
+        dominios = json.load(f)
+    with open("uf_municipio_map.json", encoding="utf-8") as f:
+        pares = [(uf, m) for uf, municipios in json.load(f).items() for m in municipios]
+    indice = rng.zipf(1.3, linhas) % len(pares)
+    ufs, municipios = (np.array(_sem_acentos(coluna)) for coluna in zip(*pares))
+    return pd.DataFrame({
+        "data_inversa": pd.Timestamp("2017-01-01") + pd.to_timedelta(rng.integers(0, 365 * 8, linhas), unit="D"),
+        "dia_semana": rng.choice(_sem_acentos(dominios["dia_semana"]), linhas),
+        "uf": ufs[indice],
+        "municipio": municipios[indice],
+        "tipo_acidente": rng.choice(_sem_acentos(dominios["tipo_acidente"]), linhas),
+        "condicao_metereologica": rng.choice(_sem_acentos(dominios["condicao_metereologica"]), linhas),
+        "hora": rng.integers(0, 24, linhas),
+    })
+
+
+def _medir(codigo, variaveis, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        local_vars = dict(variaveis, final_result=None)
+        inicio = time.perf_counter()
+        exec(codigo, {"pd": pd}, local_vars)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), local_vars["final_result"]
+
+
+def executar(linhas, repeticoes):
+    df = dados_sinteticos(linhas)
+    texto = [coluna for coluna in df.columns if coluna not in ("data_inversa", "hora")]
+    df_object = df.astype({coluna: object for coluna in texto})
+    with tempfile.TemporaryDirectory() as diretorio:
+        sql = ConsultaSQL(df, "benchmark", diretorio=diretorio)
+        inicio = time.perf_counter()
+        sql("SELECT 1")  # grava o snapshot e abre a conexão
+        print(f"{linhas:,} linhas | snapshot Parquet + conexão: {time.perf_counter() - inicio:.2f} s\n")
+        print(f"{'pergunta':<60} {'object (ms)':>12} {'pandas (ms)':>12} {'sql (ms)':>10}")
+        for pergunta, codigo_pandas, codigo_sql in PERGUNTAS:
+            t_object, r_object = _medir(codigo_pandas, {"df": df_object}, repeticoes)
+            t_pandas, r_pandas = _medir(codigo_pandas, {"df": df}, repeticoes)
+            t_sql, r_sql = _medir(codigo_sql, {"sql": sql}, repeticoes)
+            aviso = "" if r_object == r_pandas == r_sql else "  (resultados diferentes!)"
+            print(f"{pergunta:<60} {t_object * 1000:>12.1f} {t_pandas * 1000:>12.1f} {t_sql * 1000:>10.1f}{aviso}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos modos pandas e SQL do chatbot.")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    executar(args.linhas, args.repeticoes)
@@ -0,0 +1,72 @@
+"""
+Rajada de logins simultâneos: bcrypt direto em cada thread (como antes) contra o pool de core.senhas.
+
+Cada login é uma thread (como as sessões do Streamlit) que verifica a senha de um mesmo usuário.
+Em paralelo, uma thread "de página" executa um trabalho curto a cada 10 ms e mede quanto ele
+atrasa, para mostrar quanto CPU sobra para o restante do app durante a rajada:
+
+    BCRYPT_WORKERS=2 python -m benchmarks.bench_login --logins 32
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+import core.senhas as senhas
+
+
+def _percentis(tempos):
+    tempos = sorted(tempos)
+    return statistics.median(tempos) * 1000, tempos[max(0, int(len(tempos) * 0.95) - 1)] * 1000
+
+
+def _pagina(parar, atrasos):
+    # Trabalho curto e fixo (~1 ms) repetido; o atraso é o tempo além do esperado
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        sum(i * i for i in range(20000))
+        atrasos.append(time.perf_counter() - inicio)
+        time.sleep(0.01)
+
+
+def _rajada(verificar, n_logins, senha_hash):
+    atrasos, parar = [], threading.Event()
+    pagina = threading.Thread(target=_pagina, args=(parar, atrasos))
+    pagina.start()
+
+    def login(_):
+        inicio = time.perf_counter()
+        assert verificar("segredo123", senha_hash)
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_logins) as sessoes:
+        tempos = list(sessoes.map(login, range(n_logins)))
+    total = time.perf_counter() - inicio
+    parar.set()
+    pagina.join()
+    return tempos, total, atrasos
+
+
+def executar(n_logins, rounds):
+    senha_hash = bcrypt.hashpw(b"segredo123", bcrypt.gensalt(rounds)).decode()
+    inicio = time.perf_counter()
+    bcrypt.checkpw(b"segredo123", senha_hash.encode())
+    print(f"{rounds} rounds ({(time.perf_counter() - inicio) * 1000:.0f} ms por verificação) | "
+          f"{n_logins} logins simultâneos | pool de {senhas.BCRYPT_WORKERS} threads\n")
+    print(f"{'modo':<8} {'login p50':>10} {'login p95':>10} {'total (s)':>10} {'página p50':>11} {'página p95':>11}")
+    direto = lambda senha, h: bcrypt.checkpw(senha.encode(), h.encode())
+    for nome, verificar in [("direto", direto), ("pool", senhas.verificar_senha)]:
+        tempos, total, atrasos = _rajada(verificar, n_logins, senha_hash)
+        l50, l95 = _percentis(tempos)
+        p50, p95 = _percentis(atrasos)
+        print(f"{nome:<8} {l50:>10.0f} {l95:>10.0f} {total:>10.2f} {p50:>11.1f} {p95:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de logins simultâneos com bcrypt.")
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=None, help="Custo do bcrypt (padrão: calibrado no host)")
+    args = parser.parse_args()
+    executar(args.logins, args.rounds or senhas.rounds_alvo())
@@ -0,0 +1,74 @@
+"""
+Busca de usuário por e-mail (o que o login faz) com o users.json antigo e com o SQLite.
+
+O users.json era lido, decodificado e percorrido a cada busca; no SQLite a busca usa o índice
+do e-mail. Os usuários usam um hash bcrypt fixo para não medir o custo do bcrypt:
+
+    python -m benchmarks.bench_usuarios --usuarios 100000 --buscas 200
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from core.usuarios import UsuariosSQLite
+
+HASH_FIXO = "$2b$12$ro8FB.rC5LhiDLBey5c0KuUUo7yjmCnue.ZnCoNTd..uWoR/rEwou"
+
+
+def usuarios_sinteticos(n):
+    return [
+        {"id": str(i), "email": f"usuario{i}@exemplo.com", "name": f"usuario{i}", "created_at": float(i), "password": HASH_FIXO}
+        for i in range(n)
+    ]
+
+
+def _buscar_json(arquivo, email):
+    # Como core.auth fazia antes: carrega o arquivo inteiro e percorre a lista
+    with open(arquivo, "r") as f:
+        dados = json.load(f)
+    for usuario in dados.get("users", []):
+        if usuario.get("email") == email:
+            return usuario
+    return None
+
+
+def _medir(funcao, emails):
+    tempos = []
+    for email in emails:
+        inicio = time.perf_counter()
+        assert funcao(email) is not None
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95) - 1]
+
+
+def executar(n_usuarios, n_buscas):
+    usuarios = usuarios_sinteticos(n_usuarios)
+    emails = [usuarios[random.Random(i).randrange(n_usuarios)]["email"] for i in range(n_buscas)]
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = Path(diretorio) / "users.json"
+        with open(arquivo, "w") as f:
+            json.dump({"users": usuarios}, f, indent=2)
+
+        inicio = time.perf_counter()
+        banco = UsuariosSQLite(Path(diretorio) / "users.sqlite", arquivo_json=arquivo)
+        importados = len(banco)  # a primeira operação abre o banco e faz a migração
+        print(f"{n_usuarios:,} usuários | migração do users.json: {time.perf_counter() - inicio:.2f} s ({importados:,} importados)\n")
+
+        print(f"{'armazenamento':<15} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for nome, funcao in [("users.json", lambda e: _buscar_json(arquivo, e)), ("sqlite", banco.por_email)]:
+            buscas = emails if nome == "sqlite" else emails[: max(5, n_buscas // 20)]  # o JSON é lento demais para muitas buscas
+            p50, p95 = _medir(funcao, buscas)
+            print(f"{nome:<15} {p50 * 1000:>10.3f} {p95 * 1000:>10.3f}")
+        banco.fechar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da busca de usuários por e-mail.")
+    parser.add_argument("--usuarios", type=int, default=100_000)
+    parser.add_argument("--buscas", type=int, default=200)
+    args = parser.parse_args()
+    executar(args.usuarios, args.buscas)
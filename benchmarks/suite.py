@@ -0,0 +1,256 @@
+"""
+Suíte de micro-benchmarks dos caminhos quentes, com baseline gravada e limites de regressão.
+
+Roda offline: os registros DATATRAN são sintéticos (core.datatran_sintetico), o MongoDB é o
+substituto em memória de core.mongo_local (MONGO_URI=memoria://) e o OSRM é o stub local
+(core.stub_server). Cada caso mede a mediana e o p95 de
+várias execuções; um caso regrediu quando a mediana passa da baseline por mais que a tolerância
+relativa do caso E por mais que a folga absoluta (que absorve o ruído dos casos de microssegundos).
+
+    python -m benchmarks.suite                      # compara com benchmarks/baseline.json
+    python -m benchmarks.suite --salvar-baseline    # grava os tempos atuais como baseline
+    python -m benchmarks.suite --casos preparar_dados,treinar_e_salvar_modelo --linhas 200000
+
+Sai com código 1 se algum caso regrediu.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from unittest import mock
+
+ARQUIVO_BASELINE = Path(__file__).parent / "baseline.json"
+TOLERANCIA = 0.5   # 50% mais lento que a baseline
+FOLGA_MS = 0.5     # diferenças menores que isso nunca contam como regressão
+
+
+@contextmanager
+def _diretorio_temporario():
+    """Executa dentro de um diretório temporário (treinar_e_salvar_modelo grava em ./modelos)."""
+    atual = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            yield Path(diretorio)
+        finally:
+            os.chdir(atual)
+
+
+# --- CASOS ---
+# Cada caso recebe (linhas, recursos) e devolve a função medida; `recursos` é um ExitStack para
+# patches e diretórios que valem até o fim do caso.
+
+def _mongo(linhas, recursos):
+    """Coleção memoria:// com `linhas` registros sintéticos, apagada no fim do caso."""
+    from core.datatran_sintetico import carregar_mongo
+    from core.mongo_local import conectar_mongo
+    carregar_mongo("memoria://", "bench", "datatran", linhas)
+    recursos.callback(lambda: conectar_mongo("memoria://")["bench"]["datatran"].drop())
+    return {"MONGO_URI": "memoria://", "DB_NAME": "bench", "COLLECTION_NAME": "datatran"}
+
+
+def caso_encode_input(linhas, recursos):
+    from core.codificacao import carregar_codificador
+    codificador = carregar_codificador()
+    rng = random.Random(0)
+    entradas = [(f, rng.choice(v)) for f, v in codificador.mapeamentos.items() for _ in range(200)]
+    return lambda: [codificador.codificar(f, v) for f, v in entradas]
+
+
+def _dados_ml(linhas, recursos):
+    import preditor_rotas
+    recursos.enter_context(mock.patch.dict(os.environ, _mongo(linhas, recursos)))
+    recursos.enter_context(mock.patch("builtins.print"))
+    return preditor_rotas
+
+
+def caso_preparar_dados(linhas, recursos):
+    preditor_rotas = _dados_ml(linhas, recursos)
+    return preditor_rotas.preparar_dados
+
+
+def caso_treinar_e_salvar_modelo(linhas, recursos):
+    preditor_rotas = _dados_ml(linhas, recursos)
+    df_ml = preditor_rotas.preparar_dados()
+    recursos.enter_context(_diretorio_temporario())
+    return lambda: preditor_rotas.treinar_e_salvar_modelo(df_ml)
+
+
+def _modelo_risco(linhas, recursos):
+    import core.rotas as rotas
+    preditor_rotas = _dados_ml(min(linhas, 20000), recursos)
+    df_ml = preditor_rotas.preparar_dados()
+    with _diretorio_temporario():
+        modelo = preditor_rotas.treinar_e_salvar_modelo(df_ml)
+    recursos.enter_context(mock.patch.object(rotas, "MODELO_RISCO", modelo))
+    return rotas
+
+
+def caso_calcular_risco_segmento(linhas, recursos):
+    rotas = _modelo_risco(linhas, recursos)
+    return lambda: rotas.calcular_risco_segmento("SP", "CAMPINAS", "Ceu Claro")
+
+
+def caso_load_data_chatbot(linhas, recursos):
+    import core.chatbot as chatbot
+    for nome, valor in _mongo(linhas, recursos).items():
+        recursos.enter_context(mock.patch.object(chatbot, nome, valor))
+    return chatbot.load_data
+
+
+def caso_auth_get_user_by_email(linhas, recursos):
+    import core.auth as auth
+    from core.usuarios import UsuariosSQLite
+    diretorio = recursos.enter_context(tempfile.TemporaryDirectory())
+    usuarios = UsuariosSQLite(Path(diretorio) / "users.sqlite")
+    usuarios.importar({"id": str(i), "email": f"u{i}@x.com", "created_at": float(i)} for i in range(linhas))
+    recursos.callback(usuarios.fechar)
+    recursos.enter_context(mock.patch.object(auth, "USUARIOS", usuarios))
+    emails = [f"u{random.Random(i).randrange(linhas)}@x.com" for i in range(100)]
+    return lambda: [auth.get_user_by_email(e) for e in emails]
+
+
+def caso_calcular_rota(linhas, recursos):
+    from core.cache import CacheDisco
+    from core.stub_server import iniciar_servidor_stub
+    rotas = _modelo_risco(linhas, recursos)
+    servidor, url_base = iniciar_servidor_stub()
+    recursos.callback(servidor.shutdown)
+    diretorio = recursos.enter_context(tempfile.TemporaryDirectory())
+    recursos.enter_context(mock.patch.object(rotas, "ROUTING_URL", f"{url_base}/route/v1/driving/"))
+    recursos.enter_context(mock.patch.object(rotas, "CACHE_ROTAS", CacheDisco("osrm", ttl=60, caminho=Path(diretorio) / "c.sqlite")))
+    # Cache de rotas aquecido: mede a leitura do cache, a predição de risco e a pontuação das alternativas
+    return lambda: rotas.calcular_rota(-22.9, -47.06, -22.9, -43.2, "CAMPINAS", "SP", "RIO DE JANEIRO", "RJ", "Ceu Claro")
+
+
+def caso_rota_grafo_local(linhas, recursos):
+    """Rota entre cantos opostos de uma grade de 1000 x 1000 nós (~4 milhões de arestas) no grafo local."""
+    import numpy as np
+    from datetime import datetime
+    from core.grafo import GrafoRodoviario
+    n, passo = 1000, 0.001
+    lat, lon = np.meshgrid(-23.0 + np.arange(n) * passo, -46.0 + np.arange(n) * passo, indexing="ij")
+    ids = np.arange(n * n).reshape(n, n)
+    pares = [(ids[:, :-1], ids[:, 1:]), (ids[:-1, :], ids[1:, :])]
+    u = np.concatenate([a.ravel() for a, b in pares] + [b.ravel() for a, b in pares])
+    v = np.concatenate([b.ravel() for a, b in pares] + [a.ravel() for a, b in pares])
+    grafo = GrafoRodoviario.de_arestas(lat.ravel(), lon.ravel(), u, v, np.full(len(u), 110.0), np.full(len(u), 10.0))
+    fim = (-23.0 + (n - 1) * passo, -46.0 + (n - 1) * passo)
+    return lambda: grafo.rota(-23.0, -46.0, *fim, "Sol", momento=datetime(2025, 1, 6, 8))
+
+
+CASOS = {
+    "encode_input": (caso_encode_input, 200),
+    "calcular_risco_segmento": (caso_calcular_risco_segmento, 50),
+    "preparar_dados": (caso_preparar_dados, 5),
+    "treinar_e_salvar_modelo": (caso_treinar_e_salvar_modelo, 3),
+    "load_data_chatbot": (caso_load_data_chatbot, 5),
+    "auth_get_user_by_email": (caso_auth_get_user_by_email, 50),
+    "calcular_rota": (caso_calcular_rota, 50),
+    "rota_grafo_local": (caso_rota_grafo_local, 5),
+}
+
+
+# --- EXECUÇÃO E COMPARAÇÃO ---
+
+def medir(funcao, repeticoes):
+    """Mediana e p95 (ms) de `repeticoes` execuções, após uma execução de aquecimento."""
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {"mediana_ms": statistics.median(tempos), "p95_ms": tempos[max(0, int(len(tempos) * 0.95) - 1)]}
+
+
+def executar(nomes=None, linhas=50_000, fator_repeticoes=1.0):
+    """Roda os casos pedidos e devolve {caso: {"mediana_ms", "p95_ms"}}."""
+    resultados = {}
+    for nome in nomes or CASOS:
+        preparar, repeticoes = CASOS[nome]
+        with ExitStack() as recursos:
+            funcao = preparar(linhas, recursos)
+            resultados[nome] = medir(funcao, max(1, int(repeticoes * fator_repeticoes)))
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA, folga_ms=FOLGA_MS):
+    """
+    Lista de (caso, mediana atual, mediana da baseline, limite, regrediu). A tolerância de um
+    caso pode ser ajustada na baseline com a chave "tolerancia".
+    """
+    linhas = []
+    for nome, atual in resultados.items():
+        referencia = baseline.get("casos", {}).get(nome)
+        if referencia is None:
+            linhas.append((nome, atual["mediana_ms"], None, None, False))
+            continue
+        limite = referencia["mediana_ms"] * (1 + referencia.get("tolerancia", tolerancia))
+        limite = max(limite, referencia["mediana_ms"] + folga_ms)
+        linhas.append((nome, atual["mediana_ms"], referencia["mediana_ms"], limite, atual["mediana_ms"] > limite))
+    return linhas
+
+
+def carregar_baseline(caminho=ARQUIVO_BASELINE):
+    if not Path(caminho).exists():
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_baseline(resultados, linhas, caminho=ARQUIVO_BASELINE):
+    anterior = carregar_baseline(caminho).get("casos", {})
+    casos = {}
+    for nome, medidas in resultados.items():
+        casos[nome] = {k: round(v, 4) for k, v in medidas.items()}
+        if "tolerancia" in anterior.get(nome, {}):
+            casos[nome]["tolerancia"] = anterior[nome]["tolerancia"]  # ajustes manuais são mantidos
+    dados = {
+        "linhas": linhas,
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "casos": {**anterior, **casos},
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks dos caminhos quentes com baseline.")
+    parser.add_argument("--casos", default=None, help=f"Lista separada por vírgulas (padrão: todos): {', '.join(CASOS)}")
+    parser.add_argument("--linhas", type=int, default=None, help="Tamanho dos dados sintéticos (padrão: o da baseline, ou 50000)")
+    parser.add_argument("--salvar-baseline", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    baseline = carregar_baseline()
+    linhas = args.linhas or baseline.get("linhas", 50_000)
+    if baseline and linhas != baseline.get("linhas"):
+        print(f"Aviso: baseline gravada com {baseline.get('linhas')} linhas; comparando com {linhas}.")
+    nomes = args.casos.split(",") if args.casos else None
+    resultados = executar(nomes, linhas)
+
+    print(f"{'caso':<28} {'mediana (ms)':>13} {'p95 (ms)':>10} {'baseline':>10} {'limite':>10}")
+    regressoes = []
+    for nome, atual, referencia, limite, regrediu in comparar(resultados, baseline, args.tolerancia):
+        base = f"{referencia:>10.3f} {limite:>10.3f}" if referencia is not None else f"{'-':>10} {'-':>10}"
+        print(f"{nome:<28} {atual:>13.3f} {resultados[nome]['p95_ms']:>10.3f} {base}{'  REGRESSÃO' if regrediu else ''}")
+        if regrediu:
+            regressoes.append(nome)
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados, linhas)
+        print(f"\nBaseline gravada em {ARQUIVO_BASELINE}")
+    elif regressoes:
+        print(f"\n{len(regressoes)} caso(s) acima do limite: {', '.join(regressoes)}")
+        sys.exit(1)
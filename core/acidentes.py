@@ -0,0 +1,21 @@
+# core/acidentes.py
+import os
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ARQUIVO_ACIDENTES = os.getenv("ARQUIVO_ACIDENTES", "datatran_consolidado.json")
+
+
+def carregar_acidentes(caminho=ARQUIVO_ACIDENTES):
+    """
+    Lê o histórico de acidentes (JSON do DATATRAN) para uso geoespacial: coordenadas com
+    vírgula decimal viram float e o horário vira a coluna inteira 'hora'.
+    """
+    df = pd.read_json(caminho)
+    for col in ['latitude', 'longitude']:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '.', regex=False), errors='coerce')
+    if 'horario' in df.columns:
+        df['hora'] = pd.to_datetime(df['horario'], format='%H:%M:%S', errors='coerce').dt.hour
+    return df.dropna(subset=['latitude', 'longitude', 'uf', 'municipio']).reset_index(drop=True)
@@ -0,0 +1,204 @@
+# core/amostra.py
+"""
+Amostra estratificada (uf, ano) usada nas respostas prévias do chatbot e a expansão dessas
+respostas para o tamanho dos dados completos.
+
+O código gerado é arbitrário, então a prévia é classificada rodando-o também na amostra
+duplicada: respostas que não mudam (razões, médias, top-k, contagens do cubo ponderado) valem
+como estão; respostas numéricas que dobram (contagens e somas sobre o df) são expandidas pelos
+pesos das linhas. Nos textos formatados (o `final_result` pedido no prompt) a mesma regra vale para
+cada número do texto; as demais respostas ficam sem prévia.
+"""
+import os
+import re
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AMOSTRA_FRACAO = float(os.getenv("AMOSTRA_FRACAO", 0.05))
+AMOSTRA_MINIMO = int(os.getenv("AMOSTRA_MINIMO", 20))  # estratos com cota menor que isso entram inteiros
+
+_NUMERO = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def amostra_estratificada(df: pd.DataFrame, fracao=AMOSTRA_FRACAO, minimo=AMOSTRA_MINIMO, semente=0, com_pesos=False):
+    """
+    Amostra proporcional por estrato (uf, ano de data_inversa): cada estrato contribui com
+    `fracao` das suas linhas; os que ficariam com menos de `minimo` entram inteiros, para que UFs
+    e anos pequenos não sumam da prévia. Com `com_pesos`, devolve também o peso de cada linha
+    (tamanho do estrato / linhas amostradas dele; 1 nos estratos inteiros).
+    """
+    if len(df) == 0:
+        return (df, np.zeros(0)) if com_pesos else df
+    grupo = np.zeros(len(df), dtype=np.int64)
+    if "uf" in df.columns:
+        grupo = pd.factorize(df["uf"])[0].astype(np.int64)
+    if "data_inversa" in df.columns:
+        anos, _ = pd.factorize(pd.to_datetime(df["data_inversa"], errors="coerce").dt.year)
+        grupo = grupo * (anos.max() + 2) + (anos + 1)
+    grupo = pd.factorize(grupo)[0]
+    tamanhos = np.bincount(grupo)
+    cotas = np.ceil(tamanhos * fracao).astype(np.int64)
+    cotas = np.where(cotas < minimo, tamanhos, cotas)
+
+    # Embaralha dentro de cada estrato e mantém as primeiras `cota` linhas de cada um
+    rng = np.random.default_rng(semente)
+    ordem = np.lexsort((rng.random(len(df)), grupo))
+    inicio = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    posicao = np.arange(len(df)) - inicio[grupo[ordem]]
+    escolhidas = np.sort(ordem[posicao < cotas[grupo[ordem]]])
+    amostra = df.iloc[escolhidas]
+    if not com_pesos:
+        return amostra
+    return amostra, (tamanhos / cotas)[grupo[escolhidas]]
+
+
+def variantes_amostra(amostra, pesos):
+    """
+    Quadros (df, pesos) em que estimar_previa roda o código: a amostra, a amostra duplicada (pesos
+    pela metade) e só as linhas dos estratos amostrados (peso > 1).
+    """
+    amostrados = pesos > 1
+    return {
+        "amostra": (amostra, pesos),
+        "amostra_dupla": (pd.concat([amostra, amostra], ignore_index=True), np.concatenate([pesos, pesos]) / 2),
+        "amostra_estratos": (amostra[amostrados], pesos[amostrados]),
+    }
+
+
+def _numerico(valor):
+    if isinstance(valor, (bool, np.bool_)):
+        return False
+    if isinstance(valor, (int, float, np.number)):
+        return True
+    if isinstance(valor, pd.Series):
+        return pd.api.types.is_numeric_dtype(valor) and not pd.api.types.is_bool_dtype(valor)
+    if isinstance(valor, pd.DataFrame):
+        return all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in valor.dtypes)
+    return False
+
+
+def _proximos(a, b, tolerancia):
+    """Compara resultados do código gerado (números, Series, DataFrames ou qualquer outro valor)."""
+    try:
+        if isinstance(a, (pd.Series, pd.DataFrame)):
+            if type(a) is not type(b) or a.shape != b.shape or not a.index.equals(b.index):
+                return False
+            if _numerico(a) and _numerico(b):
+                return bool(np.allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=tolerancia, equal_nan=True))
+            return a.equals(b)
+        if _numerico(a) and _numerico(b):
+            return bool(np.isclose(float(a), float(b), rtol=tolerancia, equal_nan=True))
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+def _arredondar(estimativa, original):
+    """Mantém contagens inteiras como inteiras depois da expansão."""
+    if isinstance(original, (pd.Series, pd.DataFrame)):
+        inteiras = original.dtypes if isinstance(original, pd.DataFrame) else pd.Series([original.dtype])
+        if all(pd.api.types.is_integer_dtype(t) for t in inteiras):
+            return estimativa.round().astype(np.int64)
+        return estimativa
+    if isinstance(original, (int, np.integer)):
+        return int(round(estimativa))
+    return estimativa
+
+
+def _ler_numero(token):
+    """
+    Valor de um número escrito no texto e o seu formato (separador de milhar, separador decimal,
+    casas decimais): '1.234' e '1,234' são milhares, '12,5' e '0.125' são decimais.
+    """
+    separadores = [c for c in token if c in ".,"]
+    milhar = decimal = None
+    if separadores:
+        ultimo = separadores[-1]
+        casas = len(token) - token.rindex(ultimo) - 1
+        if len(set(separadores)) == 2 or (separadores.count(ultimo) == 1 and (casas != 3 or token.startswith("0" + ultimo))):
+            decimal = ultimo
+            milhar = separadores[0] if separadores[0] != ultimo else None
+        else:
+            milhar = ultimo
+    inteiro, _, fracao = token.rpartition(decimal) if decimal else (token, "", "")
+    inteiro = inteiro.replace(milhar, "") if milhar else inteiro
+    valor = float(f"{inteiro}.{fracao}") if fracao else int(inteiro)
+    return valor, (milhar, decimal, len(fracao))
+
+
+def _escrever_numero(valor, formato):
+    milhar, decimal, casas = formato
+    texto = f"{valor:,.{casas}f}"
+    return texto.translate(str.maketrans({",": milhar or "", ".": decimal or "."}))
+
+
+def _separar_numeros(texto):
+    """(trechos de texto entre os números, valores, formatos); None se `texto` não é uma string."""
+    if not isinstance(texto, str):
+        return None
+    numeros = [_ler_numero(token) for token in _NUMERO.findall(texto)]
+    return _NUMERO.split(texto), np.array([v for v, _ in numeros], dtype=float), [f for _, f in numeros]
+
+
+def _estimar_texto(executar, resultado, duplicado, pesos, tolerancia):
+    """
+    Prévia de um texto: os números que dobram na amostra duplicada são expandidos como as
+    contagens; os que não mudam (razões, anos, horas) ficam como estão. O texto em volta dos
+    números precisa ser o mesmo nas variantes (ex.: o mesmo dia da semana no topo).
+    """
+    partes, duplicadas = _separar_numeros(resultado), _separar_numeros(duplicado)
+    if duplicadas is None or partes[0] != duplicadas[0]:
+        return None
+    trechos, valores, formatos = partes
+    # Um número que só ganha o separador de milhar na amostra duplicada (ex.: 999 -> 1.998) segue esse formato
+    formatos = [dup if dup[0] and not formato[0] else formato for formato, dup in zip(formatos, duplicadas[2])]
+    dobram = ~np.isclose(duplicadas[1], valores, rtol=tolerancia)
+    if not np.allclose(duplicadas[1][dobram], valores[dobram] * 2, rtol=tolerancia):
+        return None
+    amostrados = pesos > 1
+    if not amostrados.any():
+        return resultado  # a amostra é o df inteiro
+    fator = float(pesos[amostrados].mean())
+    if amostrados.all():
+        estimativa = np.where(dobram, valores * fator, valores)
+    else:
+        parciais = _separar_numeros(executar("amostra_estratos"))
+        if parciais is None or parciais[0] != trechos:
+            return None
+        estimativa = np.where(dobram, valores + parciais[1] * (fator - 1), valores)
+    numeros = [_escrever_numero(valor, formato) for valor, formato in zip(estimativa, formatos)]
+    return "".join(trecho + numero for trecho, numero in zip(trechos, numeros + [""]))
+
+
+def estimar_previa(executar, pesos, tolerancia=1e-3):
+    """
+    Resposta da prévia a partir de `executar(nome)`, que roda o código gerado na variante `nome`
+    de variantes_amostra (ou devolve None para interromper a prévia). Contagens e somas, inclusive
+    as escritas em um texto, são expandidas como f(inteiros) + W * f(amostrados), com W = peso
+    médio dos estratos amostrados; devolve None quando a resposta não tem estimativa.
+    """
+    resultado = executar("amostra")
+    duplicado = executar("amostra_dupla")
+    if _proximos(duplicado, resultado, tolerancia):
+        return resultado
+    if isinstance(resultado, str):
+        return _estimar_texto(executar, resultado, duplicado, pesos, tolerancia)
+    if not _numerico(resultado) or not _proximos(duplicado, resultado * 2, tolerancia):
+        return None
+    amostrados = pesos > 1
+    if not amostrados.any():
+        return resultado  # a amostra é o df inteiro
+    fator = float(pesos[amostrados].mean())
+    if amostrados.all():
+        return _arredondar(resultado * fator, resultado)
+    parcial = executar("amostra_estratos")
+    if not _numerico(parcial):
+        return None
+    if isinstance(resultado, (pd.Series, pd.DataFrame)):
+        estimativa = resultado.add(parcial * (fator - 1), fill_value=0)
+    else:
+        estimativa = resultado + parcial * (fator - 1)
+    return _arredondar(estimativa, resultado)
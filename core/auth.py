@@ -1,104 +1,73 @@
-import bcrypt
+import logging
 import os
+import secrets
 import time
-import json
-import uuid
 from pathlib import Path
 from dotenv import load_dotenv
 from authlib.integrations.starlette_client import OAuth
 from authlib.integrations.base_client import OAuthError
 import streamlit as st
+from core.memoria_sessao import MEMORIA_SESSOES
+from core.metricas import METRICAS
+from core.sessoes import criar_armazem
+from core.senhas import gerar_hash, precisa_rehash, rehash_em_segundo_plano, verificar_senha
+from core.usuarios import UsuariosSQLite
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY", "chave_padrao_apenas_para_desenvolvimento")
 SESSION_EXPIRY = int(os.getenv("SESSION_EXPIRY", 1800))
 LOGIN_ATTEMPTS_LIMIT = int(os.getenv("LOGIN_ATTEMPTS_LIMIT", 5))
+# Janela (s) em que as tentativas falhas de um e-mail são contadas
+LOGIN_ATTEMPTS_WINDOW = int(os.getenv("LOGIN_ATTEMPTS_WINDOW", 900))
+# E-mails (separados por vírgula) com acesso às páginas administrativas, como a de métricas
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
 
 USERS_FILE = Path(__file__).parent.parent / "data" / "users.json"
+# Cadastro em SQLite (core.usuarios); o users.json é importado na primeira abertura do banco
+USERS_DB = Path(os.getenv("USERS_DB", Path(__file__).parent.parent / "data" / "users.sqlite"))
 
-USERS_FILE.parent.mkdir(exist_ok=True)
-
-if not USERS_FILE.exists():
-    with open(USERS_FILE, "w") as f:
-        json.dump({"users": []}, f)
+USUARIOS = UsuariosSQLite(USERS_DB, arquivo_json=USERS_FILE)
+# Sessões e tentativas de login por e-mail, compartilhadas entre sessões do navegador (e processos, com SESSION_BACKEND=sqlite)
+SESSOES = criar_armazem()
+METRICAS.medidor("sessoes", lambda: {"entradas": len(SESSOES)})
 
 def load_users():
-    """Carrega os usuários do arquivo JSON."""
-    try:
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {"users": []}
-
-def save_users(users_data):
-    """Salva os dados dos usuários no arquivo JSON."""
-    with open(USERS_FILE, "w") as f:
-        json.dump(users_data, f, indent=2)
+    """Carrega todos os usuários (no formato do antigo users.json)."""
+    return {"users": USUARIOS.listar()}
 
 def get_user_by_email(email):
     """Busca um usuário pelo e-mail."""
-    users_data = load_users()
-    for user in users_data.get("users", []):
-        if user.get("email") == email:
-            return user
-    return None
+    return USUARIOS.por_email(email)
 
 def get_user_by_oauth(provider, provider_id):
     """Busca um usuário pelo ID do provedor OAuth."""
-    users_data = load_users()
-    for user in users_data.get("users", []):
-        if user.get("oauth_provider") == provider and user.get("oauth_id") == provider_id:
-            return user
-    return None
+    return USUARIOS.por_oauth(provider, provider_id)
 
 def hash_password(password):
-    """Gera o hash de uma senha usando bcrypt."""
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    return hashed.decode('utf-8')
+    """Gera o hash de uma senha usando bcrypt (no pool de core.senhas, com o custo calibrado)."""
+    return gerar_hash(password)
 
 def verify_credentials(email, password, hashed_password):
     """Verifica se a senha fornecida corresponde ao hash armazenado."""
-    try:
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-    except ValueError:
-        # Hash inválido ou outro erro de verificação
-        return False
+    return verificar_senha(password, hashed_password)
 
 def register_user(email, password=None, name=None, oauth_provider=None, oauth_id=None):
     """Registra um novo usuário ou atualiza um existente com dados OAuth."""
-    users_data = load_users()
-    
-    # Verificar se o usuário já existe pelo e-mail
-    existing_user = get_user_by_email(email)
-    
-    if existing_user:
-        # Se o usuário já existe, atualiza com os dados OAuth se fornecidos
-        if oauth_provider and oauth_id:
-            existing_user["oauth_provider"] = oauth_provider
-            existing_user["oauth_id"] = oauth_id
-            save_users(users_data)
-            return True
-        return False # Usuário já existe e não é uma atualização OAuth
-    
-    # Criar novo usuário
-    new_user = {
-        "id": str(uuid.uuid4()),
-        "email": email,
-        "name": name if name else email.split('@')[0],
-        "created_at": time.time()
-    }
-    
-    if password:
-        new_user["password"] = hash_password(password)
+    # Usuário já existe e não é uma atualização OAuth: evita calcular o hash da senha à toa
+    if not (oauth_provider and oauth_id) and get_user_by_email(email):
+        return False
     
-    if oauth_provider and oauth_id:
-        new_user["oauth_provider"] = oauth_provider
-        new_user["oauth_id"] = oauth_id
-        
-    users_data["users"].append(new_user)
-    save_users(users_data)
-    return True
+    password_hash = hash_password(password) if password else None
+    return USUARIOS.cadastrar(email, password_hash, name, oauth_provider, oauth_id)
+
+def _chave_sessao():
+    return f"sessao:{st.session_state.get('session_token')}"
+
+def _chave_tentativas(email):
+    return f"tentativas:{email.strip().lower()}"
 
 def init_session():
     """Inicializa o estado da sessão do Streamlit."""
@@ -106,59 +75,89 @@ def init_session():
         st.session_state.auth = False
     if "user" not in st.session_state:
         st.session_state.user = None
+    if "session_token" not in st.session_state:
+        st.session_state.session_token = None
     if "login_attempts" not in st.session_state:
         st.session_state.login_attempts = 0
     if "last_activity" not in st.session_state:
         st.session_state.last_activity = time.time()
-    print(f"[AUTH] init_session: st.session_state.auth = {st.session_state.auth}")
+    log.debug("init_session: auth = %s", st.session_state.auth)
 
 def login_user(user):
-    """Define o usuário como autenticado na sessão."""
+    """Define o usuário como autenticado na sessão e registra a sessão no armazém compartilhado."""
+    st.session_state.session_token = secrets.token_urlsafe(32)
+    SESSOES.set(_chave_sessao(), {"email": user["email"], "inicio": time.time()}, SESSION_EXPIRY)
+    SESSOES.remover(_chave_tentativas(user["email"]))
     st.session_state.auth = True
     st.session_state.user = user
     st.session_state.login_attempts = 0 
     st.session_state.last_activity = time.time()
-    print(f"[AUTH] login_user: Usuário {user["email"]} logado. st.session_state.auth = {st.session_state.auth}")
+    METRICAS.contar("auth.login")
+    log.info("login_user: sessão autenticada")
+
+def is_admin():
+    """Indica se o usuário logado está em ADMIN_EMAILS."""
+    user = st.session_state.get("user") or {}
+    return user.get("email", "").lower() in ADMIN_EMAILS
 
 def logout_user():
     """Limpa o estado da sessão para deslogar o usuário."""
+    if st.session_state.get("session_token"):
+        SESSOES.remover(_chave_sessao())
+    if "id_sessao_memoria" in st.session_state:
+        MEMORIA_SESSOES.encerrar_sessao(st.session_state["id_sessao_memoria"])
+    st.session_state.session_token = None
     st.session_state.auth = False
     st.session_state.user = None
     st.session_state.login_attempts = 0
     st.session_state.last_activity = time.time()
-    print(f"[AUTH] logout_user: st.session_state.auth = {st.session_state.auth}")
+    METRICAS.contar("auth.logout")
+    log.info("logout_user: sessão encerrada")
 
 def authenticate_email_password(email, password):
     """Autentica um usuário com e-mail e senha."""
     user = get_user_by_email(email)
     if user and "password" in user:
         if verify_credentials(email, password, user["password"]):
+            # Hash com custo antigo: refaz com o custo atual sem atrasar o login
+            if precisa_rehash(user["password"]):
+                rehash_em_segundo_plano(password, lambda novo: USUARIOS.atualizar_senha(email, user["password"], novo))
             login_user(user)
-            print(f"[AUTH] authenticate_email_password: Resultado da autenticação para {email}: True")
             return True
         else:
-            increment_login_attempts()
-            print(f"[AUTH] authenticate_email_password: Resultado da autenticação para {email}: False (senha inválida)")
+            increment_login_attempts(email)
+            METRICAS.contar("auth.login_falha")
+            METRICAS.contar("auth.login_falha.senha")
+            log.info("authenticate_email_password: senha inválida")
             return False
     else:
-        increment_login_attempts()
-        print(f"[AUTH] authenticate_email_password: Resultado da autenticação para {email}: False (usuário não encontrado ou sem senha)")
+        increment_login_attempts(email)
+        METRICAS.contar("auth.login_falha")
+        METRICAS.contar("auth.login_falha.usuario")
+        log.info("authenticate_email_password: usuário não encontrado ou sem senha")
         return False
 
-def increment_login_attempts():
-    """Incrementa o contador de tentativas de login."""
+def increment_login_attempts(email=None):
+    """Incrementa o contador de tentativas de login da sessão e, se informado, do e-mail (compartilhado)."""
     st.session_state.login_attempts += 1
+    if email:
+        SESSOES.incrementar(_chave_tentativas(email), LOGIN_ATTEMPTS_WINDOW)
 
-def is_login_attempts_exceeded():
-    """Verifica se o limite de tentativas de login foi excedido."""
-    return st.session_state.login_attempts >= LOGIN_ATTEMPTS_LIMIT
+def is_login_attempts_exceeded(email=None):
+    """Verifica se o limite de tentativas de login foi excedido na sessão ou, em qualquer sessão, para o e-mail."""
+    if st.session_state.login_attempts >= LOGIN_ATTEMPTS_LIMIT:
+        return True
+    return bool(email) and (SESSOES.get(_chave_tentativas(email)) or 0) >= LOGIN_ATTEMPTS_LIMIT
 
 def check_session_expiry():
-    """Verifica se a sessão expirou."""
-    if st.session_state.auth and (time.time() - st.session_state.last_activity > SESSION_EXPIRY):
-        logout_user()
-        return True
-    return False
+    """Verifica se a sessão expirou (por inatividade ou removida do armazém) e renova a expiração se não."""
+    if not st.session_state.auth:
+        return False
+    if st.session_state.get("session_token") and SESSOES.tocar(_chave_sessao(), SESSION_EXPIRY):
+        st.session_state.last_activity = time.time()
+        return False
+    logout_user()
+    return True
 
 def init_oauth():
     """Inicializa os clientes OAuth."""
@@ -0,0 +1,185 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DB = Path(os.getenv("CACHE_DB", Path(__file__).parent.parent / "data" / "cache.sqlite"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+
+
+def normalizar_texto(texto):
+    """Normaliza um texto para uso como chave: minúsculas, sem acentos e espaços únicos."""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", errors="ignore").decode("utf-8")
+    texto = texto.lower().replace(",", ", ")
+    return " ".join(texto.split()).replace(" ,", ",")
+
+
+class CacheDisco:
+    """
+    Cache chave/valor persistido em SQLite, com TTL, limite de entradas (LRU) e estatísticas.
+    Os valores são gravados em JSON ou, com serializacao="pickle", em pickle (ex.: arrays NumPy).
+    """
+
+    def __init__(self, nome, ttl, max_entradas=CACHE_MAX_ENTRIES, caminho=CACHE_DB, serializacao="json"):
+        self.nome = nome
+        self._serializar, self._desserializar = (pickle.dumps, pickle.loads) if serializacao == "pickle" else (json.dumps, json.loads)
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._conexao = None
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+        self.removidos = 0
+
+    def _conectar(self):
+        if self._conexao is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._conexao = sqlite3.connect(str(self.caminho), timeout=30, check_same_thread=False)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.nome} ("
+                "chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado REAL NOT NULL, acessado REAL NOT NULL)"
+            )
+            self._conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.nome}_acessado ON {self.nome} (acessado)")
+            self._conexao.commit()
+        return self._conexao
+
+    def get(self, chave):
+        """Retorna o valor armazenado para a chave, ou None se ausente ou expirado."""
+        agora = time.time()
+        with self._lock:
+            conexao = self._conectar()
+            linha = conexao.execute(f"SELECT valor, criado FROM {self.nome} WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                self.misses += 1
+                return None
+            valor, criado = linha
+            if agora - criado > self.ttl:
+                conexao.execute(f"DELETE FROM {self.nome} WHERE chave = ?", (chave,))
+                conexao.commit()
+                self.expirados += 1
+                self.misses += 1
+                return None
+            conexao.execute(f"UPDATE {self.nome} SET acessado = ? WHERE chave = ?", (agora, chave))
+            conexao.commit()
+            self.hits += 1
+        return self._desserializar(valor)
+
+    def set(self, chave, valor):
+        """Armazena um valor serializável em JSON e aplica o limite de entradas."""
+        agora = time.time()
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute(
+                f"INSERT OR REPLACE INTO {self.nome} (chave, valor, criado, acessado) VALUES (?, ?, ?, ?)",
+                (chave, self._serializar(valor), agora, agora),
+            )
+            total = conexao.execute(f"SELECT COUNT(*) FROM {self.nome}").fetchone()[0]
+            excesso = total - self.max_entradas
+            if excesso > 0:
+                # Remove primeiro as entradas expiradas e, se ainda faltar espaço, as menos usadas
+                cursor = conexao.execute(f"DELETE FROM {self.nome} WHERE criado < ?", (agora - self.ttl,))
+                self.removidos += cursor.rowcount
+                excesso -= cursor.rowcount
+            if excesso > 0:
+                cursor = conexao.execute(
+                    f"DELETE FROM {self.nome} WHERE chave IN "
+                    f"(SELECT chave FROM {self.nome} ORDER BY acessado ASC LIMIT ?)",
+                    (excesso,),
+                )
+                self.removidos += cursor.rowcount
+            conexao.commit()
+
+    def remover(self, chave):
+        """Remove a chave do cache, se presente."""
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute(f"DELETE FROM {self.nome} WHERE chave = ?", (chave,))
+            conexao.commit()
+
+    def limpar(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute(f"DELETE FROM {self.nome}")
+            conexao.commit()
+
+    def estatisticas(self):
+        """Retorna contadores de uso e a taxa de acerto do cache."""
+        with self._lock:
+            entradas = self._conectar().execute(f"SELECT COUNT(*) FROM {self.nome}").fetchone()[0]
+        consultas = self.hits + self.misses
+        return {
+            "nome": self.nome,
+            "entradas": entradas,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirados": self.expirados,
+            "removidos": self.removidos,
+            "taxa_acerto": self.hits / consultas if consultas else 0.0,
+        }
+
+
+class CacheLRU:
+    """Cache em memória com limite de entradas (LRU), seguro para uso entre threads."""
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.removidos = 0
+
+    def get(self, chave):
+        """Retorna o valor da chave (marcando-a como usada recentemente) ou None."""
+        with self._lock:
+            if chave not in self._dados:
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return self._dados[chave]
+
+    def set(self, chave, valor):
+        """Armazena o valor, removendo as entradas menos usadas além do limite."""
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+                self.removidos += 1
+
+    def remover(self, chave):
+        """Remove a chave do cache, se presente."""
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def estatisticas(self):
+        """Retorna contadores de uso e a taxa de acerto do cache."""
+        consultas = self.hits + self.misses
+        return {
+            "entradas": len(self._dados),
+            "hits": self.hits,
+            "misses": self.misses,
+            "removidos": self.removidos,
+            "taxa_acerto": self.hits / consultas if consultas else 0.0,
+        }
@@ -1,10 +1,23 @@
 import pandas as pd
+import hashlib
 import os
 import re
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pandas.core.series import Series
 from google import genai
-from google.genai import types
 from dotenv import load_dotenv
+from core.cache import CacheLRU, normalizar_texto
+from core.amostra import amostra_estratificada, estimar_previa, variantes_amostra
+from core.consulta_sql import TABELA_SQL, ConsultaSQL, sql_disponivel
+from core.cubo import DIMENSOES_CUBO, CuboContagens
+from core.llm import BackendGemini, criar_backend, gravar_resposta
+from core.metricas import METRICAS
+from core.prompt import montar_prompt, resumo_esquema
+from core.sandbox import SANDBOX_WORKERS, sandbox_disponivel, usar_pool
+from core.singleflight import coalescer
 
 load_dotenv()
 
@@ -13,6 +26,31 @@ GEMINI_MODEL = "gemini-2.5-flash"
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", 256))
+# Executa o código gerado no pool de processos isolados (core.sandbox) em vez da thread do Streamlit
+CHATBOT_SANDBOX = os.getenv("CHATBOT_SANDBOX", "1") == "1"
+# "pandas": o Gemini gera código Pandas sobre o df; "sql": gera SQL do DuckDB (core.consulta_sql)
+MODOS_CHATBOT = ("pandas", "sql")
+CHATBOT_MODO = os.getenv("CHATBOT_MODO", "pandas")
+
+# Cache em dois níveis: pergunta normalizada -> código gerado; (hash do código, versão dos dados) -> final_result
+CACHE_CODIGO = CacheLRU(CHATBOT_CACHE_MAX_ENTRIES)
+CACHE_RESULTADOS = CacheLRU(CHATBOT_CACHE_MAX_ENTRIES)
+# Cubo de contagens pré-agregado e consulta SQL por versão dos dados e da amostra (core.cubo, core.consulta_sql)
+CACHE_CUBOS = CacheLRU(8)
+CACHE_SQL = CacheLRU(8)
+# Variantes da amostra estratificada (uf, ano) usadas nas respostas prévias, por versão dos dados
+CACHE_AMOSTRAS = CacheLRU(2)
+# Resumo do esquema incluído nos prompts, por versão dos dados, e tamanho dos últimos prompts enviados
+CACHE_RESUMOS = CacheLRU(4)
+RELATORIOS_PROMPT = deque(maxlen=200)
+# Cálculo da resposta exata em segundo plano, enquanto a página mostra a prévia
+EXECUTOR_CHATBOT = ThreadPoolExecutor(max_workers=max(1, SANDBOX_WORKERS), thread_name_prefix="chatbot")
+_versao_em_cache = None
+_lock_versao = threading.Lock()
+
+# Backend alternativo ao Gemini (ex.: LLM_BACKEND=stub para o servidor local de core.stub_server)
+BACKEND_LLM = criar_backend()
 
 # Inicializa o cliente Gemini. Ele buscará a chave GEMINI_API_KEY automaticamente.
 try:
@@ -21,8 +59,10 @@ except Exception as e:
     print(f"Erro ao inicializar o cliente Gemini: {e}")
     client = None
 
-from pymongo import MongoClient
+from core.mongo_local import conectar_mongo
 
+# Após um deploy, as primeiras sessões chegam juntas: só uma delas carrega do MongoDB
+@coalescer()
 def load_data():
     """Carrega os dados do MongoDB em um DataFrame do Pandas com pré-processamento."""
     
@@ -32,13 +72,14 @@ def load_data():
 
     try:
         # Conecta ao MongoDB
-        client = MongoClient(MONGO_URI)
+        client = conectar_mongo(MONGO_URI)
         db = client[DB_NAME]
         collection = db[COLLECTION_NAME]
         
         # Carrega todos os documentos da coleção para um DataFrame
-        data = list(collection.find({}))
-        df = pd.DataFrame(data)
+        with METRICAS.span("mongo.carregar"):
+            data = list(collection.find({}))
+            df = pd.DataFrame(data)
         
         # Remove a coluna _id do MongoDB, se existir
         if '_id' in df.columns:
@@ -60,105 +101,354 @@ def load_data():
             if col in df.columns:
                 df[col] = df[col].astype(str).str.lower().str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('utf-8')
         
+        versao_dados(df)
         return df
     except Exception as e:
         print(f"Erro ao carregar ou processar os dados do MongoDB: {e}")
         return None
 
-def generate_and_execute_code_gemini(df: pd.DataFrame, query: str):
-    """Usa o Gemini para gerar código Python e o executa para obter a resposta."""
-    
-    if client is None:
-        return "Erro: Cliente Gemini não inicializado. Verifique se a variável de ambiente GEMINI_API_KEY está configurada."
+# --- Cache das respostas do chatbot ---
 
-    # Define o prompt para o Gemini
-    prompt = f"""
-    Você é um assistente de análise de dados. Sua tarefa é gerar um código Python que usa a biblioteca 'pandas' para responder a uma pergunta sobre o DataFrame chamado 'df'.
-    O DataFrame 'df' já está carregado e contém dados de acidentes de trânsito.
-    
-    IMPORTANTE: Todas as colunas de texto (dia_semana, uf, municipio, tipo_acidente, condicao_metereologica) foram convertidas para MINÚSCULAS e SEM ACENTOS. Use apenas valores em minúsculas e sem acentos para filtragem.
-    
-    Para facilitar o mapeamento, use a seguinte tabela de conversão para os dias da semana:
-    - Segunda-feira -> segunda-feira
-    - Terça-feira -> terca-feira
-    - Quarta-feira -> quarta-feira
-    - Quinta-feira -> quinta-feira
-    - Sexta-feira -> sexta-feira
-    - Sábado -> sabado
-    - Domingo -> domingo
-    
-    Para facilitar o entendimento, traduza as UFs(estados) para nomes em extensos como: MG -> Minas Gerais
+# id(df) -> versão; fora de df.attrs porque o pandas copia os attrs para os frames derivados
+_VERSOES = {}
 
-    Para facilitar o entendimento, traduza os tipos acidentes para o normal da língua portuguesa como: Saida de leito carrocavel -> Saída de leito carroçável
 
-    O seu código DEVE aplicar o filtro usando os valores sem acentos e em minúsculas.
-    
-    As colunas relevantes são:
-    - 'data_inversa' (datetime)
-    - 'dia_semana' (string, minúsculas, sem acentos)
-    - 'uf' (string, minúsculas, sem acentos)
-    - 'municipio' (string, minúsculas, sem acentos)
-    - 'tipo_acidente' (string, minúsculas, sem acentos)
-    - 'condicao_metereologica' (string, minúsculas, sem acentos)
-    - 'hora' (integer, 0-23) - **NOVA COLUNA** com a hora do acidente.
-    
-    A pergunta é: "{query}"
-    
-    Gere APENAS o código Python necessário para calcular a resposta. O código deve ser uma única string de código que, quando executada, armazena o resultado final em uma variável chamada 'final_result'.
-    
-    O valor de 'final_result' DEVE ser uma string formatada em português, respondendo diretamente à pergunta do usuário com o resultado da análise.
-    
-    Exemplo de código para 'Qual dia da semana tem mais acidentes?':
-    ```python
-    most_frequent_day = df['dia_semana'].value_counts().idxmax()
-    final_result = f"O dia da semana com a maior frequência de acidentes é a {{most_frequent_day}}."
-    ```
-    
-    Gere o código para a pergunta: "{query}"
+def _registrar_versao(df: pd.DataFrame, versao):
+    _VERSOES[id(df)] = versao
+    weakref.finalize(df, _VERSOES.pop, id(df), None)
+    return versao
+
+
+def versao_dados(df: pd.DataFrame):
+    """
+    Identificador do snapshot de dados: hash das colunas e de todas as linhas, calculado uma vez
+    por objeto (o load_data já o calcula na carga).
+    """
+    versao = _VERSOES.get(id(df))
+    if versao is None:
+        try:
+            linhas = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        except TypeError:  # colunas com listas/dicts
+            linhas = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+        h = hashlib.sha1(f"{len(df)}|{list(df.columns)}".encode("utf-8"))
+        h.update(linhas.tobytes())
+        versao = _registrar_versao(df, h.hexdigest()[:16])
+    return versao
+
+
+def obter_cubo(df: pd.DataFrame, pesos=None):
+    """Cubo de contagens do snapshot (ponderado pelos `pesos` de uma amostra), construído uma vez por versão dos dados."""
+    versao = versao_dados(df)
+    cubo = CACHE_CUBOS.get(versao)
+    if cubo is None:
+        cubo = CuboContagens(df, pesos)
+        CACHE_CUBOS.set(versao, cubo)
+    return cubo
+
+
+def obter_consulta_sql(df: pd.DataFrame):
+    """Função `sql(consulta)` do snapshot, criada uma vez por versão dos dados."""
+    versao = versao_dados(df)
+    consulta = CACHE_SQL.get(versao)
+    if consulta is None:
+        consulta = ConsultaSQL(df, versao)
+        CACHE_SQL.set(versao, consulta)
+    return consulta
+
+
+def obter_amostra(df: pd.DataFrame):
+    """
+    Variantes {nome: (df, pesos)} da amostra estratificada por (uf, ano) do snapshot usadas na
+    prévia (core.amostra.variantes_amostra), cada uma com versão própria para os caches.
+    """
+    versao = versao_dados(df)
+    variantes = CACHE_AMOSTRAS.get(versao)
+    if variantes is None:
+        variantes = variantes_amostra(*amostra_estratificada(df, com_pesos=True))
+        for nome, (quadro, _) in variantes.items():
+            _registrar_versao(quadro, f"{versao}-{nome}")
+        CACHE_AMOSTRAS.set(versao, variantes)
+    return variantes
+
+
+def _variaveis_execucao(df: pd.DataFrame, pesos=None):
+    """Objetos disponíveis ao código gerado além do df."""
+    variaveis = {'cubo': obter_cubo(df, pesos)}
+    if sql_disponivel():
+        variaveis['sql'] = obter_consulta_sql(df)
+    return variaveis
+
+
+def invalidar_cache_chatbot():
+    """Esvazia os dois níveis do cache do chatbot."""
+    CACHE_CODIGO.limpar()
+    CACHE_RESULTADOS.limpar()
+
+
+def _atualizar_versao(versao):
+    """Invalida o cache quando um novo snapshot de dados começa a ser consultado."""
+    global _versao_em_cache
+    with _lock_versao:
+        if versao != _versao_em_cache:
+            invalidar_cache_chatbot()
+            _versao_em_cache = versao
+
+
+def normalizar_pergunta(query):
+    """Chave do cache de código: sem acentos, minúsculas, espaços únicos e sem pontuação final."""
+    return normalizar_texto(query).rstrip(" ?!.")
+
+
+def _chave_codigo(query, modo):
+    return f"{modo}|{normalizar_pergunta(query)}"
+
+
+# Instruções fixas de cada modo; o esquema e os valores das colunas vêm do resumo dos dados (core.prompt)
+INSTRUCOES_PANDAS = f"""
+Gere código Python (pandas) que responde à pergunta sobre acidentes de trânsito no DataFrame 'df', já carregado.
+As colunas de texto estão em minúsculas e sem acentos: filtre apenas com valores como os listados em "Dados".
+Para contagens, rankings e proporções sobre {', '.join(DIMENSOES_CUBO)} ('ano' vem de 'data_inversa'), use o cubo
+pré-agregado `cubo.contagem(por, **filtros)`: devolve uma Series com o número de acidentes por `por` (coluna ou lista)
+em ordem decrescente; filtros por igualdade ou lista de valores; `por=[]` devolve o total; `cubo.total` é o total geral.
+Ex.: cubo.contagem('tipo_acidente', uf='mg', hora=[17, 18, 19]).head(3). Use 'df' só para outras colunas.
+Responda APENAS com um bloco ```python que guarda em 'final_result' uma string em português respondendo à pergunta,
+com UFs por extenso (mg -> Minas Gerais) e termos com acentuação normal (saida de leito carrocavel -> Saída de leito carroçável).
+Exemplo para 'Qual dia da semana tem mais acidentes?':
+```python
+dia = cubo.contagem('dia_semana').idxmax()
+final_result = f"O dia da semana com mais acidentes é {{dia}}."
+```
+"""
+
+INSTRUCOES_SQL = f"""
+Gere código Python que responde à pergunta sobre acidentes de trânsito usando `sql(consulta)`, que executa a consulta
+no DuckDB sobre a tabela '{TABELA_SQL}' e devolve um DataFrame. Filtre e agregue DENTRO do SQL e traga poucas linhas.
+As colunas de texto estão em minúsculas e sem acentos: filtre apenas com valores como os listados em "Dados".
+Responda APENAS com um bloco ```python que guarda em 'final_result' uma string em português respondendo à pergunta,
+com UFs por extenso (mg -> Minas Gerais) e termos com acentuação normal (saida de leito carrocavel -> Saída de leito carroçável).
+Exemplo para 'Qual dia da semana tem mais acidentes?':
+```python
+r = sql("SELECT dia_semana, COUNT(*) AS total FROM {TABELA_SQL} GROUP BY 1 ORDER BY total DESC LIMIT 1")
+final_result = f"O dia da semana com mais acidentes é {{r['dia_semana'].iloc[0]}}."
+```
+"""
+
+
+def obter_resumo(df: pd.DataFrame):
+    """Resumo do esquema para os prompts (core.prompt), calculado uma vez por versão dos dados."""
+    versao = versao_dados(df)
+    resumo = CACHE_RESUMOS.get(versao)
+    if resumo is None:
+        resumo = resumo_esquema(df, prioridade=["data_inversa"] + DIMENSOES_CUBO)
+        CACHE_RESUMOS.set(versao, resumo)
+    return resumo
+
+
+def _montar_prompt(query, modo="pandas", resumo=None):
+    """Prompt enviado ao LLM para gerar o código do modo; retorna (prompt, relatório de tamanho)."""
+    return montar_prompt(INSTRUCOES_SQL if modo == "sql" else INSTRUCOES_PANDAS, query, resumo)
+
+
+def estatisticas_prompt():
+    """Tamanho dos prompts enviados ao LLM (últimas requisições) em tokens estimados."""
+    relatorios = list(RELATORIOS_PROMPT)
+    if not relatorios:
+        return {"prompts": 0}
+    tokens = [r["tokens"] for r in relatorios]
+    return {"prompts": len(tokens), "media_tokens": sum(tokens) / len(tokens), "max_tokens": max(tokens), "ultimo": relatorios[-1]}
+
+
+METRICAS.medidor("prompt", estatisticas_prompt)
+
+
+def _extrair_codigo(generated_text):
+    """Extrai o bloco de código Python da resposta do Gemini."""
+    # Usa regex para extrair o bloco de código
+    match = re.search(r"```python\n(.*?)```", generated_text, re.DOTALL)
+    if match:
+        return match.group(1).strip()
+    # Se não encontrar o bloco, tenta extrair o código de forma mais agressiva
+    match_aggressive = re.search(r"```(.*?)```", generated_text, re.DOTALL)
+    if match_aggressive:
+        return match_aggressive.group(1).strip()
+    # Se ainda assim não encontrar, assume que o texto gerado é o código
+    return generated_text.strip()
+
+
+def extrair_codigo_stream(partes, ao_progresso=None):
+    """
+    Consome a resposta em streaming só até o fechamento do bloco ```python``` (o restante,
+    normalmente uma explicação, não é esperado). Retorna (código, texto recebido).
+    """
+    texto = ""
+    try:
+        for parte in partes:
+            texto += parte
+            if ao_progresso is not None:
+                ao_progresso(texto)
+            inicio = texto.find("```python\n")
+            if inicio >= 0 and texto.find("```", inicio + 10) >= 0:
+                return _extrair_codigo(texto), texto
+    finally:
+        # Encerra o stream (e a conexão) sem esperar o fim da resposta
+        if hasattr(partes, "close"):
+            partes.close()
+    return _extrair_codigo(texto), texto
+
+
+def _backend_llm():
+    """Backend configurado em LLM_BACKEND (ex.: stub local) ou, por padrão, o cliente Gemini."""
+    if BACKEND_LLM is not None:
+        return BACKEND_LLM
+    return BackendGemini(client, GEMINI_MODEL) if client is not None else None
+
+
+@coalescer(chave=lambda query, modo="pandas", ao_progresso=None, resumo=None: _chave_codigo(query, modo))
+def gerar_codigo(query: str, modo: str = "pandas", ao_progresso=None, resumo=None):
+    """
+    Gera (ou reaproveita do cache) o código Pandas, ou Python + SQL no modo "sql", que responde à pergunta.
+    `resumo` é o resumo do esquema dos dados (obter_resumo) incluído no prompt.
+    `ao_progresso(texto)` é chamado a cada parte recebida do LLM.
+    """
+    chave = _chave_codigo(query, modo)
+    generated_code = CACHE_CODIGO.get(chave)
+    if generated_code is not None:
+        METRICAS.contar("cache.codigo.acerto")
+        return generated_code
+    METRICAS.contar("cache.codigo.falha")
+
+    # Chamada ao LLM em streaming
+    prompt, relatorio = _montar_prompt(query, modo, resumo)
+    RELATORIOS_PROMPT.append({"pergunta": query, "modo": modo, **relatorio})
+    with METRICAS.span("llm.gerar"):
+        generated_code, texto = extrair_codigo_stream(_backend_llm().gerar_stream(prompt), ao_progresso)
+    gravar_resposta(prompt, texto, pergunta=query)
+    CACHE_CODIGO.set(chave, generated_code)
+    return generated_code
+
+
+def executar_codigo(df: pd.DataFrame, generated_code: str, amostra: bool = False, interromper=None):
+    """
+    Executa o código gerado sobre o df ou, se `amostra`, estima a resposta na amostra estratificada
+    (core.amostra.estimar_previa; None quando a resposta não tem estimativa ou quando `interromper()`
+    fica verdadeiro antes da próxima variante).
+    """
+    if not amostra:
+        return _executar(df, generated_code)
+    _, pesos = obter_amostra(df)["amostra"]
+    interromper = interromper or (lambda: False)
+    return estimar_previa(lambda variante: None if interromper() else _executar(df, generated_code, variante), pesos)
+
+
+def _chave_resultado(df: pd.DataFrame, generated_code: str):
+    return hashlib.sha1(generated_code.encode("utf-8")).hexdigest(), versao_dados(df)
+
+
+def _executar(df: pd.DataFrame, generated_code: str, variante=None):
+    """
+    Executa o código sobre o df ou sobre uma variante da amostra (obter_amostra); o resultado fica
+    em cache por (hash do código, versão dos dados).
     """
+    alvo, pesos = obter_amostra(df)[variante] if variante else (df, None)
+    chave = _chave_resultado(alvo, generated_code)
+    final_result = CACHE_RESULTADOS.get(chave)
+    if final_result is not None:
+        METRICAS.contar("cache.resultados.acerto")
+        return final_result
+    METRICAS.contar("cache.resultados.falha")
+
+    if CHATBOT_SANDBOX and sandbox_disponivel():
+        contextos = {
+            nome: {'df': quadro, **_variaveis_execucao(quadro, pesos_quadro)}
+            for nome, (quadro, pesos_quadro) in obter_amostra(df).items()
+        }
+        with usar_pool(df, versao_dados(df), _variaveis_execucao(df), contextos) as pool, METRICAS.span("chatbot.exec"):
+            final_result = pool.executar(generated_code, variante)
+    else:
+        local_vars = {'df': alvo, **_variaveis_execucao(alvo, pesos), 'final_result': None, 'pd': pd, 'Series': Series}
+        with METRICAS.span("chatbot.exec"):
+            exec(generated_code, globals(), local_vars)
+        final_result = local_vars['final_result']
+    if final_result is not None:
+        CACHE_RESULTADOS.set(chave, final_result)
+    return final_result
+
+
+def _mensagem_erro(e):
+    """Mensagem exibida ao usuário quando a geração ou a execução do código falha."""
+    # Se o erro for de sequência vazia, é porque o filtro não encontrou nada
+    if "attempt to get argmax of an empty sequence" in str(e):
+        return "Não foram encontrados acidentes do tipo solicitado para realizar a análise."
+    return f"Erro ao conectar com Gemini: {e}. Verifique se a variável de ambiente GEMINI_API_KEY está configurada corretamente."
+
+
+# Perguntas iguais feitas ao mesmo tempo (mesmos dados, modo e pergunta normalizada) compartilham a execução
+@coalescer(chave=lambda df, query, modo: (versao_dados(df), _chave_codigo(query, modo)))
+def _responder(df: pd.DataFrame, query: str, modo: str):
+    """Gera e executa o código, convertendo falhas em mensagens para o usuário."""
+    
+    if _backend_llm() is None:
+        return "Erro: Cliente Gemini não inicializado. Verifique se a variável de ambiente GEMINI_API_KEY está configurada."
+
+    _atualizar_versao(versao_dados(df))
+    generated_code = None
     
-    # Chamada ao Gemini
     try:
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                temperature=0.0,
-            )
-        )
-        
-        # Extrai o código gerado
-        generated_text = response.text
-        
-        # Usa regex para extrair o bloco de código
-        match = re.search(r"```python\n(.*?)```", generated_text, re.DOTALL)
-        if match:
-            generated_code = match.group(1).strip()
-        else:
-            # Se não encontrar o bloco, tenta extrair o código de forma mais agressiva
-            match_aggressive = re.search(r"```(.*?)```", generated_text, re.DOTALL)
-            if match_aggressive:
-                generated_code = match_aggressive.group(1).strip()
-            else:
-                # Se ainda assim não encontrar, assume que o texto gerado é o código
-                generated_code = generated_text.strip()
-        
-        # Executa o código gerado
-        local_vars = {'df': df, 'final_result': None, 'pd': pd, 'Series': Series}
-        
-        exec(generated_code, globals(), local_vars)
+        generated_code = gerar_codigo(query, modo, resumo=obter_resumo(df))
+        final_result = executar_codigo(df, generated_code)
         
         # Tratamento de erro após a execução
-        if local_vars['final_result'] is None:
+        if final_result is None:
+            CACHE_CODIGO.remover(_chave_codigo(query, modo))
             return "Não foi possível gerar a resposta. O código gerado pode ter falhado ou não ter definido 'final_result'."
         
-        return local_vars['final_result']
+        return final_result
         
     except Exception as e:
-        # Se o erro for de sequência vazia, é porque o filtro não encontrou nada
-        if "attempt to get argmax of an empty sequence" in str(e):
-            return "Não foram encontrados acidentes do tipo solicitado para realizar a análise."
-        return f"Erro ao conectar com Gemini: {e}. Verifique se a variável de ambiente GEMINI_API_KEY está configurada corretamente."
+        # Código que falhou não é reaproveitado na próxima pergunta igual
+        if generated_code is not None:
+            CACHE_CODIGO.remover(_chave_codigo(query, modo))
+        return _mensagem_erro(e)
+
+
+def generate_and_execute_code_gemini(df: pd.DataFrame, query: str, modo: str = CHATBOT_MODO):
+    """Usa o Gemini para gerar código Python (Pandas ou SQL, conforme o modo) e o executa para obter a resposta."""
+    return _responder(df, query, modo)
+
+
+def responder_com_previa(df: pd.DataFrame, query: str, modo: str = CHATBOT_MODO, ao_progresso=None):
+    """
+    Retorna (prévia, futuro): a prévia é a resposta aproximada calculada na amostra estratificada
+    (None se a resposta exata já está em cache) e o futuro entrega a resposta exata, calculada em
+    segundo plano sobre o df completo. `ao_progresso(texto)` acompanha o streaming do código.
+    """
+    if _backend_llm() is not None:
+        # O código é gerado uma vez aqui; a prévia e o cálculo exato o reaproveitam do cache
+        _atualizar_versao(versao_dados(df))
+        try:
+            gerar_codigo(query, modo, ao_progresso, obter_resumo(df))
+        except Exception as e:
+            futuro = Future()
+            futuro.set_result(_mensagem_erro(e))
+            return None, futuro
+    futuro = EXECUTOR_CHATBOT.submit(_responder, df, query, modo)
+    codigo = CACHE_CODIGO.get(_chave_codigo(query, modo))
+    if codigo is None or CACHE_RESULTADOS.get(_chave_resultado(df, codigo)) is not None:
+        return None, futuro  # sem código para a prévia, ou a resposta exata já está em cache
+    return _previa(df, codigo, futuro), futuro
+
+
+# Perguntas iguais ao mesmo tempo compartilham a prévia, como compartilham a resposta exata (_responder)
+@coalescer(chave=lambda df, generated_code, futuro: _chave_resultado(df, generated_code))
+def _previa(df: pd.DataFrame, generated_code: str, futuro):
+    """
+    Estimativa na amostra, calculada na thread de quem perguntou enquanto `futuro` calcula a
+    resposta exata; para de rodar variantes da amostra assim que a resposta exata fica pronta.
+    """
+    try:
+        return executar_codigo(df, generated_code, amostra=True, interromper=futuro.done)
+    except Exception:
+        return None  # a página espera a resposta exata, que mostra o erro
 
 if __name__ == "__main__":
     # Teste de funcionalidade
@@ -0,0 +1,39 @@
+# core/codificacao.py
+"""
+Codificação das entradas do formulário com os mapeamentos do LabelEncoder do treinamento
+(label_encoder_mappings.json). O índice de cada valor é montado uma vez, então cada consulta
+é uma busca em dicionário em vez de list.index na lista de valores.
+"""
+import json
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ARQUIVO_MAPEAMENTOS = os.getenv("ARQUIVO_MAPEAMENTOS", "label_encoder_mappings.json")
+
+
+class CodificadorRotulos:
+    """Códigos do LabelEncoder do treinamento (posição do valor na lista), com busca por dicionário."""
+
+    def __init__(self, mapeamentos):
+        self.mapeamentos = mapeamentos
+        # Primeira ocorrência de cada valor, como list.index
+        self._indices = {
+            feature: {valor: i for i, valor in reversed(list(enumerate(valores)))}
+            for feature, valores in mapeamentos.items()
+        }
+
+    def codificar(self, feature, valor):
+        """Código do valor; None se ele não existe no treinamento. Features sem mapeamento passam direto."""
+        if feature not in self._indices:
+            return valor
+        return self._indices[feature].get(valor)
+
+
+@lru_cache(maxsize=1)
+def carregar_codificador(caminho=ARQUIVO_MAPEAMENTOS):
+    """Carrega (uma vez por processo) os mapeamentos do LabelEncoder e monta o codificador."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return CodificadorRotulos(json.load(f))
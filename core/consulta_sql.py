@@ -0,0 +1,113 @@
+# core/consulta_sql.py
+"""
+Modo SQL do chatbot: consultas DuckDB sobre um snapshot colunar (Parquet) dos acidentes.
+
+O snapshot é gravado uma vez por versão dos dados em SNAPSHOT_DIR e exposto como a tabela
+`acidentes`. O código gerado chama `sql("SELECT ...")` e recebe um DataFrame pequeno com o
+resultado da agregação, sem materializar o DataFrame completo em pandas.
+"""
+import os
+import threading
+from pathlib import Path
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import duckdb
+except ImportError:  # modo SQL é opcional
+    duckdb = None
+
+load_dotenv()
+
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", "data/snapshots"))
+SNAPSHOTS_MANTIDOS = int(os.getenv("SNAPSHOTS_MANTIDOS", 2))  # versões: a atual e a anterior (ainda lida por pools antigos)
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", 2))
+TABELA_SQL = "acidentes"
+
+
+def sql_disponivel():
+    """Indica se o DuckDB está instalado."""
+    return duckdb is not None
+
+
+def _remover_snapshots_antigos(diretorio, atual, manter=SNAPSHOTS_MANTIDOS):
+    """
+    Apaga os snapshots além das `manter` versões dos dados mais recentes. As variantes de uma versão
+    (ex.: "<versão>-amostra") contam junto com ela; a versão do snapshot `atual` nunca é apagada.
+    """
+    def versao_base(caminho):
+        return caminho.stem[len(TABELA_SQL) + 1:].split("-")[0]
+
+    recentes = {}
+    for caminho in diretorio.glob(f"{TABELA_SQL}_*.parquet"):
+        base = versao_base(caminho)
+        recentes[base] = max(recentes.get(base, 0.0), caminho.stat().st_mtime)
+    recentes.pop(versao_base(atual), None)
+    mantidas = sorted(recentes, key=recentes.get, reverse=True)[:max(0, manter - 1)]
+    for caminho in diretorio.glob(f"{TABELA_SQL}_*.parquet"):
+        if versao_base(caminho) in recentes and versao_base(caminho) not in mantidas:
+            caminho.unlink(missing_ok=True)
+
+
+def gravar_snapshot(df: pd.DataFrame, versao, diretorio=SNAPSHOT_DIR):
+    """
+    Grava (se ainda não existir) o snapshot Parquet da versão dos dados e devolve o caminho.
+    Ao gravar uma versão nova, apaga os snapshots além das SNAPSHOTS_MANTIDOS versões mais recentes.
+    """
+    diretorio = Path(diretorio)
+    caminho = diretorio / f"{TABELA_SQL}_{versao}.parquet"
+    if not caminho.exists():
+        diretorio.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix(f".{os.getpid()}.tmp")
+        # Colunas object vindas do Mongo podem misturar tipos; no Parquet viram texto
+        objetos = [coluna for coluna in df.columns if df[coluna].dtype == object]
+        df.astype({coluna: "string" for coluna in objetos}).to_parquet(temporario, index=False)
+        # Renomeia só no fim para que outro processo nunca leia um arquivo pela metade
+        os.replace(temporario, caminho)
+        _remover_snapshots_antigos(diretorio, caminho)
+    return caminho
+
+
+class ConsultaSQL:
+    """
+    Executa SQL do DuckDB sobre o snapshot; chamável como `sql(consulta)` no código gerado.
+    O snapshot só é gravado na primeira consulta, então o modo pandas não paga esse custo.
+    """
+
+    def __init__(self, df, versao, diretorio=SNAPSHOT_DIR):
+        self.df = df
+        self.versao = versao
+        self.diretorio = Path(diretorio)
+        self._conexao = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Vai para os workers do sandbox sem a conexão e o lock: cada processo abre os seus
+        estado = self.__dict__.copy()
+        estado.update(_conexao=None, _pid=None, _lock=None)
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def _conectar(self):
+        # Conexões DuckDB não sobrevivem a fork: cada processo (ex.: workers do sandbox) abre a sua
+        if self._conexao is None or self._pid != os.getpid():
+            caminho = gravar_snapshot(self.df, self.versao, self.diretorio)
+            conexao = duckdb.connect(":memory:", config={"threads": DUCKDB_THREADS})
+            conexao.execute(f"CREATE VIEW {TABELA_SQL} AS SELECT * FROM read_parquet('{caminho.as_posix()}')")
+            self._conexao, self._pid = conexao, os.getpid()
+        return self._conexao
+
+    def __call__(self, consulta, parametros=None):
+        """Executa a consulta e devolve o resultado como DataFrame."""
+        if self._pid is not None and self._pid != os.getpid():
+            self._lock = threading.Lock()  # o lock herdado no fork pode ter ficado preso
+        with self._lock:
+            cursor = self._conectar().cursor()
+        try:
+            return cursor.execute(consulta, parametros or []).df()
+        finally:
+            cursor.close()
@@ -0,0 +1,116 @@
+# core/corredor.py
+import math
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from sklearn.neighbors import BallTree
+from core.acidentes import ARQUIVO_ACIDENTES, carregar_acidentes
+from core.geometria import douglas_peucker
+
+RAIO_TERRA_M = 6371000.0
+METROS_POR_GRAU = math.pi * RAIO_TERRA_M / 180.0
+
+
+def _densificar(pontos, espacamento_m):
+    """Insere pontos ao longo de cada trecho para que a distância entre vizinhos não passe de `espacamento_m`."""
+    pontos = np.asarray(pontos, dtype=np.float64)
+    if len(pontos) < 2:
+        return pontos
+    delta = np.diff(pontos, axis=0)
+    escala = np.array([1.0, math.cos(math.radians(float(np.mean(pontos[:, 0]))))])
+    comprimentos = np.hypot(*(delta * escala).T) * METROS_POR_GRAU
+    partes = np.maximum(1, np.ceil(comprimentos / espacamento_m).astype(int))
+    # Frações 0, 1/k, ..., (k-1)/k de cada trecho, mais o último ponto da rota
+    trecho = np.repeat(np.arange(len(delta)), partes)
+    fracao = np.arange(partes.sum()) - np.repeat(np.cumsum(partes) - partes, partes)
+    fracao = fracao / np.repeat(partes, partes)
+    densos = pontos[trecho] + delta[trecho] * fracao[:, None]
+    return np.vstack([densos, pontos[-1:]])
+
+
+def _dentro_do_corredor(coordenadas, pontos, raio_m):
+    """
+    Máscara das `coordenadas` [lat, lon] a até `raio_m` metros da polilinha `pontos`: distância exata
+    ao trecho mais próximo, num plano local (escala da longitude pela latitude de cada coordenada).
+    """
+    rota = _densificar(pontos, raio_m / 2.0)
+    if len(rota) == 1:
+        rota = np.vstack([rota, rota])
+    inicio, fim = rota[:-1], rota[1:]
+    # Trechos de até raio/2: um trecho a até raio do ponto tem o meio a até 1.25 * raio dele
+    escala = np.array([1.0, math.cos(math.radians(float(np.mean(rota[:, 0]))))]) * METROS_POR_GRAU
+    pares = cKDTree((inicio + fim) / 2 * escala).query_ball_point(coordenadas * escala, r=raio_m * 1.5)
+    quantidades = np.fromiter(map(len, pares), dtype=np.int64, count=len(pares))
+    dentro = np.zeros(len(coordenadas), dtype=bool)
+    if not quantidades.sum():
+        return dentro
+    ponto = np.repeat(np.arange(len(coordenadas)), quantidades)
+    trecho = np.concatenate([p for p in pares if p]).astype(np.int64)
+
+    escala_local = np.column_stack([np.ones(len(ponto)), np.cos(np.radians(coordenadas[ponto, 0]))]) * METROS_POR_GRAU
+    a = (inicio[trecho] - coordenadas[ponto]) * escala_local
+    d = (fim[trecho] - inicio[trecho]) * escala_local
+    comprimento2 = np.einsum("ij,ij->i", d, d)
+    t = np.clip(-np.einsum("ij,ij->i", a, d) / np.where(comprimento2 > 0, comprimento2, 1.0), 0.0, 1.0)
+    distancia = np.hypot(*(a + t[:, None] * d).T)
+    dentro[ponto[distancia <= raio_m]] = True
+    return dentro
+
+
+class IndiceAcidentes:
+    """Índice espacial (BallTree com distância haversine) sobre as coordenadas dos acidentes históricos."""
+
+    def __init__(self, acidentes):
+        self.acidentes = acidentes.reset_index(drop=True)
+        self._coordenadas = self.acidentes[["latitude", "longitude"]].to_numpy(dtype=np.float64)
+        self._arvore = BallTree(np.radians(self._coordenadas), metric="haversine")
+
+    def __len__(self):
+        return len(self.acidentes)
+
+    def indices_corredor(self, pontos, raio_m):
+        """
+        Índices dos acidentes a até `raio_m` metros da rota (pontos [lat, lon]).
+
+        A rota é simplificada (tolerância de raio/20) e densificada a cada raio/2; a busca usa
+        raio * 1.08, o que cobre todo o corredor. Os candidatos são então filtrados pela distância
+        exata à rota completa.
+        """
+        pontos = np.asarray(pontos, dtype=np.float64)
+        simplificada = douglas_peucker(pontos, raio_m / 20.0 / METROS_POR_GRAU) if len(pontos) > 2 else pontos
+        amostras = _densificar(simplificada, raio_m / 2.0)
+        vizinhos = self._arvore.query_radius(np.radians(amostras), r=(raio_m * 1.08 + raio_m / 20.0) / RAIO_TERRA_M)
+        if not len(vizinhos):
+            return np.zeros(0, dtype=np.int64)
+        candidatos = np.unique(np.concatenate(vizinhos))
+        return candidatos[_dentro_do_corredor(self._coordenadas[candidatos], pontos, raio_m)]
+
+    def corredor(self, pontos, raio_m=500):
+        """Acidentes próximos à rota, com histogramas por tipo de acidente e por hora do dia."""
+        indices = self.indices_corredor(pontos, raio_m)
+        proximos = self.acidentes.iloc[indices]
+        if "hora" in proximos.columns:
+            horas = proximos["hora"].dropna().astype(int).to_numpy()
+            por_hora = pd.Series(np.bincount(horas, minlength=24)[:24], index=range(24))
+        else:
+            por_hora = pd.Series(0, index=range(24))
+        por_tipo = proximos["tipo_acidente"].value_counts() if "tipo_acidente" in proximos.columns else pd.Series(dtype=int)
+        return {
+            "total": len(proximos),
+            "acidentes": proximos,
+            "por_tipo": por_tipo,
+            "por_hora": por_hora,
+        }
+
+
+@lru_cache(maxsize=1)
+def carregar_indice(caminho=ARQUIVO_ACIDENTES):
+    """Constrói (uma vez por processo) o índice sobre o histórico de acidentes."""
+    return IndiceAcidentes(carregar_acidentes(caminho))
+
+
+def indice_disponivel(caminho=ARQUIVO_ACIDENTES):
+    """Indica se o histórico de acidentes está disponível para as consultas de corredor."""
+    return os.path.exists(caminho)
@@ -0,0 +1,102 @@
+# core/cubo.py
+"""
+Cubo OLAP de contagens de acidentes para as perguntas mais comuns ao chatbot.
+
+A base é uma pré-agregação de `df` por todas as dimensões (uma linha por combinação observada).
+Os sub-cubos de 1 e 2 dimensões são pré-calculados a partir dela; combinações maiores são
+agregadas sob demanda a partir do menor sub-cubo que as contém e ficam guardadas. Assim uma
+contagem típica ("top 3 tipos de acidente em MG") lê milhares de células, não milhões de linhas.
+"""
+import threading
+from itertools import combinations
+import pandas as pd
+
+# Dimensões das perguntas mais comuns ao chatbot (contagens e top-k)
+DIMENSOES_CUBO = ["ano", "dia_semana", "uf", "municipio", "tipo_acidente", "condicao_metereologica", "hora"]
+MAX_SUBCUBOS = 64
+
+
+def _agregar(tabela, dimensoes):
+    """Soma 'acidentes' da tabela agrupando pelas dimensões pedidas."""
+    if not dimensoes:
+        return pd.DataFrame({"acidentes": [int(tabela["acidentes"].sum())]})
+    agregado = tabela.groupby(list(dimensoes), observed=True)["acidentes"].sum().reset_index()
+    agregado["acidentes"] = agregado["acidentes"].astype("int32")
+    return agregado
+
+
+class CuboContagens:
+    """Base agregada por todas as dimensões e sub-cubos menores para responder contagens rapidamente."""
+
+    def __init__(self, df: pd.DataFrame, pesos=None):
+        """`pesos`: peso de cada linha de uma amostra (amostra_estratificada), para contagens expandidas."""
+        colunas = {}
+        for coluna in DIMENSOES_CUBO:
+            if coluna == "ano" and "data_inversa" in df.columns:
+                colunas["ano"] = pd.to_datetime(df["data_inversa"], errors="coerce").dt.year.astype("Int16")
+            elif coluna in df.columns:
+                colunas[coluna] = df[coluna].astype("category")
+        base = pd.DataFrame(colunas)
+        self.dimensoes = list(base.columns)
+        if pesos is None:
+            self.base = base.groupby(self.dimensoes, observed=True, dropna=False).size().reset_index(name="acidentes")
+        else:
+            base["acidentes"] = pesos
+            self.base = base.groupby(self.dimensoes, observed=True, dropna=False)["acidentes"].sum().round().reset_index()
+        self.base["acidentes"] = self.base["acidentes"].astype("int32")
+        self.total = int(self.base["acidentes"].sum())
+
+        self._subcubos = {frozenset(self.dimensoes): self.base}
+        pares = {frozenset(par): _agregar(self.base, par) for par in combinations(self.dimensoes, 2)}
+        self._subcubos.update(pares)
+        for dimensao in self.dimensoes:
+            origem = min((t for d, t in pares.items() if dimensao in d), key=len, default=self.base)
+            self._subcubos[frozenset([dimensao])] = _agregar(origem, [dimensao])
+        self._fixos = len(self._subcubos)
+        # O cubo é compartilhado entre as sessões (CACHE_CUBOS): os sub-cubos sob demanda entram sob lock
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_lock"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.base)
+
+    def subcubo(self, dimensoes):
+        """Menor tabela agregada exatamente pelas dimensões pedidas."""
+        chave = frozenset(dimensoes)
+        desconhecidas = chave - set(self.dimensoes)
+        if desconhecidas:
+            raise KeyError(f"Dimensões fora do cubo: {sorted(desconhecidas)}")
+        with self._lock:
+            tabela = self._subcubos.get(chave)
+            if tabela is None:
+                origem = min((t for d, t in self._subcubos.items() if chave <= d), key=len)
+                if len(self._subcubos) >= self._fixos + MAX_SUBCUBOS:
+                    # Descarta o sub-cubo sob demanda mais antigo (os pré-calculados ficam)
+                    del self._subcubos[list(self._subcubos)[self._fixos]]
+                tabela = self._subcubos[chave] = _agregar(origem, [d for d in self.dimensoes if d in chave])
+        return tabela
+
+    def contagem(self, por, **filtros):
+        """
+        Total de acidentes por `por` (uma coluna ou lista) em ordem decrescente, após filtrar
+        as dimensões por igualdade (valor único) ou pertinência (lista de valores).
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        tabela = self.subcubo(set(por) | set(filtros))
+        for coluna, valor in filtros.items():
+            if isinstance(valor, (list, tuple, set)):
+                tabela = tabela[tabela[coluna].isin(list(valor))]
+            else:
+                tabela = tabela[tabela[coluna] == valor]
+        if not por:
+            return int(tabela["acidentes"].sum())
+        resultado = tabela.groupby(por, observed=True)["acidentes"].sum()
+        return resultado[resultado > 0].sort_values(ascending=False)
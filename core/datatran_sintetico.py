@@ -0,0 +1,247 @@
+# core/datatran_sintetico.py
+"""
+Gerador de acidentes sintéticos no formato do DATATRAN, para testes de escala e benchmarks
+sem a MONGO_URI do Atlas.
+
+UFs, municípios, tipos de acidente e condições meteorológicas vêm dos domínios reais
+(uf_municipio_map.json e label_encoder_mappings.json), com pesos próximos aos da série da PRF:
+picos de acidentes no início da manhã e no fim da tarde, mais acidentes de sexta a domingo e
+céu claro na maioria dos registros. Os campos mantêm o formato da coleção: datas e horários em
+texto ("dd/mm/aaaa", "hh:mm:ss") e coordenadas com vírgula decimal, agrupadas em torno de um
+ponto fixo por município.
+
+Os registros são gerados em lotes vetorizados (NumPy/pandas) e podem ir para arquivos (.jsonl,
+.json, .csv, .parquet) ou para uma coleção (mongod local, mongomock ou os substitutos de
+core.mongo_local):
+
+    python -m core.datatran_sintetico --linhas 1000000 --saida data/datatran_1m.jsonl
+    python -m core.datatran_sintetico --linhas 10000000 --mongo arquivo://data/mongo
+"""
+import argparse
+import json
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from core.codificacao import ARQUIVO_MAPEAMENTOS
+from core.mongo_local import conectar_mongo
+from core.municipios import ARQUIVO_UF_MUNICIPIOS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # saída Parquet é opcional
+    pa = pq = None
+
+load_dotenv()
+
+TAMANHO_LOTE = 100_000
+PERIODO = ("2017-01-02", "2024-12-29")  # de uma segunda-feira a um domingo: semanas completas
+
+# --- DISTRIBUIÇÕES ---
+# Pesos relativos; valores do domínio sem peso aqui recebem PESO_PADRAO.
+
+PESO_PADRAO = 0.5
+PESOS_HORA = [2.2, 1.8, 1.6, 1.5, 1.7, 2.4, 3.5, 4.6, 4.5, 4.4, 4.5, 4.7,
+              4.8, 4.8, 5.0, 5.3, 5.8, 6.6, 6.9, 5.9, 4.8, 4.0, 3.4, 2.8]
+DIAS_SEMANA = ["segunda-feira", "terça-feira", "quarta-feira", "quinta-feira", "sexta-feira", "sábado", "domingo"]
+PESOS_DIA = [13.3, 12.4, 12.6, 13.2, 15.3, 16.5, 16.7]
+PESOS_CONDICAO = {
+    "Ceu Claro": 58, "Nublado": 15, "Chuva": 10, "Sol": 8, "Garoa/Chuvisco": 3.5, "Ignorado": 3,
+    "Nevoeiro/Neblina": 1.5, "Vento": 0.8, "Granizo": 0.05, "Neve": 0.01,
+}
+PESOS_TIPO = {
+    "Colisao traseira": 20, "Saida de leito carrosavel": 14, "Colisao transversal": 9,
+    "Colisao lateral mesmo sentido": 7, "Queda de ocupante de veiculo": 6, "Colisao com objeto": 6,
+    "Tombamento": 5, "Colisao frontal": 5, "Colisao lateral": 4, "Atropelamento de Pedestre": 4,
+    "Colisao lateral sentido oposto": 3, "Colisao com objeto estatico": 3, "Capotamento": 3,
+    "Atropelamento de Animal": 2.5, "Engavetamento": 1.5, "Sinistro pessoal de transito": 1.5,
+    "Incendio": 0.8, "None": 0.1,
+}
+PESOS_UF = {
+    "MG": 13, "SC": 11, "PR": 11, "RS": 7, "SP": 6, "RJ": 6, "GO": 5, "BA": 5, "PE": 4, "ES": 3.5,
+    "MT": 3.5, "MS": 2.5, "PB": 2.5, "RN": 2, "CE": 2, "PI": 2, "RO": 2, "DF": 2, "MA": 1.5,
+    "PA": 1.5, "TO": 1, "AL": 1, "SE": 0.8, "AC": 0.3, "RR": 0.3, "AM": 0.3, "AP": 0.2,
+}
+CENTROS_UF = {  # (latitude, longitude) aproximadas
+    "AC": (-9.0, -70.0), "AL": (-9.6, -36.6), "AM": (-4.0, -63.0), "AP": (1.4, -51.8), "BA": (-12.5, -41.7),
+    "CE": (-5.2, -39.5), "DF": (-15.8, -47.9), "ES": (-19.6, -40.5), "GO": (-15.9, -49.6), "MA": (-5.0, -45.3),
+    "MG": (-18.5, -44.5), "MS": (-20.5, -54.8), "MT": (-12.9, -55.9), "PA": (-3.8, -52.5), "PB": (-7.1, -36.8),
+    "PE": (-8.4, -37.9), "PI": (-7.7, -42.7), "PR": (-24.6, -51.6), "RJ": (-22.3, -42.6), "RN": (-5.8, -36.5),
+    "RO": (-10.9, -62.8), "RR": (2.0, -61.3), "RS": (-29.7, -53.2), "SC": (-27.3, -50.5), "SE": (-10.6, -37.4),
+    "SP": (-22.2, -48.7), "TO": (-10.2, -48.3),
+}
+DISPERSAO_UF = 1.0          # desvio (graus) dos municípios em torno do centro da UF
+DISPERSAO_MUNICIPIO = 0.05  # desvio (graus) dos acidentes em torno do ponto do município
+BRS = [101, 116, 381, 40, 153, 364, 163, 70, 262, 50, 230, 316, 277, 470, 20, 232, 104, 135, 365, 290]
+FASES_DIA = np.array(["Plena Noite"] * 5 + ["Amanhecer"] + ["Pleno dia"] * 12 + ["Anoitecer"] + ["Plena Noite"] * 5)
+# Horários "hh:mm:00" indexados por minuto do dia
+HORARIOS = np.array([f"{h:02d}:{m:02d}:00" for h in range(24) for m in range(60)])
+
+
+def _probabilidades(valores, pesos):
+    p = np.array([pesos.get(v, PESO_PADRAO) for v in valores], dtype=float)
+    return p / p.sum()
+
+
+@lru_cache(maxsize=4)
+def carregar_dominios(arquivo_uf=ARQUIVO_UF_MUNICIPIOS, arquivo_mapeamentos=ARQUIVO_MAPEAMENTOS):
+    """Domínios reais e probabilidades de cada valor (uma vez por processo)."""
+    with open(arquivo_uf, "r", encoding="utf-8") as f:
+        uf_municipios = json.load(f)
+    with open(arquivo_mapeamentos, "r", encoding="utf-8") as f:
+        mapeamentos = json.load(f)
+
+    pares = [(uf, m) for uf in sorted(uf_municipios) for m in sorted(uf_municipios[uf])]
+    ufs = np.array([uf for uf, _ in pares])
+    # O peso da UF é dividido entre os seus municípios
+    por_uf = {uf: len(municipios) for uf, municipios in uf_municipios.items()}
+    p_pares = np.array([PESOS_UF.get(uf, PESO_PADRAO) / por_uf[uf] for uf, _ in pares])
+    # Ponto fixo de cada município (semente própria: não muda com a semente dos registros)
+    rng = np.random.default_rng(2017)
+    centros = np.array([CENTROS_UF.get(uf, (-15.0, -50.0)) for uf, _ in pares])
+    pontos = centros + rng.normal(0, DISPERSAO_UF, centros.shape) * np.where(ufs == "DF", 0.1, 1.0)[:, None]
+
+    condicoes = mapeamentos["condicao_metereologica"]
+    tipos = mapeamentos["tipo_acidente"]
+    return {
+        "ufs": ufs,
+        "municipios": np.array([m for _, m in pares]),
+        "p_pares": p_pares / p_pares.sum(),
+        "pontos": pontos,
+        "condicoes": np.array(condicoes),
+        "p_condicoes": _probabilidades(condicoes, PESOS_CONDICAO),
+        "tipos": np.array(tipos),
+        "p_tipos": _probabilidades(tipos, PESOS_TIPO),
+    }
+
+
+@lru_cache(maxsize=1)
+def _datas():
+    """Todas as datas de PERIODO em texto "dd/mm/aaaa" (formatadas uma vez, depois só indexadas)."""
+    return np.array(pd.date_range(*PERIODO, freq="D").strftime("%d/%m/%Y"))
+
+
+def _decimal_com_virgula(valores, casas):
+    return pd.Series(np.char.mod(f"%.{casas}f", valores)).str.replace(".", ",", regex=False)
+
+
+def gerar_lote(n, rng, inicio_id=0, dominios=None):
+    """DataFrame com `n` acidentes sintéticos, no formato dos documentos da coleção."""
+    d = dominios or carregar_dominios()
+    datas = _datas()
+
+    # O dia da semana é sorteado com os pesos de PESOS_DIA e a data é montada a partir dele
+    dia = rng.choice(7, n, p=np.array(PESOS_DIA) / sum(PESOS_DIA))
+    data = rng.integers(0, len(datas) // 7, n) * 7 + dia
+    hora = rng.choice(24, n, p=np.array(PESOS_HORA) / sum(PESOS_HORA))
+    par = rng.choice(len(d["ufs"]), n, p=d["p_pares"])
+    pontos = d["pontos"][par] + rng.normal(0, DISPERSAO_MUNICIPIO, (n, 2))
+    condicao = d["condicoes"][rng.choice(len(d["condicoes"]), n, p=d["p_condicoes"])]
+    condicao[(condicao == "Sol") & ((hora < 6) | (hora > 17))] = "Ceu Claro"  # não há sol à noite
+
+    return pd.DataFrame({
+        "id": np.arange(inicio_id, inicio_id + n),
+        "data_inversa": datas[data],
+        "dia_semana": np.array(DIAS_SEMANA)[dia],
+        "horario": HORARIOS[hora * 60 + rng.integers(0, 60, n)],
+        "uf": d["ufs"][par],
+        "br": np.array(BRS)[rng.integers(0, len(BRS), n)],
+        "km": _decimal_com_virgula(rng.uniform(0, 800, n), 1),
+        "municipio": d["municipios"][par],
+        "tipo_acidente": d["tipos"][rng.choice(len(d["tipos"]), n, p=d["p_tipos"])],
+        "fase_dia": FASES_DIA[hora],
+        "condicao_metereologica": condicao,
+        "mortos": rng.binomial(1, 0.05, n),
+        "feridos": rng.poisson(0.9, n),
+        "veiculos": 1 + rng.poisson(0.8, n),
+        "latitude": _decimal_com_virgula(pontos[:, 0], 6),
+        "longitude": _decimal_com_virgula(pontos[:, 1], 6),
+    })
+
+
+def gerar_lotes(linhas, semente=0, tamanho_lote=TAMANHO_LOTE):
+    """Gera os registros em DataFrames de até `tamanho_lote` linhas; (semente, tamanho_lote) fixam a saída."""
+    for indice, inicio in enumerate(range(0, linhas, tamanho_lote)):
+        rng = np.random.default_rng([semente, indice])
+        yield gerar_lote(min(tamanho_lote, linhas - inicio), rng, inicio_id=inicio)
+
+
+def gerar_registros(linhas, semente=0, tamanho_lote=TAMANHO_LOTE):
+    """Registros como dicionários (o formato dos documentos do MongoDB, sem o _id)."""
+    for lote in gerar_lotes(linhas, semente, tamanho_lote):
+        yield from lote.to_dict("records")
+
+
+# --- SAÍDAS ---
+
+def escrever_arquivo(caminho, linhas, semente=0, formato=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Grava `linhas` registros em .jsonl, .json (lista, como o datatran_consolidado.json), .csv
+    (separador ';', como os CSVs abertos da PRF) ou .parquet, lote a lote.
+    """
+    formato = formato or os.path.splitext(str(caminho))[1].lstrip(".")
+    if formato not in ("jsonl", "json", "csv", "parquet"):
+        raise ValueError(f"Formato de saída desconhecido: '{formato}'")
+    if formato == "parquet" and pq is None:
+        raise RuntimeError("A saída Parquet precisa do pyarrow instalado.")
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+    lotes = gerar_lotes(linhas, semente, tamanho_lote)
+    if formato == "parquet":
+        escritor = None
+        for lote in lotes:
+            tabela = pa.Table.from_pandas(lote, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            escritor.write_table(tabela)
+        if escritor is not None:
+            escritor.close()
+        return linhas
+
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        if formato == "json":
+            f.write("[")
+        for indice, lote in enumerate(lotes):
+            if formato == "jsonl":
+                f.write(lote.to_json(orient="records", lines=True, force_ascii=False))
+            elif formato == "json":
+                f.write(("," if indice else "") + lote.to_json(orient="records", force_ascii=False)[1:-1])
+            else:
+                lote.to_csv(f, sep=";", index=False, header=indice == 0)
+        if formato == "json":
+            f.write("]")
+    return linhas
+
+
+def carregar_mongo(uri, banco, colecao, linhas, semente=0, substituir=True, tamanho_lote=TAMANHO_LOTE):
+    """Insere `linhas` registros na coleção, em lotes (`substituir` apaga a coleção antes)."""
+    destino = conectar_mongo(uri)[banco][colecao]
+    if substituir:
+        destino.drop()
+    for lote in gerar_lotes(linhas, semente, tamanho_lote):
+        destino.insert_many(lote.to_dict("records"), ordered=False)
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera acidentes sintéticos no formato do DATATRAN.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo .jsonl, .json, .csv ou .parquet")
+    parser.add_argument("--formato", help="Formato do arquivo (padrão: a extensão de --saida)")
+    parser.add_argument("--mongo", help="URI de destino (mongodb://..., mongomock://, arquivo://<diretório>)")
+    parser.add_argument("--banco", default=os.getenv("DB_NAME", "datatran"))
+    parser.add_argument("--colecao", default=os.getenv("COLLECTION_NAME", "acidentes"))
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args()
+    if not (args.saida or args.mongo):
+        parser.error("informe --saida e/ou --mongo")
+
+    if args.saida:
+        escrever_arquivo(args.saida, args.linhas, args.semente, args.formato, args.lote)
+        print(f"{args.linhas} registros gravados em {args.saida} ({os.path.getsize(args.saida) / 1e6:.1f} MB).")
+    if args.mongo:
+        carregar_mongo(args.mongo, args.banco, args.colecao, args.linhas, args.semente, tamanho_lote=args.lote)
+        print(f"{args.linhas} registros carregados em {args.banco}.{args.colecao}.")
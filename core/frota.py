@@ -0,0 +1,131 @@
+# core/frota.py
+"""
+Matriz de custo ajustado por risco para N origens (depósitos) x M destinos.
+
+    python -m core.frota --origens "Campinas, SP" "Recife, PE" --destinos "Rio de Janeiro, RJ" "Olinda, PE"
+
+As linhas (CSV ou JSON Lines) são emitidas conforme cada par é calculado.
+"""
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import requests
+from core.rotas import (
+    _buscar_nominatim,
+    _buscar_rotas_osrm,
+    _extrair_localizacao,
+    _pontuar_rotas,
+    riscos_localizacoes,
+)
+
+CAMPOS = ["i", "j", "origem", "destino", "tempo_min", "distancia_km", "risco_medio", "custo_ajustado", "erro"]
+
+
+def _geocodificar_seguro(cidade):
+    """Geocodifica sem interromper a matriz em caso de erro de rede."""
+    try:
+        return _extrair_localizacao(_buscar_nominatim(cidade))
+    except requests.exceptions.RequestException:
+        return None, None, None, None
+
+
+def _rota_osrm(geoA, geoB, risco_origem, risco_destino, peso_risco):
+    rotas = _pontuar_rotas(_buscar_rotas_osrm(geoA[0], geoA[1], geoB[0], geoB[1]), risco_origem, risco_destino, peso_risco)
+    return rotas[0] if rotas else None
+
+
+def _rota_offline(geoA, geoB, condicao_metereologica, peso_risco, momento):
+    from core.grafo import carregar_grafo
+    return carregar_grafo().rota(geoA[0], geoA[1], geoB[0], geoB[1], condicao_metereologica, peso_risco, momento)
+
+
+def matriz_risco(origens, destinos, condicao_metereologica, peso_risco=50, max_concorrencia=8,
+                 offline=False, momento=None):
+    """
+    Gera, à medida que ficam prontos, os dicionários de cada par (origem i, destino j) com
+    tempo, distância, risco e custo ajustado da melhor rota.
+
+    Cada cidade é geocodificada uma única vez, o risco de todas as localizações sai de uma
+    única chamada ao modelo e no máximo `max_concorrencia` rotas são buscadas ao mesmo tempo.
+    """
+    momento = momento or datetime.now()
+    cidades = list(dict.fromkeys(list(origens) + list(destinos)))
+
+    executor = ThreadPoolExecutor(max_workers=max_concorrencia, thread_name_prefix="frota")
+    try:
+        geo = dict(zip(cidades, executor.map(_geocodificar_seguro, cidades)))
+
+        localizacao = {c: f"{g[3]}_{g[2]}" for c, g in geo.items() if g[2] and g[3]}
+        risco_loc = riscos_localizacoes(localizacao.values(), condicao_metereologica, momento)
+        risco = {c: risco_loc[loc] for c, loc in localizacao.items()}
+
+        futuros = {}
+        for i, origem in enumerate(origens):
+            for j, destino in enumerate(destinos):
+                linha = {"i": i, "j": j, "origem": origem, "destino": destino}
+                geoA, geoB = geo[origem], geo[destino]
+                if geoA[0] is None or geoB[0] is None:
+                    yield {**linha, "erro": "geocodificação falhou"}
+                    continue
+                if offline:
+                    futuro = executor.submit(_rota_offline, geoA, geoB, condicao_metereologica, peso_risco, momento)
+                else:
+                    futuro = executor.submit(_rota_osrm, geoA, geoB, risco.get(origem, 0.0), risco.get(destino, 0.0), peso_risco)
+                futuros[futuro] = linha
+
+        for futuro in as_completed(futuros):
+            linha = futuros[futuro]
+            try:
+                rota = futuro.result()
+            except requests.exceptions.RequestException as e:
+                yield {**linha, "erro": f"rota falhou: {e}"}
+                continue
+            if rota is None:
+                yield {**linha, "erro": "rota não encontrada"}
+                continue
+            yield {**linha, **{campo: rota[campo] for campo in ("tempo_min", "distancia_km", "risco_medio", "custo_ajustado")}}
+    finally:
+        # Se o consumidor parar antes do fim (break, close()), as rotas ainda na fila são canceladas
+        # e ninguém espera as requisições em andamento
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _ler_lista(valores, arquivo):
+    """Junta as cidades passadas na linha de comando com as de um arquivo (uma por linha)."""
+    cidades = list(valores or [])
+    if arquivo:
+        with open(arquivo, encoding="utf-8") as f:
+            cidades += [linha.strip() for linha in f if linha.strip()]
+    return cidades
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matriz N x M de tempo, distância e risco entre depósitos e destinos.")
+    parser.add_argument("--origens", nargs="*", help="Cidades de origem (ex.: 'Campinas, SP')")
+    parser.add_argument("--destinos", nargs="*", help="Cidades de destino")
+    parser.add_argument("--arquivo-origens", help="Arquivo com uma cidade de origem por linha")
+    parser.add_argument("--arquivo-destinos", help="Arquivo com uma cidade de destino por linha")
+    parser.add_argument("--condicao", default="Ceu Claro", help="Condição meteorológica para o modelo")
+    parser.add_argument("--peso-risco", type=float, default=50)
+    parser.add_argument("--concorrencia", type=int, default=8, help="Máximo de requisições simultâneas")
+    parser.add_argument("--offline", action="store_true", help="Usa o grafo local em vez do OSRM")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], default="csv")
+    args = parser.parse_args()
+
+    origens = _ler_lista(args.origens, args.arquivo_origens)
+    destinos = _ler_lista(args.destinos, args.arquivo_destinos)
+    if not origens or not destinos:
+        parser.error("Informe ao menos uma origem e um destino.")
+
+    escritor = csv.DictWriter(sys.stdout, fieldnames=CAMPOS) if args.formato == "csv" else None
+    if escritor:
+        escritor.writeheader()
+    for linha in matriz_risco(origens, destinos, args.condicao, args.peso_risco, args.concorrencia, args.offline):
+        if escritor:
+            escritor.writerow(linha)
+        else:
+            print(json.dumps(linha, ensure_ascii=False, default=float))
+        sys.stdout.flush()
@@ -0,0 +1,63 @@
+# core/geometria.py
+import math
+import numpy as np
+
+# Tolerância de simplificação em pixels de tela: abaixo disso a diferença não é visível no mapa
+TOLERANCIA_PIXELS = 1.0
+
+
+def para_array(coordenadas):
+    """Converte a geometria GeoJSON do OSRM ([lon, lat]) em um array float32 compacto (N, 2) no formato [lat, lon]."""
+    pontos = np.asarray(coordenadas, dtype=np.float32).reshape(-1, 2)
+    return np.ascontiguousarray(pontos[:, ::-1])
+
+
+def tolerancia_para_zoom(zoom, lat_referencia=0.0, pixels=TOLERANCIA_PIXELS):
+    """Tamanho, em graus, de `pixels` pixels de tela em um mapa Web Mercator no nível de zoom dado."""
+    return pixels * 360.0 / (256.0 * 2 ** zoom) * math.cos(math.radians(lat_referencia))
+
+
+def douglas_peucker(pontos, tolerancia):
+    """Simplifica uma polilinha [lat, lon] pelo algoritmo de Douglas-Peucker (iterativo e vetorizado por trecho)."""
+    n = len(pontos)
+    if n < 3:
+        return pontos.copy()
+
+    # Trabalha em coordenadas aproximadamente isotrópicas (longitude escalada pelo cosseno da latitude)
+    xy = np.asarray(pontos, dtype=np.float64).copy()
+    xy[:, 1] *= math.cos(math.radians(float(np.mean(xy[:, 0]))))
+
+    manter = np.zeros(n, dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, n - 1)]
+    while pilha:
+        i, j = pilha.pop()
+        if j <= i + 1:
+            continue
+        a, b = xy[i], xy[j]
+        trecho = xy[i + 1:j]
+        dy, dx = b - a
+        comprimento = math.hypot(dy, dx)
+        if comprimento == 0.0:
+            distancias = np.hypot(trecho[:, 0] - a[0], trecho[:, 1] - a[1])
+        else:
+            distancias = np.abs(dx * (trecho[:, 0] - a[0]) - dy * (trecho[:, 1] - a[1])) / comprimento
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia:
+            k += i + 1
+            manter[k] = True
+            pilha.append((i, k))
+            pilha.append((k, j))
+    return pontos[manter]
+
+
+def simplificar_para_zoom(pontos, zoom):
+    """Simplifica a geometria para exibição no nível de zoom do mapa, mantendo o array original intacto."""
+    if len(pontos) < 3:
+        return pontos
+    return douglas_peucker(pontos, tolerancia_para_zoom(zoom, float(np.mean(pontos[:, 0]))))
+
+
+def simplificar_por_nivel(pontos, zooms):
+    """Uma versão simplificada da geometria para cada nível de zoom em `zooms` (tupla na mesma ordem)."""
+    return tuple(simplificar_para_zoom(pontos, zoom) for zoom in zooms)
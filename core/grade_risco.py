@@ -0,0 +1,155 @@
+# core/grade_risco.py
+"""
+Grade horária pré-calculada de risco previsto e densidade histórica de acidentes.
+
+O job de pré-cálculo roda offline e salva arrays compactos (float16) em um .npz:
+
+    python -m core.grade_risco --acidentes datatran_consolidado.json --saida data/grade_risco.npz
+
+Servir uma camada para o mapa é só fatiar o array da hora pedida, sem inferência do modelo.
+"""
+import argparse
+import os
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from core.acidentes import ARQUIVO_ACIDENTES, carregar_acidentes
+from core.rotas import DIA_SEMANA_MAP, MODELO_RISCO
+
+load_dotenv()
+
+GRADE_RISCO = os.getenv("GRADE_RISCO", "data/grade_risco.npz")
+RESOLUCAO_GRADE = 0.1  # graus (~11 km)
+# Extensão do território brasileiro (lat_min, lat_max, lon_min, lon_max)
+LIMITES_BRASIL = (-34.0, 6.0, -74.0, -34.0)
+CAMADAS = ("risco", "densidade")
+
+
+class GradeRisco:
+    """Arrays (24, linhas, colunas) de risco previsto e densidade de acidentes por hora do dia."""
+
+    def __init__(self, risco, densidade, limites, resolucao):
+        self.risco = np.asarray(risco, dtype=np.float16)
+        self.densidade = np.asarray(densidade, dtype=np.float16)
+        self.limites = tuple(float(x) for x in limites)
+        self.resolucao = float(resolucao)
+
+    @property
+    def bounds(self):
+        """Cantos [[sul, oeste], [norte, leste]] no formato do folium."""
+        lat_min, lat_max, lon_min, lon_max = self.limites
+        return [[lat_min, lon_min], [lat_max, lon_max]]
+
+    def camada(self, hora, tipo="risco"):
+        """Fatia (linhas, colunas) da camada pedida para a hora do dia; linha 0 é o extremo sul."""
+        if tipo not in CAMADAS:
+            raise ValueError(f"Camada desconhecida: {tipo}")
+        return getattr(self, tipo)[int(hora) % 24]
+
+    def valor(self, lat, lon, hora, tipo="risco"):
+        """Valor da camada na célula que contém (lat, lon)."""
+        lat_min, _, lon_min, _ = self.limites
+        linha = int((lat - lat_min) // self.resolucao)
+        coluna = int((lon - lon_min) // self.resolucao)
+        camada = self.camada(hora, tipo)
+        if not (0 <= linha < camada.shape[0] and 0 <= coluna < camada.shape[1]):
+            return 0.0
+        return float(camada[linha, coluna])
+
+    def salvar(self, caminho):
+        np.savez_compressed(caminho, risco=self.risco, densidade=self.densidade,
+                            limites=np.array(self.limites), resolucao=np.array(self.resolucao))
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            return cls(dados["risco"], dados["densidade"], dados["limites"], dados["resolucao"])
+
+
+def construir_grade(acidentes, modelo=None, condicao_metereologica="Ceu Claro", momento=None,
+                    resolucao=RESOLUCAO_GRADE, limites=LIMITES_BRASIL):
+    """
+    Rasteriza os acidentes em células de `resolucao` graus.
+
+    A densidade é a contagem de acidentes por célula e hora, normalizada pelo máximo.
+    O risco previsto de cada célula usa a localização (UF_MUNICÍPIO) com mais acidentes nela,
+    com todas as combinações localização x hora avaliadas em uma única chamada ao modelo.
+    """
+    modelo = MODELO_RISCO if modelo is None else modelo
+    momento = momento or datetime.now()
+    lat_min, lat_max, lon_min, lon_max = limites
+    n_linhas = int(np.ceil((lat_max - lat_min) / resolucao))
+    n_colunas = int(np.ceil((lon_max - lon_min) / resolucao))
+
+    linha = ((acidentes["latitude"].to_numpy() - lat_min) // resolucao).astype(np.int64)
+    coluna = ((acidentes["longitude"].to_numpy() - lon_min) // resolucao).astype(np.int64)
+    dentro = (linha >= 0) & (linha < n_linhas) & (coluna >= 0) & (coluna < n_colunas)
+    df = pd.DataFrame({
+        "celula": (linha * n_colunas + coluna)[dentro],
+        "hora": acidentes["hora"].to_numpy()[dentro],
+        "localizacao": (acidentes["uf"].astype(str) + "_" + acidentes["municipio"].astype(str)).to_numpy()[dentro],
+    }).dropna(subset=["hora"])
+    df["hora"] = df["hora"].astype(np.int64)
+
+    # Densidade histórica: contagem por (hora, célula)
+    contagem = np.bincount(df["hora"].to_numpy() * (n_linhas * n_colunas) + df["celula"].to_numpy(),
+                           minlength=24 * n_linhas * n_colunas).astype(np.float32)
+    densidade = contagem / contagem.max() if contagem.max() > 0 else contagem
+
+    # Risco previsto: localização dominante de cada célula com dados
+    dominante = df.groupby(["celula", "localizacao"]).size().reset_index(name="n")
+    dominante = dominante.sort_values("n", ascending=False).drop_duplicates("celula")
+    localizacoes, loc_celula = np.unique(dominante["localizacao"].to_numpy(), return_inverse=True)
+    risco = np.zeros((24, n_linhas * n_colunas), dtype=np.float32)
+    if modelo is not None and len(localizacoes):
+        dados = pd.DataFrame({
+            'hora_do_dia': np.repeat(np.arange(24), len(localizacoes)),
+            'mes': momento.month,
+            'dia_semana': DIA_SEMANA_MAP.get(momento.weekday()),
+            'condicao_metereologica': condicao_metereologica,
+            'localizacao': np.tile(localizacoes, 24),
+        })
+        tabela = modelo.predict_proba(dados)[:, 1].reshape(24, len(localizacoes))
+        risco[:, dominante["celula"].to_numpy()] = tabela[:, loc_celula]
+
+    forma = (24, n_linhas, n_colunas)
+    return GradeRisco(risco.reshape(forma), densidade.reshape(forma), limites, resolucao)
+
+
+@lru_cache(maxsize=96)
+def imagem_camada(grade, hora, tipo="risco"):
+    """Converte a camada em uma imagem RGBA (uint8), de amarelo a vermelho, transparente onde não há dados."""
+    valores = grade.camada(hora, tipo).astype(np.float32)
+    maximo = float(valores.max())
+    v = valores / maximo if maximo > 0 else valores
+    imagem = np.zeros(valores.shape + (4,), dtype=np.uint8)
+    imagem[..., 0] = 255
+    imagem[..., 1] = (255 * (1 - v)).astype(np.uint8)
+    imagem[..., 3] = np.where(valores > 0, 90 + 140 * v, 0).astype(np.uint8)
+    return imagem
+
+
+@lru_cache(maxsize=1)
+def carregar_grade(caminho=GRADE_RISCO):
+    """Carrega (uma vez por processo) a grade pré-calculada."""
+    return GradeRisco.carregar(caminho)
+
+
+def grade_disponivel(caminho=GRADE_RISCO):
+    """Indica se a grade de risco já foi pré-calculada."""
+    return os.path.exists(caminho)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula a grade horária de risco e densidade de acidentes.")
+    parser.add_argument("--acidentes", default=ARQUIVO_ACIDENTES, help="JSON do DATATRAN")
+    parser.add_argument("--condicao", default="Ceu Claro", help="Condição meteorológica usada no modelo")
+    parser.add_argument("--resolucao", type=float, default=RESOLUCAO_GRADE, help="Tamanho da célula em graus")
+    parser.add_argument("--saida", default=GRADE_RISCO)
+    args = parser.parse_args()
+
+    grade = construir_grade(carregar_acidentes(args.acidentes), condicao_metereologica=args.condicao, resolucao=args.resolucao)
+    grade.salvar(args.saida)
+    print(f"Grade salva em {args.saida}: {grade.risco.shape} células por camada ({os.path.getsize(args.saida) / 1e6:.1f} MB).")
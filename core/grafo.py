@@ -0,0 +1,292 @@
+# core/grafo.py
+"""
+Roteamento offline ponderado por risco sobre um grafo viário local.
+
+O grafo é construído uma vez a partir de um extrato OSM (osmnx) e salvo em
+formato CSR (arrays NumPy em um .npz), que carrega em poucos milissegundos:
+
+    python -m core.grafo --osm sp.osm --acidentes datatran_consolidado.json --saida data/grafo_sp.npz
+"""
+import argparse
+import math
+import os
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from dotenv import load_dotenv
+from core.acidentes import carregar_acidentes
+from core.rotas import DIA_SEMANA_MAP, MODELO_RISCO
+
+load_dotenv()
+
+GRAFO_LOCAL = os.getenv("GRAFO_LOCAL", "data/grafo.npz")
+RAIO_TERRA_M = 6371000.0
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """Distância em metros (vetorizada) entre pontos em graus."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_M * np.arcsin(np.sqrt(a))
+
+
+def _coordenadas_planas(lat, lon, lat_referencia):
+    """Projeção equiretangular simples, suficiente para busca de vizinho mais próximo."""
+    return np.column_stack([lat, np.asarray(lon) * math.cos(math.radians(lat_referencia))])
+
+
+class GrafoRodoviario:
+    """Grafo viário dirigido em formato CSR com tempo de percurso e localização (UF_MUNICÍPIO) por aresta."""
+
+    def __init__(self, lat, lon, indptr, origens, destinos, comprimentos, tempos, loc_aresta, localizacoes):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.origens = np.asarray(origens, dtype=np.int32)
+        self.destinos = np.asarray(destinos, dtype=np.int32)
+        self.comprimentos = np.asarray(comprimentos, dtype=np.float32)
+        self.tempos = np.asarray(tempos, dtype=np.float32)
+        self.loc_aresta = np.asarray(loc_aresta, dtype=np.int32)
+        self.localizacoes = [str(l) for l in localizacoes]
+
+        # Velocidade máxima do grafo: distância / vmax é um limite inferior do tempo entre dois nós
+        validas = self.tempos > 0
+        self.vmax = float(np.max(self.comprimentos[validas] / self.tempos[validas])) if validas.any() else 1.0
+        self._lat_referencia = float(np.mean(self.lat)) if len(self.lat) else 0.0
+        self._arvore = cKDTree(_coordenadas_planas(self.lat, self.lon, self._lat_referencia))
+        # Pesos zero não viram arestas no csgraph: o tempo mínimo de uma aresta é 1 ms
+        self._tempos_busca = np.maximum(self.tempos.astype(np.float64), 1e-3)
+        self._matriz_tempos = None
+        self._tabelas_risco = {}
+
+    @property
+    def n_nos(self):
+        return len(self.lat)
+
+    @property
+    def n_arestas(self):
+        return len(self.destinos)
+
+    @classmethod
+    def de_arestas(cls, lat, lon, origens, destinos, comprimentos, tempos, acidentes=None):
+        """Monta o CSR a partir de listas de arestas; associa cada nó à localização do acidente histórico mais próximo."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        origens = np.asarray(origens, dtype=np.int32)
+        ordem = np.argsort(origens, kind="stable")
+        origens = origens[ordem]
+        destinos = np.asarray(destinos, dtype=np.int32)[ordem]
+        comprimentos = np.asarray(comprimentos, dtype=np.float32)[ordem]
+        tempos = np.asarray(tempos, dtype=np.float32)[ordem]
+        indptr = np.zeros(len(lat) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origens, minlength=len(lat)), out=indptr[1:])
+
+        if acidentes is not None and len(acidentes):
+            localizacao = acidentes["uf"].astype(str) + "_" + acidentes["municipio"].astype(str)
+            localizacoes, loc_acidente = np.unique(localizacao.to_numpy(), return_inverse=True)
+            lat_referencia = float(np.mean(lat))
+            arvore = cKDTree(_coordenadas_planas(acidentes["latitude"].to_numpy(), acidentes["longitude"].to_numpy(), lat_referencia))
+            _, mais_proximo = arvore.query(_coordenadas_planas(lat, lon, lat_referencia))
+            loc_no = loc_acidente[mais_proximo]
+        else:
+            localizacoes = np.array([""])
+            loc_no = np.zeros(len(lat), dtype=np.int32)
+
+        return cls(lat, lon, indptr, origens, destinos, comprimentos, tempos, loc_no[origens], localizacoes)
+
+    @classmethod
+    def de_osm(cls, arquivo_osm, acidentes=None):
+        """Constrói o grafo a partir de um extrato OSM (.osm/.xml) usando osmnx."""
+        import osmnx as ox
+
+        G = ox.graph_from_xml(arquivo_osm, simplify=True, retain_all=False)
+        G = ox.routing.add_edge_speeds(G)
+        G = ox.routing.add_edge_travel_times(G)
+        indice = {no: i for i, no in enumerate(G.nodes)}
+        lat = [dados["y"] for _, dados in G.nodes(data=True)]
+        lon = [dados["x"] for _, dados in G.nodes(data=True)]
+        origens, destinos, comprimentos, tempos = [], [], [], []
+        for u, v, dados in G.edges(data=True):
+            origens.append(indice[u])
+            destinos.append(indice[v])
+            comprimentos.append(dados["length"])
+            tempos.append(dados["travel_time"])
+        return cls.de_arestas(lat, lon, origens, destinos, comprimentos, tempos, acidentes)
+
+    def salvar(self, caminho):
+        """Salva o grafo em um .npz não comprimido (carregamento rápido)."""
+        np.savez(
+            caminho,
+            lat=self.lat, lon=self.lon, indptr=self.indptr, origens=self.origens, destinos=self.destinos,
+            comprimentos=self.comprimentos, tempos=self.tempos, loc_aresta=self.loc_aresta,
+            localizacoes=np.array(self.localizacoes, dtype=str),
+        )
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Carrega um grafo salvo por `salvar`."""
+        with np.load(caminho, allow_pickle=False) as dados:
+            return cls(**{nome: dados[nome] for nome in dados.files})
+
+    def tabela_risco(self, momento, condicao_metereologica, modelo=None):
+        """Risco previsto por hora do dia e localização, shape (24, n_localizacoes), em uma única chamada ao modelo."""
+        modelo = MODELO_RISCO if modelo is None else modelo
+        chave = (momento.month, momento.weekday(), condicao_metereologica, id(modelo))
+        if chave not in self._tabelas_risco:
+            n_loc = len(self.localizacoes)
+            if modelo is None:
+                tabela = np.zeros((24, n_loc))
+            else:
+                dados = pd.DataFrame({
+                    'hora_do_dia': np.repeat(np.arange(24), n_loc),
+                    'mes': momento.month,
+                    'dia_semana': DIA_SEMANA_MAP.get(momento.weekday()),
+                    'condicao_metereologica': condicao_metereologica,
+                    'localizacao': self.localizacoes * 24,
+                })
+                try:
+                    tabela = modelo.predict_proba(dados)[:, 1].reshape(24, n_loc)
+                except Exception:
+                    tabela = np.zeros((24, n_loc))
+            self._tabelas_risco[chave] = tabela
+        return self._tabelas_risco[chave]
+
+    def no_mais_proximo(self, lat, lon):
+        """Índice do nó do grafo mais próximo de (lat, lon)."""
+        _, indice = self._arvore.query([lat, lon * math.cos(math.radians(self._lat_referencia))])
+        return int(indice)
+
+    def _matriz(self, pesos):
+        return csr_matrix((pesos, self.destinos, self.indptr), shape=(self.n_nos, self.n_nos))
+
+    def _tempos_de_chegada(self, origem, destino, limite=0.0):
+        """
+        Dijkstra por tempo a partir de `origem`, só até o tempo `limite` (nós mais distantes ficam com
+        inf). O limite parte do tempo em linha reta a vmax e é multiplicado por 4 até alcançar `destino`
+        ou esgotar a componente de `origem`. Retorna (chegada, predecessores, limite usado).
+        """
+        if self._matriz_tempos is None:
+            self._matriz_tempos = self._matriz(self._tempos_busca)
+        distancia = _haversine_m(self.lat[origem], self.lon[origem], self.lat[destino], self.lon[destino])
+        limite = max(limite, 2 * distancia / self.vmax, 60.0)
+        while True:
+            chegada, anteriores = dijkstra(self._matriz_tempos, indices=origem, return_predecessors=True, limit=limite)
+            if np.isfinite(chegada[destino]):
+                return chegada, anteriores, limite
+            alcancados = np.isfinite(chegada)
+            if not np.any(alcancados[self.origens] & ~alcancados[self.destinos]):
+                return chegada, anteriores, limite
+            limite *= 4
+
+    def _arestas_do_caminho(self, anteriores, destino, pesos):
+        """Arestas (as de menor peso entre nós repetidos) do caminho até `destino` na árvore de predecessores."""
+        caminho = []
+        v = destino
+        while anteriores[v] >= 0:
+            u = anteriores[v]
+            inicio = self.indptr[u]
+            candidatas = np.flatnonzero(self.destinos[inicio:self.indptr[u + 1]] == v) + inicio
+            caminho.append(int(candidatas[np.argmin(pesos[candidatas])]))
+            v = u
+        caminho.reverse()
+        return caminho
+
+    def menor_caminho(self, origem, destino, tabela_risco, hora_partida_s=0.0, peso_risco=50):
+        """
+        Caminho de menor custo tempo * (1 + peso_risco * risco / 60), onde o risco de cada aresta
+        depende da hora em que ela é percorrida. Retorna a lista de arestas do caminho, ou None.
+
+        Duas buscas de Dijkstra limitadas (scipy.sparse.csgraph, em C): a primeira, só por tempo, dá a
+        hora em que cada nó é alcançado pelo caminho mais rápido, e essa hora define o risco das arestas
+        que saem dele; a segunda minimiza o custo com esses riscos, até o custo do caminho mais rápido
+        (nenhum caminho mais caro que ele pode ser o ótimo, e como custo >= tempo, todos os nós que ela
+        alcança têm hora conhecida).
+        """
+        if origem == destino:
+            return []
+        chegada, anteriores, limite_tempo = self._tempos_de_chegada(origem, destino)
+        if not np.isfinite(chegada[destino]):
+            return None
+        caminho_rapido = self._arestas_do_caminho(anteriores, destino, self._tempos_busca)
+
+        tabela = np.asarray(tabela_risco, dtype=np.float64)
+        fator = peso_risco / 60.0
+        custo_rapido = self._custos(caminho_rapido, chegada, tabela, hora_partida_s, fator).sum() * (1 + 1e-9)
+        if custo_rapido > limite_tempo:
+            # a segunda busca chega a nós com tempo até custo_rapido: a hora deles também é necessária
+            chegada, _, _ = self._tempos_de_chegada(origem, destino, custo_rapido)
+        # Arestas que saem de nós além do limite ficam com o tempo puro: a busca limitada não chega a elas
+        custos = self._tempos_busca.copy()
+        alcancadas = np.flatnonzero(np.isfinite(chegada)[self.origens])
+        custos[alcancadas] = self._custos(alcancadas, chegada, tabela, hora_partida_s, fator)
+        _, anteriores = dijkstra(self._matriz(custos), indices=origem, return_predecessors=True, limit=custo_rapido)
+        return self._arestas_do_caminho(anteriores, destino, custos)
+
+    def _custos(self, arestas, chegada, tabela, hora_partida_s, fator):
+        """Custo das `arestas` com o risco da hora em que sua origem é alcançada."""
+        saida = chegada[self.origens[arestas]]
+        horas = ((hora_partida_s + saida) // 3600).astype(np.int64) % 24
+        return self._tempos_busca[arestas] * (1.0 + fator * tabela[horas, self.loc_aresta[arestas]])
+
+    def rota(self, latA, lonA, latB, lonB, condicao_metereologica, peso_risco=50, momento=None, modelo=None):
+        """Rota de menor custo ajustado entre dois pontos, no mesmo formato de `core.rotas.calcular_rota`."""
+        momento = momento or datetime.now()
+        origem = self.no_mais_proximo(latA, lonA)
+        destino = self.no_mais_proximo(latB, lonB)
+        tabela = self.tabela_risco(momento, condicao_metereologica, modelo)
+        hora_partida_s = momento.hour * 3600 + momento.minute * 60 + momento.second
+        caminho = self.menor_caminho(origem, destino, tabela, hora_partida_s, peso_risco)
+        if caminho is None:
+            return None
+
+        arestas = np.array(caminho, dtype=np.int64)
+        nos = np.concatenate([[origem], self.destinos[arestas]]) if len(arestas) else np.array([origem])
+        tempos = self.tempos[arestas].astype(np.float64)
+        # Hora em que cada aresta começa a ser percorrida, para ponderar o risco pelo tempo de exposição
+        inicio = hora_partida_s + np.concatenate([[0.0], np.cumsum(tempos)[:-1]]) if len(tempos) else tempos
+        horas = (inicio // 3600).astype(int) % 24
+        riscos = np.asarray(tabela)[horas, self.loc_aresta[arestas]] if len(arestas) else np.zeros(0)
+        tempo_total = tempos.sum() / 60.0
+        risco_medio = float(np.average(riscos, weights=tempos)) if tempos.sum() > 0 else 0.0
+        return {
+            "coordenadas": np.column_stack([self.lat[nos], self.lon[nos]]).astype(np.float32), # Formato [lat, lon]
+            "tempo_min": tempo_total,
+            "distancia_km": float(self.comprimentos[arestas].sum()) / 1000.0,
+            "risco_medio": risco_medio,
+            "custo_ajustado": tempo_total + risco_medio * peso_risco,
+            "resumo": "Grafo local (offline)",
+        }
+
+
+@lru_cache(maxsize=2)
+def carregar_grafo(caminho=GRAFO_LOCAL):
+    """Carrega (uma vez por processo) o grafo local salvo em disco."""
+    return GrafoRodoviario.carregar(caminho)
+
+
+def grafo_local_disponivel(caminho=GRAFO_LOCAL):
+    """Indica se existe um grafo local pré-construído."""
+    return os.path.exists(caminho)
+
+
+def calcular_rota_local(latA, lonA, latB, lonB, municipioA, ufA, municipioB, ufB, condicao_metereologica, peso_risco=50):
+    """Equivalente offline de `core.rotas.calcular_rota`, usando o grafo local."""
+    rota = carregar_grafo().rota(latA, lonA, latB, lonB, condicao_metereologica, peso_risco)
+    return [rota] if rota else []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Constrói o grafo viário local para roteamento offline.")
+    parser.add_argument("--osm", required=True, help="Extrato OSM (.osm/.xml)")
+    parser.add_argument("--acidentes", help="JSON do DATATRAN para associar localizações (UF_MUNICÍPIO) às arestas")
+    parser.add_argument("--saida", default=GRAFO_LOCAL)
+    args = parser.parse_args()
+
+    acidentes = carregar_acidentes(args.acidentes) if args.acidentes else None
+    grafo = GrafoRodoviario.de_osm(args.osm, acidentes)
+    grafo.salvar(args.saida)
+    print(f"Grafo salvo em {args.saida}: {grafo.n_nos} nós, {grafo.n_arestas} arestas, {len(grafo.localizacoes)} localizações.")
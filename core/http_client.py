@@ -0,0 +1,75 @@
+# core/http_client.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from core.metricas import METRICAS
+
+load_dotenv()
+
+# --- CONFIGURAÇÕES POR SERVIÇO ---
+# Timeouts no formato (conexão, leitura) em segundos
+TIMEOUTS = {
+    "nominatim": (float(os.getenv("NOMINATIM_CONNECT_TIMEOUT", 3.05)), float(os.getenv("NOMINATIM_TIMEOUT", 10))),
+    "osrm": (float(os.getenv("OSRM_CONNECT_TIMEOUT", 3.05)), float(os.getenv("OSRM_TIMEOUT", 15))),
+    # No streaming, o timeout de leitura vale para o intervalo entre partes da resposta
+    "llm": (float(os.getenv("LLM_CONNECT_TIMEOUT", 3.05)), float(os.getenv("LLM_TIMEOUT", 60))),
+}
+HEADERS = {
+    "nominatim": {"User-Agent": "CalculadoraDeRotasStreamlit/1.0"},
+    "osrm": {},
+    "llm": {},
+}
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", 0.3))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+
+# Pool de threads compartilhado para chamadas de rede independentes (ex.: geocodificar origem e destino)
+EXECUTOR_HTTP = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="http")
+
+_sessoes = {}
+_lock = threading.Lock()
+
+
+def _criar_sessao(servico):
+    """Cria uma sessão com keep-alive, pool de conexões e retry com backoff exponencial."""
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    sessao = requests.Session()
+    sessao.mount("http://", adapter)
+    sessao.mount("https://", adapter)
+    sessao.headers.update(HEADERS.get(servico, {}))
+    return sessao
+
+
+def obter_sessao(servico):
+    """Retorna a sessão HTTP compartilhada do serviço, criando-a na primeira chamada."""
+    with _lock:
+        if servico not in _sessoes:
+            _sessoes[servico] = _criar_sessao(servico)
+        return _sessoes[servico]
+
+
+def http_get(servico, url, params=None):
+    """GET usando a sessão do serviço e o timeout configurado para ele."""
+    with METRICAS.span(f"http.{servico}"):
+        response = obter_sessao(servico).get(url, params=params, timeout=TIMEOUTS[servico])
+        response.raise_for_status()
+    return response
+
+
+def http_post_stream(servico, url, json=None):
+    """POST com resposta em streaming (o chamador deve fechar a resposta, ex.: com `with`)."""
+    response = obter_sessao(servico).post(url, json=json, stream=True, timeout=TIMEOUTS[servico])
+    response.raise_for_status()
+    response.encoding = response.encoding or "utf-8"
+    return response
@@ -0,0 +1,97 @@
+# core/llm.py
+"""
+Backends de geração de texto do chatbot, todos com a mesma interface `gerar_stream(prompt)`,
+que produz a resposta em partes à medida que chega.
+
+- "gemini": API do Gemini (generate_content_stream).
+- "stub": servidor local (core.stub_server) que reproduz respostas gravadas com latência
+  configurável, para medir e otimizar a latência do chatbot sem rede:
+
+    python -m core.stub_server --porta 8089 --latencia 0.8 --latencia-token 0.02 --gravacoes data/gravacoes_llm.jsonl
+    LLM_BACKEND=stub LLM_URL=http://127.0.0.1:8089/llm/generate streamlit run login.py
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+from core.cache import normalizar_texto
+from core.http_client import http_post_stream
+
+load_dotenv()
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_URL = os.getenv("LLM_URL", "http://127.0.0.1:8089/llm/generate")
+# Se definido, as respostas do Gemini são gravadas neste JSONL para o stub reproduzir depois
+LLM_GRAVACOES = os.getenv("LLM_GRAVACOES")
+
+_lock_gravacoes = threading.Lock()
+
+
+def chave_prompt(prompt):
+    """Identificador estável de um prompt (ignora acentos, maiúsculas e espaços)."""
+    return hashlib.sha1(normalizar_texto(prompt).encode("utf-8")).hexdigest()
+
+
+class BackendGemini:
+    """Geração em streaming pela API do Gemini."""
+
+    def __init__(self, client, modelo):
+        self.client = client
+        self.modelo = modelo
+
+    def gerar_stream(self, prompt):
+        from google.genai import types
+
+        for parte in self.client.models.generate_content_stream(
+            model=self.modelo,
+            contents=[prompt],
+            config=types.GenerateContentConfig(temperature=0.0),
+        ):
+            if parte.text:
+                yield parte.text
+
+
+class BackendHTTP:
+    """Geração em streaming por um endpoint HTTP que devolve texto em partes (ex.: o stub local)."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def gerar_stream(self, prompt):
+        # Fechar o gerador (ex.: assim que o bloco de código termina) encerra a conexão
+        with http_post_stream("llm", self.url, json={"prompt": prompt}) as response:
+            for parte in response.iter_content(chunk_size=None, decode_unicode=True):
+                if parte:
+                    yield parte
+
+
+def criar_backend(nome=LLM_BACKEND, url=LLM_URL):
+    """Backend HTTP configurado, ou None quando o chatbot deve usar o cliente Gemini."""
+    if nome in ("stub", "http"):
+        return BackendHTTP(url)
+    return None
+
+
+def gravar_resposta(prompt, resposta, pergunta=None, arquivo=LLM_GRAVACOES):
+    """Acrescenta a resposta ao arquivo de gravações (JSONL) lido pelo stub."""
+    if not arquivo:
+        return
+    registro = {"prompt": chave_prompt(prompt), "pergunta": pergunta, "resposta": resposta}
+    with _lock_gravacoes:
+        Path(arquivo).parent.mkdir(parents=True, exist_ok=True)
+        with open(arquivo, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def carregar_gravacoes(arquivo):
+    """Lê o JSONL de gravações; a última gravação de um mesmo prompt prevalece."""
+    gravacoes = {}
+    if arquivo and os.path.exists(arquivo):
+        with open(arquivo, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    gravacoes[registro["prompt"]] = registro
+    return gravacoes
@@ -0,0 +1,112 @@
+# core/mapa.py
+import hashlib
+import os
+import folium
+import numpy as np
+from branca.element import MacroElement
+from dotenv import load_dotenv
+from jinja2 import Template
+from core.cache import CacheLRU
+
+load_dotenv()
+
+ZOOM_MAPA = 6
+# Níveis de detalhe das rotas (core.geometria.simplificar_por_nivel): o mapa mostra o nível mais
+# detalhado que não passa do zoom atual, então a linha continua fiel ao aproximar a partir de ZOOM_MAPA
+NIVEIS_ZOOM_ROTAS = (ZOOM_MAPA, 10, 14)
+CORES_ROTAS = ["blue", "purple", "orange", "gray"]
+MAPA_CACHE_MAX_ENTRIES = int(os.getenv("MAPA_CACHE_MAX_ENTRIES", 64))
+
+# HTML dos mapas já renderizados, compartilhado entre sessões do mesmo processo
+CACHE_MAPAS = CacheLRU(MAPA_CACHE_MAX_ENTRIES)
+
+
+def chave_mapa(*partes):
+    """Hash estável dos dados que definem um mapa (arrays NumPy são considerados pelo conteúdo)."""
+    h = hashlib.sha1()
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            h.update(str(parte.dtype).encode())
+            h.update(str(parte.shape).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            h.update(repr(parte).encode("utf-8"))
+        h.update(b"|")
+    return h.hexdigest()
+
+
+class _TrocaNivelZoom(MacroElement):
+    """Script que mantém no mapa só a camada de rotas do nível de detalhe do zoom atual."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var mapa = {{ this._parent.get_name() }};
+            var niveis = [{% for zoom, camada in this.niveis %}[{{ zoom }}, {{ camada.get_name() }}]{{ "," if not loop.last }}{% endfor %}];
+            function trocarNivel() {
+                var zoom = mapa.getZoom();
+                niveis.forEach(function(nivel, i) {
+                    var ativo = (i === 0 || zoom >= nivel[0]) && (i === niveis.length - 1 || zoom < niveis[i + 1][0]);
+                    if (ativo) { mapa.addLayer(nivel[1]); } else { mapa.removeLayer(nivel[1]); }
+                });
+            }
+            mapa.on("zoomend", trocarNivel);
+            trocarNivel();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, niveis):
+        super().__init__()
+        self._name = "TrocaNivelZoom"
+        self.niveis = niveis
+
+
+def construir_mapa_rotas(origem, destino, rotas, camada=None):
+    """
+    Monta o mapa folium com os marcadores de origem/destino e as rotas, com uma geometria
+    simplificada por nível de NIVEIS_ZOOM_ROTAS em `rota["coordenadas_mapa"]`.
+    `origem` e `destino` são tuplas (lat, lon, texto_popup); `camada` é uma tupla opcional
+    (nome, imagem_rgba, bounds) sobreposta ao mapa.
+    """
+    centro = [(origem[0] + destino[0]) / 2, (origem[1] + destino[1]) / 2]
+    m = folium.Map(location=centro, zoom_start=ZOOM_MAPA)
+
+    if camada is not None:
+        nome, imagem, bounds = camada
+        # A linha 0 da imagem é o extremo sul da grade
+        folium.raster_layers.ImageOverlay(
+            imagem, bounds=bounds, origin="lower", mercator_project=True, name=nome
+        ).add_to(m)
+
+    # Marcadores de Origem/Destino
+    folium.Marker([origem[0], origem[1]], popup=origem[2], icon=folium.Icon(color="green")).add_to(m)
+    folium.Marker([destino[0], destino[1]], popup=destino[2], icon=folium.Icon(color="red")).add_to(m)
+
+    niveis = []
+    for n, zoom in enumerate(NIVEIS_ZOOM_ROTAS):
+        grupo = folium.FeatureGroup(name=f"rotas (zoom {zoom})", control=False, show=zoom == ZOOM_MAPA).add_to(m)
+        for i, rota in enumerate(rotas):
+            # Destaque para a Rota Otimizada (primeira da lista)
+            is_best_route = i == 0
+            folium.PolyLine(
+                rota["coordenadas_mapa"][n].tolist(),
+                color=CORES_ROTAS[i % len(CORES_ROTAS)],
+                weight=5 if is_best_route else 3,
+                opacity=0.9 if is_best_route else 0.5
+            ).add_to(grupo)
+        niveis.append((zoom, grupo))
+    _TrocaNivelZoom(niveis).add_to(m)
+    return m
+
+
+def html_mapa_rotas(origem, destino, rotas, camada=None):
+    """HTML do mapa de rotas, reconstruído apenas quando origem, destino, rotas ou camada mudam."""
+    partes_rotas = [parte for r in rotas for parte in (r["resumo"], *r["coordenadas_mapa"])]
+    # A camada é identificada pelo nome (ex.: "risco 18h"), sem precisar hashear a imagem
+    chave = chave_mapa(origem, destino, camada[0] if camada else None, *partes_rotas)
+    html = CACHE_MAPAS.get(chave)
+    if html is None:
+        html = construir_mapa_rotas(origem, destino, rotas, camada).get_root().render()
+        CACHE_MAPAS.set(chave, html)
+    return html
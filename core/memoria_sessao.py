@@ -0,0 +1,191 @@
+# core/memoria_sessao.py
+"""
+Orçamento de memória para os objetos grandes das sessões (ex.: geometrias completas das rotas).
+
+Em vez de ficarem no st.session_state, onde só saem quando a sessão expira, esses objetos ficam
+em um armazém do processo com o tamanho aproximado de cada entrada. Quando uma sessão passa do
+seu orçamento (SESSAO_MEMORIA_MB) ou o processo passa do orçamento global (SESSOES_MEMORIA_MB),
+as entradas usadas há mais tempo vão para o cache em disco (core.cache, em pickle) e voltam à
+memória no próximo acesso; as que não podem ser serializadas são descartadas.
+"""
+import os
+import pickle
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from dotenv import load_dotenv
+from core.cache import CacheDisco
+from core.metricas import METRICAS
+
+load_dotenv()
+
+SESSAO_MEMORIA_MB = float(os.getenv("SESSAO_MEMORIA_MB", 20))
+SESSOES_MEMORIA_MB = float(os.getenv("SESSOES_MEMORIA_MB", 512))
+SESSION_EXPIRY = int(os.getenv("SESSION_EXPIRY", 1800))
+_AMOSTRA_LISTA = 100  # listas longas têm o tamanho estimado pelos primeiros elementos
+
+
+def tamanho_aproximado(obj, _vistos=None):
+    """Tamanho aproximado em bytes de um objeto e do que ele referencia."""
+    vistos = _vistos if _vistos is not None else set()
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):  # DataFrame
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, "nbytes"):  # arrays NumPy e Series
+        return int(obj.nbytes)
+    tamanho = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        tamanho += sum(tamanho_aproximado(k, vistos) + tamanho_aproximado(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        itens = list(obj)
+        if len(itens) > _AMOSTRA_LISTA:
+            amostra = sum(tamanho_aproximado(item, vistos) for item in itens[:_AMOSTRA_LISTA])
+            tamanho += amostra * len(itens) // _AMOSTRA_LISTA
+        else:
+            tamanho += sum(tamanho_aproximado(item, vistos) for item in itens)
+    return tamanho
+
+
+def id_sessao(estado):
+    """Identificador da sessão guardado no próprio estado (ex.: st.session_state)."""
+    if "id_sessao_memoria" not in estado:
+        estado["id_sessao_memoria"] = uuid.uuid4().hex
+    return estado["id_sessao_memoria"]
+
+
+class MemoriaSessoes:
+    """Objetos grandes por (sessão, chave), com orçamento por sessão e global e despejo LRU para o disco."""
+
+    def __init__(self, orcamento_sessao_mb=SESSAO_MEMORIA_MB, orcamento_global_mb=SESSOES_MEMORIA_MB, disco=None):
+        self.orcamento_sessao = int(orcamento_sessao_mb * 1024 * 1024)
+        self.orcamento_global = int(orcamento_global_mb * 1024 * 1024)
+        self.disco = disco if disco is not None else CacheDisco("memoria_sessoes", ttl=SESSION_EXPIRY, serializacao="pickle")
+        self._entradas = OrderedDict()  # (sessão, chave) -> (valor, tamanho), da menos para a mais recente
+        self._por_sessao = {}           # sessão -> bytes em memória
+        self._total = 0
+        # Entradas despejadas cuja gravação em disco ainda não terminou (continuam visíveis para obter)
+        self._gravando = {}
+        self._lock = threading.Lock()
+        # Gravações em disco em série: uma cópia antiga nunca termina depois de uma mais nova
+        self._lock_disco = threading.Lock()
+        self.despejadas = 0
+        self.descartadas = 0
+        self.recarregadas = 0
+
+    def _retirar(self, item):
+        valor, tamanho = self._entradas.pop(item)
+        sessao = item[0]
+        self._total -= tamanho
+        self._por_sessao[sessao] -= tamanho
+        if not self._por_sessao[sessao]:
+            del self._por_sessao[sessao]
+        return valor
+
+    def _despejar(self, item):
+        """Tira a entrada da memória (sob o lock); a gravação em disco fica para _gravar, fora dele."""
+        valor = self._retirar(item)
+        self._gravando[item] = valor
+        return item, valor
+
+    def _gravar(self, despejadas):
+        """Serializa e grava as entradas despejadas, sem segurar o lock do armazém."""
+        for item, valor in despejadas:
+            chave = f"{item[0]}|{item[1]}"
+            with self._lock_disco:
+                try:
+                    self.disco.set(chave, valor)
+                    gravada = True
+                except (TypeError, AttributeError, pickle.PicklingError):
+                    gravada = False  # não serializável (ex.: conexões, locks): não vai para o disco
+                with self._lock:
+                    substituida = self._gravando.get(item) is not valor
+                    if not substituida:
+                        del self._gravando[item]
+                    self.despejadas += gravada
+                    self.descartadas += not gravada
+                if substituida and gravada:
+                    self.disco.remover(chave)  # guardada de novo ou removida durante a gravação
+
+    def _aplicar_orcamentos(self, sessao):
+        despejadas = []
+        while self._por_sessao.get(sessao, 0) > self.orcamento_sessao:
+            despejadas.append(self._despejar(next(item for item in self._entradas if item[0] == sessao)))
+        while self._total > self.orcamento_global:
+            despejadas.append(self._despejar(next(iter(self._entradas))))
+        return despejadas
+
+    def _admitir(self, sessao, chave, valor, tamanho):
+        """Coloca a entrada na memória; devolve as entradas despejadas, a gravar depois de soltar o lock."""
+        item = (sessao, chave)
+        self._entradas[item] = (valor, tamanho)
+        self._por_sessao[sessao] = self._por_sessao.get(sessao, 0) + tamanho
+        self._total += tamanho
+        return self._aplicar_orcamentos(sessao)
+
+    def guardar(self, sessao, chave, valor):
+        """Guarda o valor da sessão, despejando entradas antigas se algum orçamento estourar."""
+        tamanho = tamanho_aproximado(valor)
+        self.disco.remover(f"{sessao}|{chave}")  # a cópia despejada antes ficou desatualizada
+        with self._lock:
+            self._gravando.pop((sessao, chave), None)
+            if (sessao, chave) in self._entradas:
+                self._retirar((sessao, chave))
+            despejadas = self._admitir(sessao, chave, valor, tamanho)
+        self._gravar(despejadas)
+
+    def obter(self, sessao, chave, padrao=None):
+        """Valor da sessão (trazido de volta do disco se tiver sido despejado), ou `padrao`."""
+        item = (sessao, chave)
+        with self._lock:
+            if item in self._entradas:
+                self._entradas.move_to_end(item)
+                return self._entradas[item][0]
+            if item in self._gravando:
+                return self._gravando[item]
+        valor = self.disco.get(f"{sessao}|{chave}")
+        if valor is None:
+            return padrao
+        despejadas = []
+        with self._lock:
+            self.recarregadas += 1
+            if item not in self._entradas:
+                despejadas = self._admitir(sessao, chave, valor, tamanho_aproximado(valor))
+        self._gravar(despejadas)
+        return valor
+
+    def remover(self, sessao, chave):
+        self.disco.remover(f"{sessao}|{chave}")
+        with self._lock:
+            self._gravando.pop((sessao, chave), None)
+            if (sessao, chave) in self._entradas:
+                self._retirar((sessao, chave))
+
+    def encerrar_sessao(self, sessao):
+        """Libera toda a memória da sessão (as cópias em disco expiram sozinhas)."""
+        with self._lock:
+            for item in [item for item in self._entradas if item[0] == sessao]:
+                self._retirar(item)
+
+    def estatisticas(self):
+        """Totais de memória para monitoramento."""
+        with self._lock:
+            maior = max(self._por_sessao.values(), default=0)
+            return {
+                "bytes": self._total,
+                "orcamento_global": self.orcamento_global,
+                "orcamento_sessao": self.orcamento_sessao,
+                "sessoes": len(self._por_sessao),
+                "entradas": len(self._entradas),
+                "maior_sessao_bytes": maior,
+                "despejadas": self.despejadas,
+                "descartadas": self.descartadas,
+                "recarregadas": self.recarregadas,
+            }
+
+
+# Armazém compartilhado pelas sessões do processo
+MEMORIA_SESSOES = MemoriaSessoes()
+METRICAS.medidor("memoria_sessoes", MEMORIA_SESSOES.estatisticas)
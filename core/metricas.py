@@ -0,0 +1,254 @@
+# core/metricas.py
+"""
+Tempos e contadores dos caminhos quentes (carga do MongoDB, carga do modelo, predict, Nominatim,
+OSRM, LLM, exec do código gerado, páginas e treino).
+
+    with METRICAS.span("http.osrm"):
+        ...
+    METRICAS.contar("cache.rotas.acerto")
+
+Cada operação guarda as últimas JANELA_METRICAS durações (p50/p95 da página de métricas) e os
+totais acumulados em buckets de histograma (exportação no formato texto do Prometheus, em
+METRICAS_ARQUIVO e/ou em http://METRICAS_HOST:METRICAS_PORTA/metrics). Com METRICAS_ATIVAS=0, span()
+devolve um contexto vazio compartilhado e contar() retorna na primeira linha.
+"""
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = logging.getLogger(__name__)
+
+METRICAS_ATIVAS = os.getenv("METRICAS_ATIVAS", "1") != "0"
+JANELA_METRICAS = int(os.getenv("JANELA_METRICAS", 1000))
+METRICAS_ARQUIVO = os.getenv("METRICAS_ARQUIVO")  # ex.: textfile collector do node_exporter
+METRICAS_INTERVALO = float(os.getenv("METRICAS_INTERVALO", 15))
+METRICAS_PORTA = int(os.getenv("METRICAS_PORTA", 0))
+# O /metrics não tem autenticação: só a máquina local o lê, a não ser que outro host seja configurado
+METRICAS_HOST = os.getenv("METRICAS_HOST", "127.0.0.1")
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # segundos
+_SPAN_NULO = nullcontext()
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else None
+
+
+class _Operacao:
+    """Durações de uma operação: janela recente, buckets acumulados, soma e erros."""
+
+    def __init__(self, janela):
+        self.recentes = deque(maxlen=janela)
+        self.buckets = [0] * (len(BUCKETS) + 1)  # o último é o +Inf
+        self.soma = 0.0
+        self.erros = 0
+
+    def registrar(self, segundos, erro=False):
+        self.recentes.append(segundos)
+        self.buckets[bisect.bisect_left(BUCKETS, segundos)] += 1
+        self.soma += segundos
+        self.erros += erro
+
+
+class _Span:
+    __slots__ = ("metricas", "nome", "inicio")
+
+    def __init__(self, metricas, nome):
+        self.metricas = metricas
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        self.metricas.registrar(self.nome, time.perf_counter() - self.inicio, erro=tipo is not None)
+        return False
+
+
+class _Cronometro(_Span):
+    __slots__ = ()
+
+    def __exit__(self, tipo, valor, traceback):
+        # st.stop, st.rerun e st.switch_page interrompem a página com exceções derivadas de BaseException
+        erro = tipo is not None and issubclass(tipo, Exception)
+        self.metricas.registrar(self.nome, time.perf_counter() - self.inicio, erro=erro)
+        return False
+
+
+class Metricas:
+    """Registro de spans, contadores e medidores do processo."""
+
+    def __init__(self, ativas=METRICAS_ATIVAS, janela=JANELA_METRICAS):
+        self.ativas = ativas
+        self.janela = janela
+        self._operacoes = {}
+        self._contadores = defaultdict(float)
+        self._medidores = {}
+        self._lock = threading.Lock()
+
+    def span(self, nome):
+        """Contexto que mede a duração da operação `nome` (exceções contam como erro e seguem)."""
+        if not self.ativas:
+            return _SPAN_NULO
+        return _Span(self, nome)
+
+    def cronometro(self, nome):
+        """
+        Contexto que mede um trecho inteiro, como a execução de uma página do Streamlit: só exceções
+        comuns contam como erro; as de controle de fluxo (st.stop, st.rerun...) só encerram a medida.
+        """
+        if not self.ativas:
+            return _SPAN_NULO
+        return _Cronometro(self, nome)
+
+    def cronometrar(self, nome):
+        """Decorador equivalente a envolver a função em span(nome)."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with self.span(nome):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    def registrar(self, nome, segundos, erro=False):
+        """Registra uma duração medida fora de um span (ex.: o tempo total de uma página)."""
+        if not self.ativas:
+            return
+        with self._lock:
+            operacao = self._operacoes.get(nome)
+            if operacao is None:
+                operacao = self._operacoes[nome] = _Operacao(self.janela)
+            operacao.registrar(segundos, erro)
+
+    def contar(self, nome, valor=1):
+        if not self.ativas:
+            return
+        with self._lock:
+            self._contadores[nome] += valor
+
+    def medidor(self, nome, funcao):
+        """Registra `funcao() -> {campo: número}`, lida a cada exportação (ex.: MEMORIA_SESSOES.estatisticas)."""
+        self._medidores[nome] = funcao
+
+    def resumo(self):
+        """Uma linha por operação: chamadas, erros, p50/p95/máximo da janela recente (ms) e tempo total (s)."""
+        with self._lock:
+            copias = {nome: (sorted(op.recentes), sum(op.buckets), op.erros, op.soma) for nome, op in self._operacoes.items()}
+        linhas = []
+        for nome, (recentes, chamadas, erros, soma) in sorted(copias.items()):
+            linhas.append({
+                "operacao": nome,
+                "chamadas": chamadas,
+                "erros": erros,
+                "p50_ms": _percentil(recentes, 0.5) * 1000,
+                "p95_ms": _percentil(recentes, 0.95) * 1000,
+                "max_ms": recentes[-1] * 1000,
+                "total_s": soma,
+            })
+        return linhas
+
+    def contadores(self):
+        with self._lock:
+            return dict(self._contadores)
+
+    def medidores(self):
+        """Valores atuais dos medidores (os que falharem ficam de fora)."""
+        valores = {}
+        for nome, funcao in list(self._medidores.items()):
+            try:
+                valores[nome] = {campo: v for campo, v in funcao().items() if isinstance(v, (int, float))}
+            except Exception:
+                continue
+        return valores
+
+    def exportar_prometheus(self):
+        """Todas as métricas no formato texto do Prometheus."""
+        with self._lock:
+            operacoes = {nome: (list(op.buckets), op.soma, op.erros) for nome, op in self._operacoes.items()}
+            contadores = dict(self._contadores)
+        linhas = [
+            "# HELP app_operacao_segundos Duração das operações instrumentadas.",
+            "# TYPE app_operacao_segundos histogram",
+        ]
+        for nome, (buckets, soma, _) in sorted(operacoes.items()):
+            acumulado = 0
+            for limite, quantidade in zip(BUCKETS + ("+Inf",), buckets):
+                acumulado += quantidade
+                linhas.append(f'app_operacao_segundos_bucket{{operacao="{nome}",le="{limite}"}} {acumulado}')
+            linhas.append(f'app_operacao_segundos_sum{{operacao="{nome}"}} {soma:.6f}')
+            linhas.append(f'app_operacao_segundos_count{{operacao="{nome}"}} {acumulado}')
+        linhas += ["# HELP app_operacao_erros_total Operações que terminaram com exceção.", "# TYPE app_operacao_erros_total counter"]
+        linhas += [f'app_operacao_erros_total{{operacao="{nome}"}} {erros}' for nome, (_, _, erros) in sorted(operacoes.items())]
+        linhas += ["# HELP app_eventos_total Contadores de eventos (acertos de cache, logins, ...).", "# TYPE app_eventos_total counter"]
+        linhas += [f'app_eventos_total{{evento="{nome}"}} {valor:g}' for nome, valor in sorted(contadores.items())]
+        linhas += ["# HELP app_medidor Valores atuais dos medidores registrados.", "# TYPE app_medidor gauge"]
+        for nome, campos in sorted(self.medidores().items()):
+            linhas += [f'app_medidor{{medidor="{nome}",campo="{campo}"}} {valor:g}' for campo, valor in sorted(campos.items())]
+        return "\n".join(linhas) + "\n"
+
+    def gravar_prometheus(self, caminho):
+        """Grava a exportação em `caminho` de forma atômica (o coletor nunca lê um arquivo pela metade)."""
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(self.exportar_prometheus())
+        os.replace(temporario, caminho)
+
+    def limpar(self):
+        with self._lock:
+            self._operacoes.clear()
+            self._contadores.clear()
+
+
+def servir_prometheus(metricas, porta, host=METRICAS_HOST):
+    """Servidor HTTP em segundo plano com a exportação em /metrics; retorna o servidor."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            corpo = metricas.exportar_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="metricas-http").start()
+    return servidor
+
+
+def _gravar_periodicamente(metricas, caminho, intervalo):
+    while True:
+        time.sleep(intervalo)
+        try:
+            metricas.gravar_prometheus(caminho)
+        except OSError as e:
+            log.warning("Erro ao gravar as métricas em %s: %s", caminho, e)
+
+
+# Registro compartilhado do processo
+METRICAS = Metricas()
+
+if METRICAS.ativas and METRICAS_PORTA:
+    try:
+        servir_prometheus(METRICAS, METRICAS_PORTA)
+    except OSError as e:  # outro processo do app já ocupa a porta
+        log.warning("Endpoint /metrics não iniciado em %s:%s: %s", METRICAS_HOST, METRICAS_PORTA, e)
+if METRICAS.ativas and METRICAS_ARQUIVO:
+    threading.Thread(
+        target=_gravar_periodicamente, args=(METRICAS, METRICAS_ARQUIVO, METRICAS_INTERVALO), daemon=True, name="metricas-arquivo"
+    ).start()
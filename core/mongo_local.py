@@ -0,0 +1,160 @@
+# core/mongo_local.py
+"""
+Conexão com o MongoDB a partir da MONGO_URI, com substitutos locais para testes de escala e
+benchmarks sem rede:
+
+- "arquivo://<diretório>": cada coleção é um JSON Lines em <diretório>/<banco>/<coleção>.jsonl,
+  lido em streaming pelo find();
+- "memoria://": coleções em memória, compartilhadas pelas conexões do mesmo processo;
+- "mongomock://": o mongomock, se estiver instalado;
+- qualquer outra URI (Atlas, mongod local): pymongo.MongoClient.
+
+Os substitutos implementam só o que o projeto usa: find (igualdade em campos do topo e projeção
+simples), count_documents, insert_many e drop. O app e o preditor só leem coleções inteiras
+(find({})); filtros com operadores ($in, $gt, ...) ou subdocumentos levantam ValueError.
+"""
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from bson import ObjectId
+from pymongo import MongoClient
+
+try:
+    import mongomock
+except ImportError:  # substituto opcional
+    mongomock = None
+
+_BANCOS_MEMORIA = {}  # banco -> {coleção: ColecaoMemoria}
+_LOCK_MEMORIA = threading.Lock()
+_MONGOMOCK = []  # cliente mongomock único do processo (cada cliente novo teria os dados vazios)
+
+
+def _filtrar(documentos, filtro, projecao):
+    """Documentos que casam com o `filtro` (só igualdade em campos do topo), com a `projecao` aplicada."""
+    filtro = filtro or {}
+    operadores = [campo for campo, valor in filtro.items() if campo.startswith("$") or isinstance(valor, dict)]
+    if operadores:
+        raise ValueError(
+            f"Filtro não suportado pelo substituto local do MongoDB em {operadores}: só há igualdade em campos do topo."
+        )
+    incluir = {campo for campo, ligado in (projecao or {}).items() if ligado and campo != "_id"}
+    excluir = {campo for campo, ligado in (projecao or {}).items() if not ligado}
+    for documento in documentos:
+        if any(documento.get(campo) != valor for campo, valor in filtro.items()):
+            continue
+        if incluir:
+            documento = {campo: valor for campo, valor in documento.items()
+                         if campo in incluir or (campo == "_id" and "_id" not in excluir)}
+        elif excluir:
+            documento = {campo: valor for campo, valor in documento.items() if campo not in excluir}
+        yield documento
+
+
+class ColecaoMemoria:
+    """Coleção em uma lista; o find() devolve cópias, como o pymongo devolve documentos novos."""
+
+    def __init__(self):
+        self._documentos = []
+        self._lock = threading.Lock()
+
+    def insert_many(self, documentos, ordered=True):
+        novos = [dict(d) for d in documentos]
+        for documento in novos:
+            documento.setdefault("_id", ObjectId())
+        with self._lock:
+            self._documentos.extend(novos)
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in novos])
+
+    def find(self, filtro=None, projecao=None):
+        with self._lock:
+            documentos = list(self._documentos)
+        return _filtrar((dict(d) for d in documentos), filtro, projecao)
+
+    def count_documents(self, filtro):
+        return sum(1 for _ in self.find(filtro))
+
+    def drop(self):
+        with self._lock:
+            self._documentos = []
+
+
+class ColecaoArquivo:
+    """Coleção em um arquivo JSON Lines (um documento por linha)."""
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+
+    def insert_many(self, documentos, ordered=True):
+        ids = []
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.caminho, "a", encoding="utf-8") as f:
+            for documento in documentos:
+                documento = {"_id": str(ObjectId()), **documento}
+                ids.append(documento["_id"])
+                f.write(json.dumps(documento, ensure_ascii=False))
+                f.write("\n")
+        return SimpleNamespace(inserted_ids=ids)
+
+    def _ler(self):
+        if not self.caminho.exists():
+            return
+        with open(self.caminho, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+
+    def find(self, filtro=None, projecao=None):
+        return _filtrar(self._ler(), filtro, projecao)
+
+    def count_documents(self, filtro):
+        return sum(1 for _ in self.find(filtro))
+
+    def drop(self):
+        with self._lock:
+            self.caminho.unlink(missing_ok=True)
+
+
+class BancoLocal:
+    def __init__(self, criar_colecao):
+        self._criar_colecao = criar_colecao
+        self._colecoes = {}
+
+    def __getitem__(self, nome):
+        if nome not in self._colecoes:
+            self._colecoes[nome] = self._criar_colecao(nome)
+        return self._colecoes[nome]
+
+
+class ClienteLocal:
+    """Imita MongoClient(uri)[banco][coleção] para as URIs arquivo:// e memoria://."""
+
+    def __init__(self, diretorio=None):
+        self.diretorio = Path(diretorio) if diretorio else None
+
+    def __getitem__(self, banco):
+        if self.diretorio is not None:
+            return BancoLocal(lambda colecao: ColecaoArquivo(self.diretorio / banco / f"{colecao}.jsonl"))
+        with _LOCK_MEMORIA:
+            colecoes = _BANCOS_MEMORIA.setdefault(banco, {})
+        return BancoLocal(lambda colecao: colecoes.setdefault(colecao, ColecaoMemoria()))
+
+    def close(self):
+        pass
+
+
+def conectar_mongo(uri):
+    """Cliente para a MONGO_URI (substituto local para arquivo://, memoria:// e mongomock://)."""
+    if uri.startswith("arquivo://"):
+        return ClienteLocal(uri[len("arquivo://"):])
+    if uri.startswith("memoria://"):
+        return ClienteLocal()
+    if uri.startswith("mongomock://"):
+        if mongomock is None:
+            raise RuntimeError("MONGO_URI usa mongomock://, mas o mongomock não está instalado.")
+        with _LOCK_MEMORIA:
+            if not _MONGOMOCK:
+                _MONGOMOCK.append(mongomock.MongoClient())
+        return _MONGOMOCK[0]
+    return MongoClient(uri)
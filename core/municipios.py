@@ -0,0 +1,70 @@
+# core/municipios.py
+import json
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+from core.cache import normalizar_texto
+
+load_dotenv()
+
+ARQUIVO_UF_MUNICIPIOS = os.getenv("ARQUIVO_UF_MUNICIPIOS", "uf_municipio_map.json")
+LIMITE_SUGESTOES = 50
+_FIM = "$"  # chave dos pares (uf, município) que terminam em um nó da trie
+
+
+class IndiceMunicipios:
+    """UF -> municípios e trie de prefixos (sem acentos/maiúsculas) sobre os nomes dos municípios."""
+
+    def __init__(self, uf_municipios):
+        self._por_uf = {uf: sorted(municipios) for uf, municipios in uf_municipios.items()}
+        self._pares = {(uf, m) for uf, municipios in self._por_uf.items() for m in municipios}
+        self._trie = {}
+        for uf, municipio in sorted(self._pares, key=lambda par: (par[1], par[0])):
+            no = self._trie
+            for letra in normalizar_texto(municipio):
+                no = no.setdefault(letra, {})
+            no.setdefault(_FIM, []).append((uf, municipio))
+
+    @property
+    def ufs(self):
+        return sorted(self._por_uf)
+
+    def municipios(self, uf):
+        """Municípios da UF em ordem alfabética (lista vazia para UF desconhecida)."""
+        return self._por_uf.get(uf, [])
+
+    def valido(self, uf, municipio):
+        """Indica se a combinação UF/município existe nos dados de treinamento."""
+        return (uf, municipio) in self._pares
+
+    def buscar(self, prefixo, uf=None, limite=LIMITE_SUGESTOES):
+        """
+        Pares (uf, município) cujo nome começa com `prefixo`, ignorando acentos e maiúsculas,
+        em ordem alfabética e opcionalmente restritos a uma UF.
+        """
+        no = self._trie
+        for letra in normalizar_texto(prefixo):
+            no = no.get(letra)
+            if no is None:
+                return []
+        resultado = []
+        # Busca em profundidade visitando os filhos em ordem, para sair já ordenado e parar no limite
+        pilha = [no]
+        while pilha and len(resultado) < limite:
+            no = pilha.pop()
+            resultado.extend(par for par in no.get(_FIM, ()) if uf is None or par[0] == uf)
+            pilha.extend(no[letra] for letra in sorted((k for k in no if k != _FIM), reverse=True))
+        return resultado[:limite]
+
+    def opcoes(self, uf, prefixo=""):
+        """Lista de municípios para o seletor da UF, filtrada pelo prefixo digitado."""
+        if not prefixo.strip():
+            return self.municipios(uf)
+        return [municipio for _, municipio in self.buscar(prefixo, uf)]
+
+
+@lru_cache(maxsize=1)
+def carregar_municipios(caminho=ARQUIVO_UF_MUNICIPIOS):
+    """Carrega (uma vez por processo) o mapa UF -> municípios e monta o índice."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return IndiceMunicipios(json.load(f))
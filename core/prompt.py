@@ -0,0 +1,117 @@
+# core/prompt.py
+"""
+Montagem dos prompts do chatbot a partir de um resumo do esquema dos dados.
+
+O resumo (tipos, faixas numéricas/datas e os valores mais frequentes de cada coluna de texto,
+com o total de linhas) é calculado uma vez por versão dos dados. Cada prompt junta as
+instruções do modo, o resumo e a pergunta dentro de um orçamento de tokens: se não couber,
+as listas de valores são encurtadas e as colunas menos importantes saem primeiro.
+"""
+import os
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", 1500))
+PROMPT_TOP_VALORES = int(os.getenv("PROMPT_TOP_VALORES", 12))
+CARACTERES_POR_TOKEN = 4  # aproximação para texto em português; evita uma chamada à API só para contar
+_TOP_REDUZIDOS = (8, 5, 3, 0)
+
+
+def estimar_tokens(texto):
+    """Estimativa do número de tokens de um texto."""
+    return -(-len(texto) // CARACTERES_POR_TOKEN)
+
+
+def _tipo(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return "booleano"
+    if pd.api.types.is_integer_dtype(serie):
+        return "inteiro"
+    if pd.api.types.is_float_dtype(serie):
+        return "decimal"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "data"
+    return "texto"
+
+
+def resumo_esquema(df: pd.DataFrame, prioridade=(), top=PROMPT_TOP_VALORES):
+    """
+    Resumo compacto do DataFrame: total de linhas e, por coluna, tipo, nulos e faixa de valores
+    (números e datas) ou os `top` valores mais frequentes (texto). As colunas em `prioridade`
+    vêm primeiro; as demais seguem a ordem do df.
+    """
+    ordem = [c for c in prioridade if c in df.columns] + [c for c in df.columns if c not in prioridade]
+    colunas = []
+    for nome in ordem:
+        serie = df[nome]
+        info = {"nome": nome, "tipo": _tipo(serie), "nulos": int(serie.isna().sum())}
+        if info["tipo"] in ("inteiro", "decimal", "data") and info["nulos"] < len(serie):
+            minimo, maximo = serie.min(), serie.max()
+            if info["tipo"] == "data":
+                minimo, maximo = minimo.date().isoformat(), maximo.date().isoformat()
+            info["faixa"] = (minimo, maximo)
+        elif info["tipo"] in ("texto", "booleano"):
+            contagens = serie.value_counts()
+            info["distintos"] = len(contagens)
+            # Identificadores (quase um valor por linha) não ajudam o modelo a escrever filtros
+            if len(contagens) <= max(1, len(serie) // 2):
+                info["valores"] = [str(v) for v in contagens.index[:top]]
+        colunas.append(info)
+    return {"linhas": len(df), "colunas": colunas}
+
+
+def _texto_coluna(info, top):
+    if "faixa" in info:
+        descricao = f"{info['tipo']}, {info['faixa'][0]} a {info['faixa'][1]}"
+    elif "distintos" in info:
+        descricao = f"{info['tipo']}, {info['distintos']} valores"
+    else:
+        descricao = info["tipo"]
+    if info["nulos"]:
+        descricao += f", {info['nulos']} nulos"
+    linha = f"- {info['nome']} ({descricao})"
+    valores = info.get("valores", [])[:top]
+    if valores:
+        resto = ", ..." if info["distintos"] > len(valores) else ""
+        linha += ": " + ", ".join(repr(v) for v in valores) + resto
+    return linha
+
+
+def texto_esquema(resumo, top=PROMPT_TOP_VALORES, max_colunas=None):
+    """Resumo em texto para o prompt, com até `top` valores por coluna de texto."""
+    colunas = resumo["colunas"][:max_colunas]
+    linhas = [f"{resumo['linhas']} linhas. Colunas (valores de texto em ordem de frequência):"]
+    linhas += [_texto_coluna(info, top) for info in colunas]
+    return "\n".join(linhas)
+
+
+def montar_prompt(instrucoes, pergunta, resumo=None, orcamento=PROMPT_MAX_TOKENS):
+    """
+    Junta instruções, resumo do esquema e pergunta dentro do orçamento de tokens.
+    Retorna (prompt, relatório) com o tamanho de cada parte e os cortes aplicados ao resumo.
+    """
+    fixo = f"{instrucoes.strip()}\n\nPergunta: \"{pergunta}\""
+    esquema, top, n_colunas = "", 0, 0
+    if resumo is not None:
+        disponivel = orcamento - estimar_tokens(fixo)
+        n_colunas = len(resumo["colunas"])
+        for top in (PROMPT_TOP_VALORES,) + tuple(t for t in _TOP_REDUZIDOS if t < PROMPT_TOP_VALORES):
+            esquema = texto_esquema(resumo, top)
+            if estimar_tokens(esquema) <= disponivel:
+                break
+        # Sem valores ainda não coube: tira colunas do fim (as de menor prioridade)
+        while n_colunas > 1 and estimar_tokens(esquema) > disponivel:
+            n_colunas -= 1
+            esquema = texto_esquema(resumo, top, n_colunas)
+    prompt = f"{instrucoes.strip()}\n\nDados:\n{esquema}\n\nPergunta: \"{pergunta}\"" if esquema else fixo
+    relatorio = {
+        "tokens": estimar_tokens(prompt),
+        "tokens_instrucoes": estimar_tokens(instrucoes.strip()),
+        "tokens_esquema": estimar_tokens(esquema),
+        "orcamento": orcamento,
+        "top_valores": top,
+        "colunas": n_colunas,
+    }
+    return prompt, relatorio
@@ -0,0 +1,274 @@
+# core/rotas.py
+import os
+import numpy as np
+import requests
+import joblib
+import pandas as pd
+import streamlit as st
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from core.cache import CacheDisco, normalizar_texto
+from core.geometria import para_array
+from core.http_client import EXECUTOR_HTTP, http_get
+from core.metricas import METRICAS
+from core.singleflight import coalescer
+
+load_dotenv()
+
+# --- CONFIGURAÇÕES E CARREGAMENTO DO MODELO ---
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+# URL do OSRM para obter rotas alternativas (geometria e tempo)
+ROUTING_URL = os.getenv("ROUTING_URL", "https://router.project-osrm.org/route/v1/driving/")
+ARQUIVO_MODELO = os.getenv("ARQUIVO_MODELO", 'modelo_risco_rodoviario.pkl')
+
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))  # 30 dias
+ROTA_CACHE_TTL = int(os.getenv("ROTA_CACHE_TTL", 7 * 24 * 3600))  # 7 dias
+
+CACHE_GEOCODIFICACAO = CacheDisco("geocodificacao", ttl=GEOCODE_CACHE_TTL)
+CACHE_ROTAS = CacheDisco("rotas_osrm", ttl=ROTA_CACHE_TTL)
+
+# Carregar o modelo de risco uma única vez
+try:
+    with METRICAS.span("modelo.carregar"):
+        MODELO_RISCO = joblib.load(ARQUIVO_MODELO)
+except FileNotFoundError:
+    MODELO_RISCO = None
+
+# --- FUNÇÕES AUXILIARES DE ML ---
+
+# Mapeamento do dia da semana para o formato usado no treinamento do ML
+DIA_SEMANA_MAP = {0: 'segunda-feira', 1: 'terça-feira', 2: 'quarta-feira', 3: 'quinta-feira', 4: 'sexta-feira', 5: 'sábado', 6: 'domingo'}
+
+
+def _preparar_dados_para_modelo(localizacao, condicao_metereologica, momento=None):
+    """Prepara o input de dados de viagem para o modelo ML."""
+
+    now = momento or datetime.now()
+
+    dados_viagem = {
+        'hora_do_dia': now.hour,
+        'mes': now.month,
+        'dia_semana': DIA_SEMANA_MAP.get(now.weekday()),
+        'condicao_metereologica': condicao_metereologica,
+        'localizacao': localizacao # Ex: SP_SAO PAULO
+    }
+
+    return pd.DataFrame([dados_viagem])
+
+
+def calcular_risco_segmento(uf, municipio, condicao_metereologica):
+    """Calcula o risco de alta gravidade (probabilidade) para um local."""
+    if MODELO_RISCO is None or not uf or not municipio:
+        return 0.0
+
+    localizacao = f"{uf}_{municipio}"
+    dados_input = _preparar_dados_para_modelo(localizacao, condicao_metereologica)
+
+    # Prever a probabilidade de alta risco (Classe 1)
+    try:
+        with METRICAS.span("modelo.predict"):
+            risco_prob = MODELO_RISCO.predict_proba(dados_input)[0][1]
+        return risco_prob
+    except Exception as e:
+        # st.warning(f"Erro na predição ML para {localizacao}: {e}")
+        return 0.0 # Retorna 0 em caso de erro de predição
+
+# --- FUNÇÕES DE GEOLOCALIZAÇÃO E ROTA ---
+
+# Sessões que geocodificam a mesma cidade ao mesmo tempo compartilham uma única consulta
+@coalescer(chave=normalizar_texto)
+def _buscar_nominatim(cidade):
+    """Consulta o Nominatim, reaproveitando respostas já armazenadas no cache em disco."""
+    chave = normalizar_texto(cidade)
+    data = CACHE_GEOCODIFICACAO.get(chave)
+    if data is not None:
+        METRICAS.contar("cache.geocodificacao.acerto")
+        return data
+    METRICAS.contar("cache.geocodificacao.falha")
+
+    params = {
+        "q": cidade,
+        "format": "json",
+        "limit": 1,
+        "addressdetails": 1, # Capturar detalhes de endereço
+    }
+    data = http_get("nominatim", NOMINATIM_URL, params=params).json()
+    CACHE_GEOCODIFICACAO.set(chave, data)
+    return data
+
+
+def _extrair_localizacao(data):
+    """Extrai (lat, lon, município, UF) da resposta do Nominatim."""
+    if data:
+        lat = float(data[0]["lat"])
+        lon = float(data[0]["lon"])
+
+        address = data[0].get('address', {})
+        # Tenta encontrar o município com diferentes chaves
+        municipio = address.get('city') or address.get('town') or address.get('village') or address.get('county')
+        uf = address.get('state') # Estado/UF
+
+        return lat, lon, municipio.upper() if municipio else None, uf.upper() if uf else None
+    else:
+        return None, None, None, None
+
+
+def geocodificar_cidade(cidade):
+    """Converte o nome de uma cidade em coordenadas (lat, lon) e extrai UF/Município."""
+    try:
+        return _extrair_localizacao(_buscar_nominatim(cidade))
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erro ao geocodificar '{cidade}': {e}")
+        return None, None, None, None
+
+
+def geocodificar_cidades(*cidades):
+    """Geocodifica várias cidades em paralelo, mantendo a ordem de entrada."""
+    futuros = [EXECUTOR_HTTP.submit(_buscar_nominatim, cidade) for cidade in cidades]
+    resultados = []
+    for cidade, futuro in zip(cidades, futuros):
+        # Os erros são exibidos aqui, na thread do script, onde o Streamlit consegue renderizá-los
+        try:
+            resultados.append(_extrair_localizacao(futuro.result()))
+        except requests.exceptions.RequestException as e:
+            st.error(f"Erro ao geocodificar '{cidade}': {e}")
+            resultados.append((None, None, None, None))
+    return resultados
+
+
+def _chave_rota(latA, lonA, latB, lonB):
+    # Coordenadas arredondadas (~1 m) para que pequenas variações da geocodificação reaproveitem o cache
+    return f"{lonA:.5f},{latA:.5f};{lonB:.5f},{latB:.5f}"
+
+
+@coalescer(chave=_chave_rota)
+def _buscar_rotas_osrm(latA, lonA, latB, lonB):
+    """Consulta o OSRM por rotas alternativas, reaproveitando respostas do cache em disco."""
+    chave = _chave_rota(latA, lonA, latB, lonB)
+    dados = CACHE_ROTAS.get(chave)
+    if dados is not None:
+        METRICAS.contar("cache.rotas.acerto")
+        return dados
+    METRICAS.contar("cache.rotas.falha")
+
+    osrm_url = f"{ROUTING_URL}{lonA},{latA};{lonB},{latB}"
+    params = {"alternatives": "true", "steps": "false", "geometries": "geojson"}
+    dados = http_get("osrm", osrm_url, params=params).json()
+    CACHE_ROTAS.set(chave, dados)
+    return dados
+
+
+def calcular_rota(latA, lonA, latB, lonB, municipioA, ufA, municipioB, ufB, condicao_metereologica, peso_risco=50):
+    """
+    Calcula rotas alternativas usando OSRM e ajusta o custo usando o Modelo de Risco.
+    """
+    # 1. Obter rotas alternativas do OSRM
+    try:
+        dados = _buscar_rotas_osrm(latA, lonA, latB, lonB)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erro ao calcular a rota: {e}")
+        return None
+
+    # Simulação: Risco calculado nos pontos de origem e destino (Proxy para o risco médio da rota)
+    risco_origem = calcular_risco_segmento(ufA, municipioA, condicao_metereologica)
+    risco_destino = calcular_risco_segmento(ufB, municipioB, condicao_metereologica)
+
+    return _pontuar_rotas(dados, risco_origem, risco_destino, peso_risco)
+
+
+def _pontuar_rotas(dados, risco_origem, risco_destino, peso_risco=50):
+    """Ajusta o custo das rotas do OSRM com o risco previsto e ordena da melhor para a pior."""
+    rotas_alternativas = []
+
+    # 2. Processamento e Ajuste de Custo com ML
+    for rota in dados.get("routes", []):
+
+        tempo_total = rota["duration"] / 60.0 # Tempo em minutos
+        distancia_total = rota["distance"] / 1000.0 # Distância em km
+
+        risco_medio_rota = (risco_origem + risco_destino) / 2.0
+
+        # Custo Ajustado: Tempo (minutos) + (Risco_médio * Ponderação do Risco)
+        # O peso_risco permite que o usuário defina o quanto ele valoriza a segurança.
+        custo_ajustado = tempo_total + (risco_medio_rota * peso_risco)
+
+        # O valor do risco é exibido para o usuário
+        rotas_alternativas.append({
+            "coordenadas": para_array(rota["geometry"]["coordinates"]), # float32 (N, 2) no formato [lat, lon]
+            "tempo_min": tempo_total,
+            "distancia_km": distancia_total,
+            "risco_medio": risco_medio_rota,
+            "custo_ajustado": custo_ajustado,
+            "resumo": rota.get("summary", f"Rota {len(rotas_alternativas) + 1}")
+        })
+
+    # Ordenar as rotas pelo NOVO CUSTO AJUSTADO (A Rota "Melhor")
+    rotas_alternativas.sort(key=lambda x: x["custo_ajustado"])
+
+    return rotas_alternativas
+
+
+def riscos_localizacoes(localizacoes, condicao_metereologica, momento=None):
+    """Risco de alta gravidade para várias localizações (UF_MUNICÍPIO) em uma única chamada ao modelo."""
+    localizacoes = list(dict.fromkeys(localizacoes))
+    if MODELO_RISCO is None or not localizacoes:
+        return {loc: 0.0 for loc in localizacoes}
+    dados = pd.concat(
+        [_preparar_dados_para_modelo(loc, condicao_metereologica, momento) for loc in localizacoes],
+        ignore_index=True
+    )
+    try:
+        with METRICAS.span("modelo.predict"):
+            return dict(zip(localizacoes, MODELO_RISCO.predict_proba(dados)[:, 1]))
+    except Exception:
+        return {loc: 0.0 for loc in localizacoes}
+
+# --- PLANEJAMENTO DO HORÁRIO DE PARTIDA ---
+
+def planejar_partida(rota, ufA, municipioA, ufB, municipioB, condicao_metereologica, peso_risco=50,
+                     horas=24, intervalo_min=60, inicio=None):
+    """
+    Pontua uma rota para cada horário de partida nas próximas `horas`.
+
+    Os segmentos (origem e destino, como em `calcular_rota`) são avaliados no instante em que
+    são percorridos; todas as combinações segmento x horário vão ao modelo em uma única chamada.
+    Retorna um DataFrame ordenado por horário com o risco médio e o custo ajustado de cada partida.
+    """
+    inicio = (inicio or datetime.now()).replace(second=0, microsecond=0)
+    n_slots = int(horas * 60 // intervalo_min)
+    partidas = pd.date_range(inicio, periods=n_slots, freq=f"{intervalo_min}min")
+
+    # Segmentos da rota: (localização, minutos após a partida)
+    segmentos = [(f"{ufA}_{municipioA}", 0.0), (f"{ufB}_{municipioB}", rota["tempo_min"])]
+    riscos = np.zeros((len(segmentos), n_slots))
+
+    if MODELO_RISCO is not None and all([ufA, municipioA, ufB, municipioB]):
+        momentos = [partidas + timedelta(minutes=deslocamento) for _, deslocamento in segmentos]
+        dados = pd.DataFrame({
+            'hora_do_dia': np.concatenate([m.hour for m in momentos]),
+            'mes': np.concatenate([m.month for m in momentos]),
+            'dia_semana': np.concatenate([m.weekday for m in momentos]),
+            'condicao_metereologica': condicao_metereologica,
+            'localizacao': np.repeat([loc for loc, _ in segmentos], n_slots),
+        })
+        dados['dia_semana'] = dados['dia_semana'].map(DIA_SEMANA_MAP)
+        # Horários diferentes caem frequentemente na mesma (hora, dia): o modelo só vê combinações únicas
+        codigos = dados.groupby(list(dados.columns), sort=False).ngroup().to_numpy()
+        try:
+            with METRICAS.span("modelo.predict"):
+                prob = MODELO_RISCO.predict_proba(dados.drop_duplicates())[:, 1]
+            riscos = prob[codigos].reshape(len(segmentos), n_slots)
+        except Exception:
+            pass # Mantém risco 0, como em calcular_risco_segmento
+
+    risco_medio = riscos.mean(axis=0)
+    return pd.DataFrame({
+        "partida": partidas,
+        "risco_medio": risco_medio,
+        "custo_ajustado": rota["tempo_min"] + risco_medio * peso_risco,
+    })
+
+
+def melhores_partidas(planejamento, n=3):
+    """Retorna os `n` horários de partida de menor custo ajustado."""
+    return planejamento.nsmallest(n, "custo_ajustado").reset_index(drop=True)
@@ -0,0 +1,310 @@
+# core/sandbox.py
+"""
+Pool de processos pré-criados para executar o código Pandas gerado pelo chatbot.
+
+Os workers nascem pelo forkserver (ou spawn), não por fork do processo do Streamlit, que tem
+várias threads e poderia entregar ao filho um lock preso. Na criação do pool os DataFrames grandes
+(o df, as amostras e os que os objetos extras guardam) são gravados uma vez em arquivos Arrow em
+SANDBOX_DIR; cada worker os abre com memory-map, então as páginas dos dados são compartilhadas
+entre os processos em vez de copiadas para cada um. O código chega pelo Pipe, roda com limites de
+tempo de CPU e de memória (resource.setrlimit) e o `final_result` volta serializado pelo mesmo
+Pipe. Um worker que estoura o tempo ou morre é encerrado e substituído em segundo plano.
+"""
+import io
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import resource
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import pandas as pd
+from pandas.core.series import Series
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # sem pyarrow os DataFrames vão serializados para cada worker
+    pa = ipc = None
+
+load_dotenv()
+
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", 2))
+SANDBOX_TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", 30))        # segundos de relógio por consulta
+SANDBOX_CPU_S = int(os.getenv("SANDBOX_CPU_S", 20))              # segundos de CPU por consulta
+SANDBOX_MEMORIA_MB = int(os.getenv("SANDBOX_MEMORIA_MB", 2048))  # memória extra permitida ao worker
+SANDBOX_INICIO = os.getenv("SANDBOX_INICIO", "forkserver")       # forkserver ou spawn
+# Arquivos Arrow com os dados dos workers; /dev/shm mantém as páginas em memória
+SANDBOX_DIR = os.getenv("SANDBOX_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+_MINIMO_ARQUIVO = 1024 * 1024  # DataFrames menores que isso (bytes) vão serializados junto com o resto
+
+
+class ErroSandbox(Exception):
+    """Falha ao executar o código gerado em um worker (erro no código, tempo ou memória excedidos)."""
+
+
+def sandbox_disponivel():
+    """Indica se o método de início dos workers (SANDBOX_INICIO) existe nesta plataforma."""
+    return SANDBOX_INICIO in mp.get_all_start_methods()
+
+
+def _memoria_virtual_atual():
+    """Tamanho atual do espaço de endereçamento do processo, em bytes (None se indisponível)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _aplicar_limite_memoria(limite_mb):
+    # O worker já tem o DataFrame carregado; o limite é o que pode crescer a partir daí
+    atual = _memoria_virtual_atual()
+    if atual is not None and limite_mb > 0:
+        limite = atual + limite_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+def _aplicar_limite_cpu(limite_s):
+    # RLIMIT_CPU é acumulado no processo: o limite de cada consulta conta a partir do uso atual
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    usado = int(uso.ru_utime + uso.ru_stime) + 1
+    _, maximo = resource.getrlimit(resource.RLIMIT_CPU)
+    suave = usado + limite_s
+    if maximo != resource.RLIM_INFINITY:
+        suave = min(suave, maximo)
+    resource.setrlimit(resource.RLIMIT_CPU, (suave, maximo))
+
+
+class _PicklerQuadros(pickle.Pickler):
+    """Serializa a carga dos workers gravando cada DataFrame grande uma única vez em um arquivo Arrow do `diretorio`."""
+
+    def __init__(self, arquivo, diretorio):
+        super().__init__(arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        self.diretorio = diretorio
+        self.gravados = {}
+
+    def persistent_id(self, obj):
+        if pa is None or type(obj) is not pd.DataFrame:
+            return None
+        if id(obj) not in self.gravados:
+            self.gravados[id(obj)] = self._gravar(obj)
+        return self.gravados[id(obj)]
+
+    def _gravar(self, df):
+        if df.memory_usage(index=False).sum() < _MINIMO_ARQUIVO:
+            return None
+        try:
+            tabela = pa.Table.from_pandas(df)
+        except (pa.ArrowException, TypeError, ValueError):
+            return None  # colunas que o Arrow não representa (ex.: tipos misturados) seguem no pickle
+        caminho = os.path.join(self.diretorio, f"{len(self.gravados)}.arrow")
+        with ipc.new_file(caminho, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return caminho
+
+
+class _UnpicklerQuadros(pickle.Unpickler):
+    """Reabre os DataFrames gravados por _PicklerQuadros com memory-map, sem copiar os dados."""
+
+    def __init__(self, arquivo):
+        super().__init__(arquivo)
+        self.abertos = {}
+
+    def persistent_load(self, caminho):
+        if caminho not in self.abertos:
+            tabela = ipc.open_file(pa.memory_map(caminho)).read_all()
+            self.abertos[caminho] = tabela.to_pandas(split_blocks=True)
+        return self.abertos[caminho]
+
+
+def _laco_worker(conexao, carga, limite_memoria_mb):
+    """Loop do processo filho: recebe (código, contexto, limite de CPU), executa e devolve ('ok'|'erro', valor)."""
+    df, variaveis, contextos = _UnpicklerQuadros(io.BytesIO(carga)).load()
+    _aplicar_limite_memoria(limite_memoria_mb)
+    while True:
+        try:
+            tarefa = conexao.recv()
+        except (EOFError, OSError):
+            break
+        if tarefa is None:
+            break
+        codigo, contexto, limite_cpu = tarefa
+        _aplicar_limite_cpu(limite_cpu)
+        local_vars = {'df': df, **variaveis, **contextos.get(contexto, {}), 'final_result': None, 'pd': pd, 'Series': Series}
+        try:
+            exec(codigo, {'pd': pd, 'Series': Series}, local_vars)
+            resposta = ("ok", local_vars['final_result'])
+        except MemoryError:
+            resposta = ("erro", "Limite de memória excedido ao executar o código gerado.")
+        except Exception as e:
+            resposta = ("erro", str(e))
+        try:
+            conexao.send(resposta)
+        except Exception:
+            # Resultado não serializável: devolve a representação em texto
+            conexao.send(("ok", str(resposta[1])))
+
+
+class PoolSandbox:
+    """Workers pré-criados que guardam o DataFrame e executam o código gerado com limites de recursos."""
+
+    def __init__(self, df, n_workers=SANDBOX_WORKERS, timeout=SANDBOX_TIMEOUT,
+                 limite_cpu_s=SANDBOX_CPU_S, limite_memoria_mb=SANDBOX_MEMORIA_MB, versao=None, variaveis=None,
+                 contextos=None):
+        self.df = df
+        # Objetos extras disponíveis ao código gerado além do df (ex.: o cubo pré-agregado)
+        self.variaveis = dict(variaveis or {})
+        # Conjuntos nomeados de variáveis que substituem os padrões em uma consulta (ex.: "amostra")
+        self.contextos = dict(contextos or {})
+        self.versao = versao
+        self.timeout = timeout
+        self.limite_cpu_s = limite_cpu_s
+        self.limite_memoria_mb = limite_memoria_mb
+        self.reiniciados = 0
+        self._contexto = mp.get_context(SANDBOX_INICIO)
+        self._livres = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        # Consultas em andamento; um pool aposentado só é encerrado quando elas terminam
+        self._em_uso = 0
+        self.aposentado = False
+        self._encerrado = False
+        # Serializada uma vez; os DataFrames grandes ficam nos arquivos Arrow do diretório do pool
+        self.diretorio = tempfile.mkdtemp(prefix="sandbox_", dir=SANDBOX_DIR)
+        arquivo = io.BytesIO()
+        _PicklerQuadros(arquivo, self.diretorio).dump((df, self.variaveis, self.contextos))
+        self._carga = arquivo.getvalue()
+        for _ in range(max(1, n_workers)):
+            self._livres.put(self._iniciar_worker())
+
+    def _iniciar_worker(self):
+        conexao_pai, conexao_filho = self._contexto.Pipe()
+        processo = self._contexto.Process(
+            target=_laco_worker, args=(conexao_filho, self._carga, self.limite_memoria_mb), daemon=True
+        )
+        processo.start()
+        conexao_filho.close()
+        worker = (processo, conexao_pai)
+        with self._lock:
+            encerrado = self._encerrado
+            if not encerrado:
+                self._workers.append(worker)
+        if encerrado:
+            # O pool foi encerrado enquanto o substituto nascia
+            processo.kill()
+            processo.join(timeout=5)
+            conexao_pai.close()
+            return None
+        return worker
+
+    def _substituir(self, worker):
+        """Descarta o worker; o substituto é criado em segundo plano e entra na fila quando estiver pronto."""
+        processo, conexao = worker
+        processo.kill()
+        with self._lock:
+            self._workers.remove(worker)
+            self.reiniciados += 1
+        threading.Thread(target=self._repor, args=(worker,), daemon=True).start()
+
+    def _repor(self, worker):
+        processo, conexao = worker
+        processo.join(timeout=5)
+        conexao.close()
+        novo = self._iniciar_worker()
+        if novo is not None:
+            self._livres.put(novo)
+
+    def executar(self, codigo, contexto=None):
+        """
+        Executa o código em um worker livre e devolve o `final_result` (ErroSandbox em caso de falha).
+        `contexto` escolhe um dos conjuntos de variáveis alternativos passados na criação do pool.
+        """
+        worker = self._livres.get()
+        processo, conexao = worker
+        try:
+            conexao.send((codigo, contexto, self.limite_cpu_s))
+            if not conexao.poll(self.timeout):
+                self._substituir(worker)
+                worker = None
+                raise ErroSandbox(f"Tempo limite de {self.timeout:.0f} s excedido ao executar o código gerado.")
+            status, valor = conexao.recv()
+        except (EOFError, OSError):
+            # O worker morreu no meio da consulta (ex.: SIGXCPU ao estourar o limite de CPU)
+            self._substituir(worker)
+            worker = None
+            raise ErroSandbox("O código gerado foi interrompido por exceder o limite de CPU ou memória.")
+        finally:
+            if worker is not None:
+                self._livres.put(worker)
+        if status == "erro":
+            raise ErroSandbox(valor)
+        return valor
+
+    @property
+    def n_workers(self):
+        return len(self._workers)
+
+    def reservar(self):
+        with self._lock:
+            self._em_uso += 1
+
+    def liberar(self):
+        with self._lock:
+            self._em_uso -= 1
+            ocioso = self.aposentado and self._em_uso == 0
+        if ocioso:
+            self.encerrar()
+
+    def aposentar(self):
+        """Encerra o pool assim que a última consulta em andamento terminar."""
+        with self._lock:
+            self.aposentado = True
+            ocioso = self._em_uso == 0
+        if ocioso:
+            self.encerrar()
+
+    def encerrar(self):
+        """Finaliza todos os workers e apaga os arquivos de dados do pool."""
+        with self._lock:
+            self._encerrado = True
+            workers = list(self._workers)
+        for processo, conexao in workers:
+            try:
+                conexao.send(None)
+            except OSError:
+                pass
+            processo.join(timeout=1)
+            if processo.is_alive():
+                processo.kill()
+            conexao.close()
+        self._workers.clear()
+        # Os workers já mapearam os arquivos; apagá-los só libera o espaço quando todos terminam
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+@contextmanager
+def usar_pool(df, versao, variaveis=None, contextos=None):
+    """
+    Pool compartilhado do processo, reservado durante o bloco `with`. Quando a versão dos dados
+    muda, um pool novo o substitui e o antigo só é encerrado depois da última consulta que o usa.
+    """
+    global _pool
+    with _lock_pool:
+        if _pool is None or _pool.versao != versao or _pool.aposentado:
+            if _pool is not None:
+                _pool.aposentar()
+            _pool = PoolSandbox(df, versao=versao, variaveis=variaveis, contextos=contextos)
+        pool = _pool
+        pool.reservar()
+    try:
+        yield pool
+    finally:
+        pool.liberar()
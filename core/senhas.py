@@ -0,0 +1,113 @@
+# core/senhas.py
+"""
+Hash e verificação de senhas com bcrypt em um pool limitado de threads.
+
+O bcrypt libera o GIL, mas cada hash ocupa um núcleo por centenas de milissegundos: com o pool,
+uma rajada de logins fica na fila de BCRYPT_WORKERS threads em vez de disputar todos os núcleos
+com o resto do app. O custo (rounds) vem de BCRYPT_ROUNDS ou, com "auto", é calibrado no host
+para que um hash leve cerca de BCRYPT_ALVO_MS; hashes com custo menor que o atual são refeitos
+no próximo login bem-sucedido, em uma thread própria que não disputa a fila dos logins.
+"""
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import bcrypt
+from dotenv import load_dotenv
+from core.metricas import METRICAS
+
+load_dotenv()
+
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS", "auto")
+BCRYPT_ALVO_MS = float(os.getenv("BCRYPT_ALVO_MS", 250))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", min(4, os.cpu_count() or 1)))
+ROUNDS_MIN = 10  # abaixo disso o hash fica barato demais para ataques de força bruta
+ROUNDS_MAX = 16
+
+EXECUTOR_SENHAS = ThreadPoolExecutor(max_workers=max(1, BCRYPT_WORKERS), thread_name_prefix="bcrypt")
+# Rehashes em segundo plano: uma thread só, para nunca entrarem na frente dos logins interativos
+EXECUTOR_REHASH = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bcrypt-rehash")
+
+log = logging.getLogger(__name__)
+
+
+def calibrar_rounds(alvo_ms=BCRYPT_ALVO_MS, minimo=ROUNDS_MIN, maximo=ROUNDS_MAX):
+    """Maior custo cujo hash leva até `alvo_ms` neste host (cada round a mais dobra o tempo)."""
+    rounds_medicao = 6
+    sal = bcrypt.gensalt(rounds_medicao)
+    tempos = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        bcrypt.hashpw(b"calibracao", sal)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    rounds = rounds_medicao + math.floor(math.log2(alvo_ms / max(min(tempos), 1e-3)))
+    return max(minimo, min(maximo, rounds))
+
+
+@lru_cache(maxsize=1)
+def rounds_alvo():
+    """Custo usado nos novos hashes (fixo em BCRYPT_ROUNDS ou calibrado uma vez por processo)."""
+    if BCRYPT_ROUNDS.isdigit():
+        return int(BCRYPT_ROUNDS)
+    rounds = calibrar_rounds()
+    log.info("bcrypt calibrado: %d rounds (alvo %.0f ms por hash)", rounds, BCRYPT_ALVO_MS)
+    return rounds
+
+
+def rounds_do_hash(senha_hash):
+    """Custo gravado em um hash bcrypt ("$2b$12$..." -> 12), ou None se o formato é inválido."""
+    try:
+        return int(senha_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _gerar(senha, rounds):
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verificar(senha, senha_hash):
+    try:
+        return bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8'))
+    except ValueError:
+        # Hash inválido ou outro erro de verificação
+        return False
+
+
+def gerar_hash(senha):
+    """Hash bcrypt da senha com o custo atual, calculado no pool."""
+    return EXECUTOR_SENHAS.submit(_gerar, senha, rounds_alvo()).result()
+
+
+def verificar_senha(senha, senha_hash):
+    """Indica se a senha corresponde ao hash, verificando no pool (o span inclui a espera na fila)."""
+    with METRICAS.span("senha.verificar"):
+        return EXECUTOR_SENHAS.submit(_verificar, senha, senha_hash).result()
+
+
+def precisa_rehash(senha_hash):
+    """Hash com custo menor que o atual (nunca rebaixa um hash mais caro)."""
+    rounds = rounds_do_hash(senha_hash)
+    return rounds is not None and rounds < rounds_alvo()
+
+
+def _registrar_rehash(futuro):
+    erro = futuro.exception()
+    if erro is None:
+        METRICAS.contar("senha.rehash_ok")
+    else:
+        METRICAS.contar("senha.rehash_falha")
+        log.warning("Falha ao refazer o hash de uma senha: %r", erro)
+
+
+def rehash_em_segundo_plano(senha, ao_concluir):
+    """
+    Refaz o hash com o custo atual sem atrasar o login; `ao_concluir(novo_hash)` grava o resultado.
+    Falhas (no hash ou na gravação) são contadas em senha.rehash_falha e registradas no log.
+    """
+    rounds = rounds_alvo()
+    futuro = EXECUTOR_REHASH.submit(lambda: ao_concluir(_gerar(senha, rounds)))
+    futuro.add_done_callback(_registrar_rehash)
+    return futuro
@@ -0,0 +1,206 @@
+# core/sessoes.py
+"""
+Armazéns chave/valor com expiração por chave (TTL) para sessões e tentativas de login.
+
+- "memoria": compartilhado entre todas as sessões do navegador de um processo do Streamlit.
+- "sqlite": compartilhado também entre processos/réplicas no mesmo host (SESSION_DB).
+
+Os dois têm a mesma interface (get/set/tocar/remover/incrementar) e limite de entradas:
+as expiradas saem primeiro e, se ainda faltar espaço, as que venceriam antes.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memoria")
+SESSION_DB = Path(os.getenv("SESSION_DB", Path(__file__).parent.parent / "data" / "sessoes.sqlite"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", 10000))
+
+
+class ArmazemMemoria:
+    """Chave -> (valor, expira_em) em memória, seguro para uso entre threads."""
+
+    def __init__(self, max_entradas=SESSION_MAX_ENTRIES):
+        self.max_entradas = max_entradas
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.removidos = 0
+
+    def _vivo(self, chave, agora):
+        item = self._dados.get(chave)
+        if item is not None and item[1] <= agora:
+            del self._dados[chave]
+            return None
+        return item
+
+    def _liberar_espaco(self, agora):
+        if len(self._dados) < self.max_entradas:
+            return
+        for chave in [c for c, (_, expira) in self._dados.items() if expira <= agora]:
+            del self._dados[chave]
+            self.removidos += 1
+        if len(self._dados) >= self.max_entradas:
+            excesso = len(self._dados) - self.max_entradas + 1
+            for chave, _ in sorted(self._dados.items(), key=lambda item: item[1][1])[:excesso]:
+                del self._dados[chave]
+                self.removidos += 1
+
+    def get(self, chave):
+        """Valor da chave, ou None se ausente ou expirada."""
+        with self._lock:
+            item = self._vivo(chave, time.time())
+            return item[0] if item else None
+
+    def set(self, chave, valor, ttl):
+        """Armazena o valor por `ttl` segundos."""
+        agora = time.time()
+        with self._lock:
+            if chave not in self._dados:
+                self._liberar_espaco(agora)
+            self._dados[chave] = (valor, agora + ttl)
+
+    def tocar(self, chave, ttl):
+        """Renova a expiração da chave; retorna False se ela já expirou ou não existe."""
+        agora = time.time()
+        with self._lock:
+            item = self._vivo(chave, agora)
+            if item is None:
+                return False
+            self._dados[chave] = (item[0], agora + ttl)
+            return True
+
+    def remover(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def incrementar(self, chave, ttl):
+        """Soma 1 ao contador e retorna o novo valor; a janela de `ttl` começa no primeiro incremento."""
+        agora = time.time()
+        with self._lock:
+            item = self._vivo(chave, agora)
+            if item is None:
+                self._liberar_espaco(agora)
+                item = (0, agora + ttl)
+            self._dados[chave] = (item[0] + 1, item[1])
+            return item[0] + 1
+
+    def __len__(self):
+        with self._lock:
+            agora = time.time()
+            return sum(1 for _, expira in self._dados.values() if expira > agora)
+
+
+class ArmazemSQLite:
+    """Mesma interface do ArmazemMemoria, em uma tabela SQLite compartilhada entre processos."""
+
+    def __init__(self, caminho=SESSION_DB, max_entradas=SESSION_MAX_ENTRIES, nome="sessoes"):
+        self.caminho = Path(caminho)
+        self.max_entradas = max_entradas
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._conexao = None
+        self.removidos = 0
+
+    def _conectar(self):
+        if self._conexao is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: as transações são abertas explicitamente com BEGIN IMMEDIATE
+            self._conexao = sqlite3.connect(str(self.caminho), timeout=30, check_same_thread=False, isolation_level=None)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.nome} (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira REAL NOT NULL)"
+            )
+            self._conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.nome}_expira ON {self.nome} (expira)")
+        return self._conexao
+
+    def _transacao(self, operacao):
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = operacao(conexao)
+                conexao.execute("COMMIT")
+                return resultado
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+
+    def _liberar_espaco(self, conexao, agora):
+        total = conexao.execute(f"SELECT COUNT(*) FROM {self.nome}").fetchone()[0]
+        if total < self.max_entradas:
+            return
+        expiradas = conexao.execute(f"DELETE FROM {self.nome} WHERE expira <= ?", (agora,)).rowcount
+        self.removidos += expiradas
+        excesso = total - expiradas - self.max_entradas + 1
+        if excesso > 0:
+            self.removidos += conexao.execute(
+                f"DELETE FROM {self.nome} WHERE chave IN (SELECT chave FROM {self.nome} ORDER BY expira ASC LIMIT ?)",
+                (excesso,),
+            ).rowcount
+
+    def get(self, chave):
+        """Valor da chave, ou None se ausente ou expirada."""
+        with self._lock:
+            linha = self._conectar().execute(
+                f"SELECT valor FROM {self.nome} WHERE chave = ? AND expira > ?", (chave, time.time())
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def set(self, chave, valor, ttl):
+        """Armazena o valor (serializável em JSON) por `ttl` segundos."""
+        agora = time.time()
+
+        def operacao(conexao):
+            self._liberar_espaco(conexao, agora)
+            conexao.execute(
+                f"INSERT OR REPLACE INTO {self.nome} (chave, valor, expira) VALUES (?, ?, ?)", (chave, json.dumps(valor), agora + ttl)
+            )
+        self._transacao(operacao)
+
+    def tocar(self, chave, ttl):
+        """Renova a expiração da chave; retorna False se ela já expirou ou não existe."""
+        agora = time.time()
+        with self._lock:
+            cursor = self._conectar().execute(
+                f"UPDATE {self.nome} SET expira = ? WHERE chave = ? AND expira > ?", (agora + ttl, chave, agora)
+            )
+        return cursor.rowcount == 1
+
+    def remover(self, chave):
+        with self._lock:
+            self._conectar().execute(f"DELETE FROM {self.nome} WHERE chave = ?", (chave,))
+
+    def incrementar(self, chave, ttl):
+        """Soma 1 ao contador e retorna o novo valor; a janela de `ttl` começa no primeiro incremento."""
+        agora = time.time()
+
+        def operacao(conexao):
+            linha = conexao.execute(f"SELECT valor FROM {self.nome} WHERE chave = ? AND expira > ?", (chave, agora)).fetchone()
+            if linha is None:
+                self._liberar_espaco(conexao, agora)
+                conexao.execute(
+                    f"INSERT OR REPLACE INTO {self.nome} (chave, valor, expira) VALUES (?, '1', ?)", (chave, agora + ttl)
+                )
+                return 1
+            valor = json.loads(linha[0]) + 1
+            conexao.execute(f"UPDATE {self.nome} SET valor = ? WHERE chave = ?", (json.dumps(valor), chave))
+            return valor
+        return self._transacao(operacao)
+
+    def __len__(self):
+        with self._lock:
+            return self._conectar().execute(f"SELECT COUNT(*) FROM {self.nome} WHERE expira > ?", (time.time(),)).fetchone()[0]
+
+
+def criar_armazem(backend=SESSION_BACKEND):
+    """Armazém de sessões configurado em SESSION_BACKEND ("memoria" ou "sqlite")."""
+    if backend == "sqlite":
+        return ArmazemSQLite()
+    return ArmazemMemoria()
@@ -0,0 +1,78 @@
+# core/singleflight.py
+"""
+Agrupamento de chamadas simultâneas idênticas ("single-flight").
+
+Quando várias sessões pedem a mesma coisa ao mesmo tempo (ex.: o load_data logo após um deploy,
+ou vários usuários roteando entre as mesmas cidades), só a primeira chamada executa; as demais
+esperam e recebem o mesmo resultado, ou a mesma exceção. Nada fica guardado depois que a
+chamada termina: o reaproveitamento entre chamadas não simultâneas continua a cargo dos caches.
+"""
+import functools
+import threading
+
+
+class _Chamada:
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class SingleFlight:
+    """Executa no máximo uma chamada por chave ao mesmo tempo, compartilhando o resultado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self.executadas = 0
+        self.compartilhadas = 0
+
+    def executar(self, chave, funcao, *args, **kwargs):
+        with self._lock:
+            chamada = self._em_andamento.get(chave)
+            if chamada is not None:
+                self.compartilhadas += 1
+                lider = False
+            else:
+                chamada = self._em_andamento[chave] = _Chamada()
+                self.executadas += 1
+                lider = True
+
+        if not lider:
+            chamada.concluida.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao(*args, **kwargs)
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+            chamada.concluida.set()
+
+    def estatisticas(self):
+        """Chamadas executadas e chamadas que reaproveitaram uma execução em andamento."""
+        return {"executadas": self.executadas, "compartilhadas": self.compartilhadas}
+
+
+def coalescer(chave=None):
+    """
+    Decorador: chamadas simultâneas com a mesma chave compartilham uma única execução.
+    `chave(*args, **kwargs)` define a chave; por padrão são os próprios argumentos (hasháveis).
+    """
+    def decorador(funcao):
+        grupo = SingleFlight()
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            k = chave(*args, **kwargs) if chave is not None else (args, tuple(sorted(kwargs.items())))
+            return grupo.executar(k, funcao, *args, **kwargs)
+
+        envoltorio.singleflight = grupo
+        return envoltorio
+    return decorador
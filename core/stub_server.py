@@ -0,0 +1,209 @@
+"""
+Servidor HTTP local que imita as APIs do Nominatim e do OSRM e um endpoint de LLM em streaming.
+
+Usado em testes e benchmarks para rodar o cálculo de rotas e o chatbot sem acesso à rede:
+
+    python -m core.stub_server --porta 8089 --latencia 0.05
+
+e depois apontar NOMINATIM_URL=http://127.0.0.1:8089/search,
+ROUTING_URL=http://127.0.0.1:8089/route/v1/driving/ e, para o chatbot,
+LLM_BACKEND=stub com LLM_URL=http://127.0.0.1:8089/llm/generate no .env.
+"""
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from core.cache import normalizar_texto
+from core.llm import carregar_gravacoes, chave_prompt
+
+# Coordenadas conhecidas; qualquer outra cidade recebe uma posição determinística dentro do Brasil
+CIDADES_CONHECIDAS = {
+    "campinas": (-22.9056, -47.0608, "Campinas", "SP"),
+    "sao paulo": (-23.5505, -46.6333, "São Paulo", "SP"),
+    "rio de janeiro": (-22.9068, -43.1729, "Rio de Janeiro", "RJ"),
+    "recife": (-8.0476, -34.8770, "Recife", "PE"),
+    "olinda": (-7.9986, -34.8450, "Olinda", "PE"),
+    "belo horizonte": (-19.9167, -43.9345, "Belo Horizonte", "MG"),
+}
+CIDADES_INEXISTENTES = {"hogwarts", "narnia"}
+VELOCIDADE_MEDIA_KMH = 80.0
+PONTOS_POR_ROTA = 200
+TAMANHO_PARTE_LLM = 16  # caracteres por parte do streaming
+
+# Resposta usada quando o prompt não tem gravação: código curto seguido de uma explicação longa,
+# como o Gemini costuma responder
+RESPOSTA_LLM_PADRAO = (
+    "Claro! Aqui está o código para responder à pergunta:\n\n"
+    "```python\n"
+    "total = len(df)\n"
+    "final_result = f\"Foram registrados {total} acidentes no período analisado.\"\n"
+    "```\n\n"
+    "**Explicação:**\n\n"
+    + "O código conta as linhas do DataFrame `df`, uma por acidente, e formata o total em português. " * 6
+)
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    """Distância em km entre dois pontos (lat, lon) em graus."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def _geocodificar(consulta):
+    """Resposta no formato do Nominatim para a consulta 'Cidade, UF'."""
+    partes = [p.strip() for p in consulta.split(",")]
+    nome = normalizar_texto(partes[0])
+    if not nome or nome in CIDADES_INEXISTENTES:
+        return []
+    if nome in CIDADES_CONHECIDAS:
+        lat, lon, municipio, uf = CIDADES_CONHECIDAS[nome]
+    else:
+        digest = hashlib.md5(nome.encode("utf-8")).digest()
+        lat = -30.0 + digest[0] / 255.0 * 27.0
+        lon = -55.0 + digest[1] / 255.0 * 20.0
+        municipio = partes[0].title()
+        uf = partes[1].upper() if len(partes) > 1 else "SP"
+    return [{
+        "lat": f"{lat:.7f}",
+        "lon": f"{lon:.7f}",
+        "display_name": f"{municipio}, {uf}, Brasil",
+        "address": {"city": municipio, "state": uf, "country": "Brasil"},
+    }]
+
+
+def _resposta_llm(prompt, gravacoes):
+    """Resposta gravada para o prompt (pela chave exata ou pela pergunta contida nele), ou a padrão."""
+    registro = gravacoes.get(chave_prompt(prompt))
+    if registro is None:
+        prompt_normalizado = normalizar_texto(prompt)
+        registro = next(
+            (g for g in reversed(list(gravacoes.values()))
+             if g.get("pergunta") and normalizar_texto(g["pergunta"]) in prompt_normalizado),
+            None,
+        )
+    return registro["resposta"] if registro else RESPOSTA_LLM_PADRAO
+
+
+def _rotas(lonA, latA, lonB, latB):
+    """Resposta no formato do OSRM com duas alternativas sintéticas."""
+    distancia_km = _haversine_km(latA, lonA, latB, lonB) * 1.25
+    rotas = []
+    for i, (desvio, fator) in enumerate([(0.0, 1.0), (0.15, 1.08)]):
+        coordenadas = []
+        for k in range(PONTOS_POR_ROTA):
+            t = k / (PONTOS_POR_ROTA - 1)
+            # Curva suave para que a rota alternativa não coincida com a principal
+            arco = desvio * math.sin(math.pi * t)
+            coordenadas.append([lonA + (lonB - lonA) * t + arco, latA + (latB - latA) * t + arco])
+        distancia = distancia_km * fator * 1000.0
+        rotas.append({
+            "geometry": {"type": "LineString", "coordinates": coordenadas},
+            "duration": distancia / (VELOCIDADE_MEDIA_KMH / 3.6),
+            "distance": distancia,
+            "summary": f"Rota stub {i + 1}",
+        })
+    return {"code": "Ok", "routes": rotas}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        servidor = self.server
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+        if url.path.rstrip("/").endswith("/search"):
+            servidor.contagem["nominatim"] += 1
+            consulta = parse_qs(url.query).get("q", [""])[0]
+            self._responder(200, _geocodificar(consulta))
+        elif "/route/v1/" in url.path:
+            servidor.contagem["osrm"] += 1
+            try:
+                pontos = url.path.rsplit("/", 1)[1].split(";")
+                (lonA, latA), (lonB, latB) = [map(float, p.split(",")) for p in pontos[:2]]
+            except ValueError:
+                self._responder(400, {"code": "InvalidQuery", "message": "Coordenadas inválidas"})
+                return
+            self._responder(200, _rotas(lonA, latA, lonB, latB))
+        else:
+            self._responder(404, {"erro": "rota desconhecida"})
+
+    def do_POST(self):
+        servidor = self.server
+        if not urlsplit(self.path).path.rstrip("/").endswith("/llm/generate"):
+            self._responder(404, {"erro": "rota desconhecida"})
+            return
+        servidor.contagem["llm"] += 1
+        tamanho = int(self.headers.get("Content-Length", 0))
+        prompt = json.loads(self.rfile.read(tamanho) or b"{}").get("prompt", "")
+        resposta = _resposta_llm(prompt, servidor.gravacoes)
+
+        # latencia = tempo até a primeira parte; latencia_token = intervalo entre as partes
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+        # Transferência em partes (chunked) para o cliente receber cada parte assim que é escrita
+        self.protocol_version = "HTTP/1.1"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for i in range(0, len(resposta), TAMANHO_PARTE_LLM):
+                if i and servidor.latencia_token:
+                    time.sleep(servidor.latencia_token)
+                parte = resposta[i:i + TAMANHO_PARTE_LLM].encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(parte), parte))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente parou de ler (ex.: já recebeu o bloco de código inteiro)
+            servidor.contagem["llm_interrompidas"] += 1
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, format, *args):
+        # Silencia o log por requisição para não poluir a saída de testes/benchmarks
+        pass
+
+
+def iniciar_servidor_stub(porta=0, latencia=0.0, latencia_token=0.0, gravacoes=None):
+    """Sobe o servidor stub em uma thread e retorna (servidor, url_base)."""
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), _StubHandler)
+    servidor.daemon_threads = True
+    servidor.latencia = latencia
+    servidor.latencia_token = latencia_token
+    servidor.gravacoes = carregar_gravacoes(gravacoes)
+    servidor.contagem = Counter()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub local das APIs Nominatim, OSRM e do LLM do chatbot.")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso artificial por requisição (s)")
+    parser.add_argument("--latencia-token", type=float, default=0.0, help="Intervalo entre partes da resposta do LLM (s)")
+    parser.add_argument("--gravacoes", default=None, help="JSONL com respostas gravadas do LLM (LLM_GRAVACOES)")
+    args = parser.parse_args()
+
+    servidor, url_base = iniciar_servidor_stub(args.porta, args.latencia, args.latencia_token, args.gravacoes)
+    print(f"Stub Nominatim: {url_base}/search")
+    print(f"Stub OSRM:      {url_base}/route/v1/driving/")
+    print(f"Stub LLM:       {url_base}/llm/generate ({len(servidor.gravacoes)} respostas gravadas)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
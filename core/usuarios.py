@@ -0,0 +1,165 @@
+# core/usuarios.py
+"""
+Cadastro de usuários em SQLite, com índices por e-mail e por (provedor OAuth, id no provedor).
+
+Substitui o data/users.json, que era lido e reescrito por inteiro a cada operação: as buscas
+agora custam uma consulta indexada (não crescem com o número de usuários) e cada cadastro é
+uma transação, então cadastros simultâneos em processos diferentes do Streamlit não se perdem.
+Na primeira abertura do banco, os usuários do users.json são importados uma única vez.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+VERSAO_ESQUEMA = 1
+CAMPOS = ("id", "email", "name", "password", "oauth_provider", "oauth_id", "created_at")
+
+log = logging.getLogger(__name__)
+
+
+def _usuario(linha):
+    """Linha do banco -> dicionário no formato do antigo users.json (sem os campos vazios)."""
+    return {campo: valor for campo, valor in zip(CAMPOS, linha) if valor is not None} if linha else None
+
+
+class UsuariosSQLite:
+    """Usuários em uma tabela SQLite; `arquivo_json` é o users.json migrado na criação do banco."""
+
+    def __init__(self, caminho, arquivo_json=None):
+        self.caminho = Path(caminho)
+        self.arquivo_json = Path(arquivo_json) if arquivo_json else None
+        self._lock = threading.Lock()
+        self._conexao = None
+
+    def _conectar(self):
+        if self._conexao is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: as transações são abertas explicitamente com BEGIN IMMEDIATE
+            conexao = sqlite3.connect(str(self.caminho), timeout=30, check_same_thread=False, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            self._migrar(conexao)
+            self._conexao = conexao
+        return self._conexao
+
+    def _migrar(self, conexao):
+        # BEGIN IMMEDIATE: só um processo cria o esquema e importa o JSON; os demais esperam e veem a versão nova
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            if conexao.execute("PRAGMA user_version").fetchone()[0] < VERSAO_ESQUEMA:
+                conexao.execute(
+                    "CREATE TABLE IF NOT EXISTS usuarios ("
+                    "id TEXT PRIMARY KEY, email TEXT NOT NULL UNIQUE, name TEXT, password TEXT, "
+                    "oauth_provider TEXT, oauth_id TEXT, created_at REAL NOT NULL)"
+                )
+                conexao.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_oauth ON usuarios (oauth_provider, oauth_id) "
+                    "WHERE oauth_provider IS NOT NULL"
+                )
+                self._importar_json(conexao)
+                conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+
+    def _importar_json(self, conexao):
+        if self.arquivo_json is None or not self.arquivo_json.exists():
+            return
+        try:
+            with open(self.arquivo_json, "r", encoding="utf-8") as f:
+                usuarios = json.load(f).get("users", [])
+        except json.JSONDecodeError:
+            return
+        self._inserir(conexao, usuarios)
+        log.info("%d usuários importados de %s para %s", len(usuarios), self.arquivo_json, self.caminho)
+
+    @staticmethod
+    def _inserir(conexao, usuarios):
+        # OR IGNORE: e-mails repetidos no JSON antigo mantêm o primeiro cadastro
+        conexao.executemany(
+            f"INSERT OR IGNORE INTO usuarios ({', '.join(CAMPOS)}) VALUES ({', '.join('?' * len(CAMPOS))})",
+            ([u.get(campo) if campo != "created_at" else u.get(campo, time.time()) for campo in CAMPOS] for u in usuarios),
+        )
+
+    def _consultar(self, sql, parametros):
+        with self._lock:
+            return self._conectar().execute(sql, parametros).fetchone()
+
+    def por_email(self, email):
+        """Usuário com o e-mail, ou None."""
+        return _usuario(self._consultar(f"SELECT {', '.join(CAMPOS)} FROM usuarios WHERE email = ?", (email,)))
+
+    def por_oauth(self, provedor, id_provedor):
+        """Usuário vinculado à conta do provedor OAuth, ou None."""
+        return _usuario(self._consultar(
+            f"SELECT {', '.join(CAMPOS)} FROM usuarios WHERE oauth_provider = ? AND oauth_id = ?", (provedor, id_provedor)
+        ))
+
+    def listar(self):
+        """Todos os usuários, em ordem de cadastro."""
+        with self._lock:
+            linhas = self._conectar().execute(f"SELECT {', '.join(CAMPOS)} FROM usuarios ORDER BY created_at").fetchall()
+        return [_usuario(linha) for linha in linhas]
+
+    def __len__(self):
+        return self._consultar("SELECT COUNT(*) FROM usuarios", ())[0]
+
+    def importar(self, usuarios):
+        """Insere vários usuários (já no formato do users.json) em uma única transação."""
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                self._inserir(conexao, usuarios)
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+
+    def cadastrar(self, email, senha_hash=None, nome=None, provedor=None, id_provedor=None):
+        """
+        Cadastra o usuário ou, se o e-mail já existe e há dados OAuth, vincula a conta do provedor.
+        Retorna False se o e-mail já existe e não há vínculo OAuth a fazer.
+        """
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                existe = conexao.execute("SELECT 1 FROM usuarios WHERE email = ?", (email,)).fetchone()
+                if existe:
+                    if not (provedor and id_provedor):
+                        conexao.execute("ROLLBACK")
+                        return False
+                    conexao.execute(
+                        "UPDATE usuarios SET oauth_provider = ?, oauth_id = ? WHERE email = ?", (provedor, id_provedor, email)
+                    )
+                else:
+                    conexao.execute(
+                        f"INSERT INTO usuarios ({', '.join(CAMPOS)}) VALUES ({', '.join('?' * len(CAMPOS))})",
+                        (str(uuid.uuid4()), email, nome if nome else email.split('@')[0], senha_hash,
+                         provedor if provedor and id_provedor else None, id_provedor if provedor and id_provedor else None,
+                         time.time()),
+                    )
+                conexao.execute("COMMIT")
+                return True
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+
+    def atualizar_senha(self, email, senha_hash_atual, senha_hash_nova):
+        """Troca o hash da senha se ele ainda é `senha_hash_atual`; retorna se houve troca."""
+        with self._lock:
+            cursor = self._conectar().execute(
+                "UPDATE usuarios SET password = ? WHERE email = ? AND password = ?", (senha_hash_nova, email, senha_hash_atual)
+            )
+        return cursor.rowcount == 1
+
+    def fechar(self):
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
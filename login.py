@@ -48,7 +48,7 @@ def show_login_form():
             st.error("Por favor, preencha todos os campos.")
             return
         
-        if is_login_attempts_exceeded():
+        if is_login_attempts_exceeded(email):
             st.error("Número máximo de tentativas de login excedido. Tente novamente mais tarde.")
             return
         
@@ -0,0 +1,54 @@
+# pages/metricas.py
+import pandas as pd
+import streamlit as st
+from core.auth import check_session_expiry, is_admin
+from core.metricas import METRICAS, METRICAS_ARQUIVO, METRICAS_HOST, METRICAS_PORTA
+
+# --- Acesso restrito aos administradores (ADMIN_EMAILS) ---
+if not st.session_state.get('auth', False) or check_session_expiry():
+    st.switch_page("login.py")
+if not is_admin():
+    st.error("Página restrita aos administradores (ADMIN_EMAILS).")
+    st.stop()
+
+st.title("Métricas do processo")
+if not METRICAS.ativas:
+    st.warning("Instrumentação desligada (METRICAS_ATIVAS=0).")
+
+col1, col2 = st.columns(2)
+if col1.button("Atualizar"):
+    st.rerun()
+if col2.button("Zerar tempos e contadores"):
+    METRICAS.limpar()
+    st.rerun()
+
+# --- Tempos por operação (janela recente) ---
+st.subheader("Tempos por operação")
+resumo = pd.DataFrame(METRICAS.resumo())
+if resumo.empty:
+    st.info("Nenhuma operação medida ainda neste processo.")
+else:
+    resumo = resumo.sort_values("total_s", ascending=False).set_index("operacao")
+    st.dataframe(resumo.style.format({"p50_ms": "{:.1f}", "p95_ms": "{:.1f}", "max_ms": "{:.1f}", "total_s": "{:.2f}"}))
+    st.bar_chart(resumo[["p50_ms", "p95_ms"]])
+
+# --- Contadores e medidores ---
+st.subheader("Contadores")
+contadores = METRICAS.contadores()
+if contadores:
+    st.dataframe(pd.Series(contadores, name="total").sort_index())
+
+st.subheader("Medidores")
+for nome, campos in METRICAS.medidores().items():
+    st.markdown(f"**{nome}**")
+    st.json(campos)
+
+# --- Exportação Prometheus ---
+st.subheader("Prometheus")
+destinos = []
+if METRICAS_PORTA:
+    destinos.append(f"endpoint `http://{METRICAS_HOST}:{METRICAS_PORTA}/metrics`")
+if METRICAS_ARQUIVO:
+    destinos.append(f"arquivo `{METRICAS_ARQUIVO}`")
+st.caption("Exportando para " + " e ".join(destinos) if destinos else "Defina METRICAS_PORTA e/ou METRICAS_ARQUIVO para exportar.")
+st.download_button("Baixar métricas (formato texto)", METRICAS.exportar_prometheus(), file_name="metricas.prom")
@@ -1,255 +1,221 @@
 # rotas.py
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
-import requests
-import joblib
-import pandas as pd
+import streamlit.components.v1 as components
 from datetime import datetime
+from core.rotas import (
+    ARQUIVO_MODELO,
+    MODELO_RISCO,
+    geocodificar_cidades,
+    calcular_rota,
+    planejar_partida,
+    melhores_partidas,
+)
+from core.grafo import calcular_rota_local, grafo_local_disponivel
+from core.geometria import simplificar_por_nivel
+from core.mapa import NIVEIS_ZOOM_ROTAS, html_mapa_rotas
+from core.grade_risco import carregar_grade, grade_disponivel, imagem_camada
+from core.corredor import carregar_indice, indice_disponivel
+from core.municipios import carregar_municipios
+from core.memoria_sessao import MEMORIA_SESSOES, id_sessao
+from core.metricas import METRICAS
+
+# Também mede as execuções interrompidas por st.stop, st.rerun ou st.switch_page
+with METRICAS.cronometro("pagina.rotas"):
+    # Status do modelo de risco (carregado uma única vez em core.rotas)
+    if MODELO_RISCO is not None:
+        st.sidebar.success("Modelo de Risco de Acidente carregado com sucesso.")
+    else:
+        st.sidebar.error(f"Modelo '{ARQUIVO_MODELO}' não encontrado. Execute preditor_risco.py primeiro.")
 
-# --- CONFIGURAÇÕES E CARREGAMENTO DO MODELO ---
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
-# URL do OSRM para obter rotas alternativas (geometria e tempo)
-ROUTING_URL = "https://router.project-osrm.org/route/v1/driving/"
-ARQUIVO_MODELO = 'modelo_risco_rodoviario.pkl'
+    # --- LAYOUT STREAMLIT ---
 
-# Carregar o modelo de risco uma única vez
-try:
-    MODELO_RISCO = joblib.load(ARQUIVO_MODELO)
-    st.sidebar.success("Modelo de Risco de Acidente carregado com sucesso.")
-except FileNotFoundError:
-    MODELO_RISCO = None
-    st.sidebar.error(f"Modelo '{ARQUIVO_MODELO}' não encontrado. Execute preditor_risco.py primeiro.")
+    st.title("Calculadora de Rotas com Otimização de Risco 🚧")
+    st.markdown("Otimiza a rota buscando o menor custo, combinando o tempo de viagem com o risco de acidentes previsto pelo ML (dados DATATRAN).")
 
-# --- FUNÇÕES AUXILIARES DE ML ---
+    # As rotas (geometria completa) ficam no armazém com orçamento de memória (core.memoria_sessao), não no session_state
+    SESSAO = id_sessao(st.session_state)
 
-def _preparar_dados_para_modelo(localizacao, condicao_metereologica):
-    """Prepara o input de dados de viagem para o modelo ML."""
-    
-    # Mapeamento do dia da semana para o formato usado no treinamento do ML
-    dia_semana_map = {0: 'segunda-feira', 1: 'terça-feira', 2: 'quarta-feira', 3: 'quinta-feira', 4: 'sexta-feira', 5: 'sábado', 6: 'domingo'}
-    now = datetime.now()
-    
-    dados_viagem = {
-        'hora_do_dia': now.hour,
-        'mes': now.month,
-        'dia_semana': dia_semana_map.get(now.weekday()), 
-        'condicao_metereologica': condicao_metereologica, 
-        'localizacao': localizacao # Ex: SP_SAO PAULO
-    }
-    
-    return pd.DataFrame([dados_viagem])
+    # Inicialização do session_state
+    if "ufA" not in st.session_state:
+        st.session_state["ufA"] = ""
+        st.session_state["municipioA"] = ""
+        st.session_state["ufB"] = ""
+        st.session_state["municipioB"] = ""
+        st.session_state["latA"] = None
+        st.session_state["lonA"] = None
+        st.session_state["latB"] = None
+        st.session_state["lonB"] = None
 
+    # Seletores de Origem e Destino (fora do formulário, para que o município acompanhe a UF escolhida)
+    indice_municipios = carregar_municipios()
 
-def calcular_risco_segmento(uf, municipio, condicao_metereologica):
-    """Calcula o risco de alta gravidade (probabilidade) para um local."""
-    if MODELO_RISCO is None or not uf or not municipio:
-        return 0.0
-        
-    localizacao = f"{uf}_{municipio}"
-    dados_input = _preparar_dados_para_modelo(localizacao, condicao_metereologica)
-    
-    # Prever a probabilidade de alta risco (Classe 1)
-    try:
-        risco_prob = MODELO_RISCO.predict_proba(dados_input)[0][1]
-        return risco_prob
-    except Exception as e:
-        # st.warning(f"Erro na predição ML para {localizacao}: {e}")
-        return 0.0 # Retorna 0 em caso de erro de predição
-
-# --- FUNÇÕES DE GEOLOCALIZAÇÃO E ROTA ---
-
-def geocodificar_cidade(cidade):
-    """Converte o nome de uma cidade em coordenadas (lat, lon) e extrai UF/Município."""
-    headers = {
-        "User-Agent": "CalculadoraDeRotasStreamlit/1.0"
-    }
-    params = {
-        "q": cidade,
-        "format": "json",
-        "limit": 1,
-        "addressdetails": 1, # Capturar detalhes de endereço
-    }
-    try:
-        response = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if data:
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            
-            address = data[0].get('address', {})
-            # Tenta encontrar o município com diferentes chaves
-            municipio = address.get('city') or address.get('town') or address.get('village') or address.get('county')
-            uf = address.get('state') # Estado/UF
-            
-            return lat, lon, municipio.upper() if municipio else None, uf.upper() if uf else None
-        else:
-            return None, None, None, None
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erro ao geocodificar '{cidade}': {e}")
-        return None, None, None, None
-
-
-def calcular_rota(latA, lonA, latB, lonB, municipioA, ufA, municipioB, ufB, condicao_metereologica, peso_risco=50):
-    """
-    Calcula rotas alternativas usando OSRM e ajusta o custo usando o Modelo de Risco.
-    """
-    # 1. Obter rotas alternativas do OSRM
-    osrm_url = f"{ROUTING_URL}{lonA},{latA};{lonB},{latB}"
-    params = {"alternatives": "true", "steps": "false", "geometries": "geojson"}
-    
-    try:
-        response = requests.get(osrm_url, params=params)
-        response.raise_for_status()
-        dados = response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erro ao calcular a rota: {e}")
-        return None
-
-    rotas_alternativas = []
-    
-    # 2. Processamento e Ajuste de Custo com ML
-    for rota in dados.get("routes", []):
-        
-        tempo_total = rota["duration"] / 60.0 # Tempo em minutos
-        distancia_total = rota["distance"] / 1000.0 # Distância em km
-        
-        # Simulação: Risco calculado nos pontos de origem e destino (Proxy para o risco médio da rota)
-        risco_origem = calcular_risco_segmento(ufA, municipioA, condicao_metereologica)
-        risco_destino = calcular_risco_segmento(ufB, municipioB, condicao_metereologica)
-        
-        risco_medio_rota = (risco_origem + risco_destino) / 2.0
-        
-        # Custo Ajustado: Tempo (minutos) + (Risco_médio * Ponderação do Risco)
-        # O peso_risco permite que o usuário defina o quanto ele valoriza a segurança.
-        custo_ajustado = tempo_total + (risco_medio_rota * peso_risco)
-        
-        # O valor do risco é exibido para o usuário
-        rotas_alternativas.append({
-            "coordenadas": rota["geometry"]["coordinates"], # Formato [lon, lat]
-            "tempo_min": tempo_total,
-            "distancia_km": distancia_total,
-            "risco_medio": risco_medio_rota,
-            "custo_ajustado": custo_ajustado,
-            "resumo": rota.get("summary", f"Rota {len(rotas_alternativas) + 1}")
-        })
-
-    # Ordenar as rotas pelo NOVO CUSTO AJUSTADO (A Rota "Melhor")
-    rotas_alternativas.sort(key=lambda x: x["custo_ajustado"])
-    
-    return rotas_alternativas
-
-# --- LAYOUT STREAMLIT ---
-
-st.title("Calculadora de Rotas com Otimização de Risco 🚧")
-st.markdown("Otimiza a rota buscando o menor custo, combinando o tempo de viagem com o risco de acidentes previsto pelo ML (dados DATATRAN).")
-
-# Inicialização do session_state
-if "ufA" not in st.session_state:
-    st.session_state["ufA"] = ""
-    st.session_state["municipioA"] = ""
-    st.session_state["ufB"] = ""
-    st.session_state["municipioB"] = ""
-    st.session_state["rotas"] = []
-    st.session_state["latA"] = None
-    st.session_state["lonA"] = None
-    st.session_state["latB"] = None
-    st.session_state["lonB"] = None
-
-# Formulário de Input
-with st.form("form_rota"):
-    st.header("1. Origem e Destino")
-    col1, col2 = st.columns(2)
-    
-    origem_cidade = col1.text_input("Cidade de Origem (Ex: Campinas, SP)", key="origem_input")
-    destino_cidade = col2.text_input("Cidade de Destino (Ex: Rio de Janeiro, RJ)", key="destino_input")
-
-    st.header("2. Condições e Prioridade")
-    col3, col4 = st.columns(2)
-    condicao_metereologica = col3.selectbox(
-        "Condição Meteorológica Atual (para o ML)",
-        options=['Sol', 'Chuva', 'Nublado', 'Nevoeiro', 'Ignorada'],
-        key="condicao_metereologica"
-    )
-    # O campo 'Peso do Risco' foi removido conforme solicitado.
-    # Definindo um peso fixo para o risco (ex: 50) para manter a otimização de risco.
-    peso_risco = 50 # Valor fixo para ponderação do risco na otimização
-    
-    submitted = st.form_submit_button("Calcular Rota Otimizada")
 
+    def seletor_municipio(coluna, rotulo, chave, uf_padrao, municipio_padrao):
+        """UF, busca por prefixo e município dependente; só combinações válidas para o modelo são oferecidas."""
+        ufs = indice_municipios.ufs
+        uf = coluna.selectbox(f"UF de {rotulo}", ufs, index=ufs.index(uf_padrao), key=f"uf_{chave}")
+        prefixo = coluna.text_input(f"Buscar município de {rotulo} (início do nome)", key=f"busca_{chave}")
+        opcoes = indice_municipios.opcoes(uf, prefixo)
+        padrao = opcoes.index(municipio_padrao) if municipio_padrao in opcoes else 0
+        # Sem key: quando as opções mudam (UF ou prefixo), o seletor é recriado já com um valor válido
+        municipio = coluna.selectbox(f"Município de {rotulo}", opcoes, index=padrao)
+        return uf, municipio
 
-# Lógica de Geocodificação e Cálculo
-if submitted:
-    
-    latA, lonA, municipioA, ufA = geocodificar_cidade(origem_cidade)
-    latB, lonB, municipioB, ufB = geocodificar_cidade(destino_cidade)
-
-    if latA and latB and ufA and ufB:
-        # Atualiza o estado da sessão com os dados geocodificados
-        st.session_state["latA"], st.session_state["lonA"] = latA, lonA
-        st.session_state["latB"], st.session_state["lonB"] = latB, lonB
-        st.session_state["municipioA"], st.session_state["ufA"] = municipioA, ufA
-        st.session_state["municipioB"], st.session_state["ufB"] = municipioB, ufB
-        
-        st.success(f"Origem: {origem_cidade} ({ufA}) | Destino: {destino_cidade} ({ufB})")
 
-        # 2. Cálculo da Rota Otimizada
-        st.session_state["rotas"] = calcular_rota(
-            latA, lonA, latB, lonB, 
-            municipioA, ufA, municipioB, ufB,
-            condicao_metereologica
+    st.header("1. Origem e Destino")
+    col1, col2 = st.columns(2)
+    uf_origem, municipio_origem = seletor_municipio(col1, "Origem", "origem", "SP", "CAMPINAS")
+    uf_destino, municipio_destino = seletor_municipio(col2, "Destino", "destino", "RJ", "RIO DE JANEIRO")
+
+    # Formulário de Input
+    with st.form("form_rota"):
+        st.header("2. Condições e Prioridade")
+        col3, col4 = st.columns(2)
+        condicao_metereologica = col3.selectbox(
+            "Condição Meteorológica Atual (para o ML)",
+            options=['Sol', 'Chuva', 'Nublado', 'Nevoeiro', 'Ignorada'],
+            key="condicao_metereologica"
         )
+        # O campo 'Peso do Risco' foi removido conforme solicitado.
+        # Definindo um peso fixo para o risco (ex: 50) para manter a otimização de risco.
+        peso_risco = 50 # Valor fixo para ponderação do risco na otimização
+
+        # Roteamento offline só aparece quando existe um grafo local pré-construído (python -m core.grafo)
+        modo_roteamento = "OSRM (online)"
+        if grafo_local_disponivel():
+            modo_roteamento = col4.radio(
+                "Modo de roteamento",
+                options=["OSRM (online)", "Grafo local (offline)"],
+                key="modo_roteamento",
+                help="O grafo local encontra a rota de menor custo (tempo + risco por hora) sem acessar a rede."
+            )
+    
+        submitted = st.form_submit_button("Calcular Rota Otimizada")
+
+
+    # Lógica de Geocodificação e Cálculo
+    if submitted and not (municipio_origem and municipio_destino):
+        st.error("Selecione o município de origem e o de destino.")
+    elif submitted:
+        origem_cidade = f"{municipio_origem.title()}, {uf_origem}"
+        destino_cidade = f"{municipio_destino.title()}, {uf_destino}"
+
+        # Origem e destino são independentes: geocodificados em paralelo
+        (latA, lonA, _, _), (latB, lonB, _, _) = geocodificar_cidades(origem_cidade, destino_cidade)
+        # UF/Município vêm dos seletores (nomes do DATATRAN), e não do endereço devolvido pelo Nominatim
+        ufA, municipioA = uf_origem, municipio_origem
+        ufB, municipioB = uf_destino, municipio_destino
+
+        if latA and latB:
+            # Atualiza o estado da sessão com os dados geocodificados
+            st.session_state["latA"], st.session_state["lonA"] = latA, lonA
+            st.session_state["latB"], st.session_state["lonB"] = latB, lonB
+            st.session_state["municipioA"], st.session_state["ufA"] = municipioA, ufA
+            st.session_state["municipioB"], st.session_state["ufB"] = municipioB, ufB
         
-    else:
-        st.error("Não foi possível geocodificar as cidades ou obter o UF/Município (essencial para o ML). Tente um formato mais específico.")
+            st.success(f"Origem: {origem_cidade} | Destino: {destino_cidade}")
+
+            # 2. Cálculo da Rota Otimizada
+            funcao_rota = calcular_rota_local if modo_roteamento == "Grafo local (offline)" else calcular_rota
+            momento_rotas = datetime.now()
+            rotas = funcao_rota(
+                latA, lonA, latB, lonB, 
+                municipioA, ufA, municipioB, ufB,
+                condicao_metereologica
+            ) or []
+            # A geometria completa fica para o cálculo de risco; o mapa recebe versões simplificadas por nível de zoom
+            for rota in rotas:
+                rota["coordenadas_mapa"] = simplificar_por_nivel(rota["coordenadas"], NIVEIS_ZOOM_ROTAS)
+            MEMORIA_SESSOES.guardar(SESSAO, "rotas", rotas)
+            # Condição e horário com que as rotas foram pontuadas: o planejador parte deles, e não do valor atual do formulário
+            st.session_state["rotas_condicao"] = condicao_metereologica
+            st.session_state["rotas_momento"] = momento_rotas
+        
+        else:
+            st.error("Não foi possível geocodificar as cidades selecionadas.")
 
 
-# Exibir mapa
-if st.session_state["rotas"]:
+    # Exibir mapa
+    rotas_sessao = MEMORIA_SESSOES.obter(SESSAO, "rotas", [])
+    if rotas_sessao:
     
-    st.markdown("### 3. Resultado da Otimização")
+        st.markdown("### 3. Resultado da Otimização")
+        st.caption(f"Risco previsto para {st.session_state['rotas_condicao']} às {st.session_state['rotas_momento']:%H:%M}.")
 
-    centro = [
-        (st.session_state["latA"] + st.session_state["latB"]) / 2,
-        (st.session_state["lonA"] + st.session_state["lonB"]) / 2,
-    ]
-    m = folium.Map(location=centro, zoom_start=6)
-    
-    # Marcadores de Origem/Destino
-    folium.Marker(
-        [st.session_state["latA"], st.session_state["lonA"]],
-        popup=f"Origem: {st.session_state['municipioA']} - {st.session_state['ufA']}", icon=folium.Icon(color="green")
-    ).add_to(m)
-    folium.Marker(
-        [st.session_state["latB"], st.session_state["lonB"]],
-        popup=f"Destino: {st.session_state['municipioB']} - {st.session_state['ufB']}", icon=folium.Icon(color="red")
-    ).add_to(m)
-    
-    cores = ["blue", "purple", "orange", "gray"]
-    
-    for i, rota in enumerate(st.session_state["rotas"]):
+        for i, rota in enumerate(rotas_sessao):
         
-        # Inverter coordenadas para o folium [lon, lat] -> [lat, lon]
-        pontos_rota = [[p[1], p[0]] for p in rota["coordenadas"]]
+            # Destaque para a Rota Otimizada (primeira da lista)
+            is_best_route = i == 0
         
-        # Destaque para a Rota Otimizada (primeira da lista)
-        is_best_route = i == 0
-        
-        st.markdown(
-            f"**{'🥇 MELHOR ROTA' if is_best_route else f'Rota {i+1}'}** ({rota['resumo']}): "
-            f"**{rota['distancia_km']:.0f} km** | "
-            f"**{rota['tempo_min']:.0f} min** | "
-            f"**Risco Previsto:** {rota['risco_medio']:.4f} | "
-            f"**Custo Ajustado:** {rota['custo_ajustado']:.2f}",
-            help=f"O Custo Ajustado é a métrica usada para classificar as rotas: Tempo + ({rota['risco_medio']:.4f} * {peso_risco}). O peso do risco é fixo em {peso_risco}."
+            st.markdown(
+                f"**{'🥇 MELHOR ROTA' if is_best_route else f'Rota {i+1}'}** ({rota['resumo']}): "
+                f"**{rota['distancia_km']:.0f} km** | "
+                f"**{rota['tempo_min']:.0f} min** | "
+                f"**Risco Previsto:** {rota['risco_medio']:.4f} | "
+                f"**Custo Ajustado:** {rota['custo_ajustado']:.2f}",
+                help=f"O Custo Ajustado é a métrica usada para classificar as rotas: Tempo + ({rota['risco_medio']:.4f} * {peso_risco}). O peso do risco é fixo em {peso_risco}."
+            )
+
+        # Camada opcional da grade pré-calculada (python -m core.grade_risco): apenas uma fatia do array por hora
+        camada = None
+        if grade_disponivel() and st.checkbox("Mostrar camada de risco no mapa", key="mostrar_camada"):
+            col_camada, col_hora = st.columns(2)
+            tipo_camada = col_camada.radio(
+                "Camada", options=["risco", "densidade"], horizontal=True, key="tipo_camada",
+                format_func=lambda t: "Risco previsto" if t == "risco" else "Densidade histórica"
+            )
+            hora_camada = col_hora.slider("Hora do dia", 0, 23, datetime.now().hour, key="hora_camada")
+            grade = carregar_grade()
+            camada = (f"{tipo_camada} {hora_camada}h", imagem_camada(grade, hora_camada, tipo_camada), grade.bounds)
+
+        # O HTML do mapa fica em cache (core.mapa) e só é refeito quando as rotas ou a camada mudam;
+        # como componente estático, interações com o mapa não disparam reruns da página.
+        html_mapa = html_mapa_rotas(
+            (st.session_state["latA"], st.session_state["lonA"], f"Origem: {st.session_state['municipioA']} - {st.session_state['ufA']}"),
+            (st.session_state["latB"], st.session_state["lonB"], f"Destino: {st.session_state['municipioB']} - {st.session_state['ufB']}"),
+            rotas_sessao,
+            camada
         )
-        
-        folium.PolyLine(
-            pontos_rota,
-            color=cores[i % len(cores)],
-            weight=5 if is_best_route else 3,
-            opacity=0.9 if is_best_route else 0.5
-        ).add_to(m)
-        
-    st_folium(m, width=700, height=500)
\ No newline at end of file
+        components.html(html_mapa, width=700, height=500)
+
+        # --- Acidentes Históricos no Corredor da Rota ---
+        if indice_disponivel() and st.checkbox("Mostrar acidentes históricos próximos à melhor rota", key="mostrar_corredor"):
+            raio_corredor = st.slider("Distância máxima da rota (m)", 100, 5000, 500, step=100, key="raio_corredor")
+            # Índice espacial construído uma única vez por processo; a consulta usa a geometria completa
+            corredor = carregar_indice().corredor(rotas_sessao[0]["coordenadas"], raio_corredor)
+            st.markdown(f"**{corredor['total']} acidentes** registrados a até {raio_corredor} m da melhor rota.")
+            if corredor["total"]:
+                col_tipo, col_hora = st.columns(2)
+                col_tipo.bar_chart(corredor["por_tipo"].head(10))
+                col_hora.bar_chart(corredor["por_hora"])
+
+        # --- Planejador do Horário de Partida ---
+        st.markdown("### 4. Melhor Horário de Partida")
+        col5, col6 = st.columns(2)
+        rotulos_rotas = [
+            f"{'MELHOR ROTA' if i == 0 else f'Rota {i+1}'} ({rota['resumo']})"
+            for i, rota in enumerate(rotas_sessao)
+        ]
+        indice_rota = rotulos_rotas.index(
+            col5.selectbox("Rota a planejar", options=rotulos_rotas, key="rota_planejamento")
+        )
+        horas_planejamento = col6.radio(
+            "Janela de partida", options=[24, 48], horizontal=True,
+            format_func=lambda h: f"Próximas {h} h", key="horas_planejamento"
+        )
+
+        if st.button("Planejar Partida"):
+            plano = planejar_partida(
+                rotas_sessao[indice_rota],
+                st.session_state["ufA"], st.session_state["municipioA"],
+                st.session_state["ufB"], st.session_state["municipioB"],
+                st.session_state["rotas_condicao"], peso_risco,
+                horas=horas_planejamento, inicio=st.session_state["rotas_momento"]
+            )
+            st.line_chart(plano.set_index("partida")["custo_ajustado"])
+            for j, partida in melhores_partidas(plano).iterrows():
+                st.markdown(
+                    f"**{j+1}º** Partida às **{partida['partida']:%d/%m %H:%M}** | "
+                    f"**Risco Previsto:** {partida['risco_medio']:.4f} | "
+                    f"**Custo Ajustado:** {partida['custo_ajustado']:.2f}"
+                )
@@ -2,7 +2,8 @@
 import pandas as pd
 import numpy as np
 import json
-from pymongo import MongoClient
+from core.metricas import METRICAS
+from core.mongo_local import conectar_mongo
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -34,13 +35,14 @@ def preparar_dados():
     
     try:
         # Conexão com o MongoDB
-        client = MongoClient(MONGO_URI)
+        client = conectar_mongo(MONGO_URI)
         db = client[DB_NAME]
         collection = db[COLLECTION_NAME]
         
         # Busca todos os documentos da coleção e converte para DataFrame
-        cursor = collection.find({})
-        data = list(cursor)
+        with METRICAS.span("mongo.carregar"):
+            cursor = collection.find({})
+            data = list(cursor)
         
         # Fecha a conexão
         client.close()
@@ -132,7 +134,8 @@ def treinar_e_salvar_modelo(df_ml):
         ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced', max_iter=1000)) 
     ])
     
-    modelo_risco.fit(X_train, y_train)
+    with METRICAS.span("treino.ajustar"):
+        modelo_risco.fit(X_train, y_train)
     print("Treinamento concluído.")
     
     # 4. Avaliação e Salvamento
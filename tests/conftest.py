@@ -0,0 +1,21 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import CacheDisco
+from core.stub_server import iniciar_servidor_stub
+import core.rotas as rotas
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    """Aponta core.rotas para o servidor stub e para caches em diretório temporário."""
+    servidor, url_base = iniciar_servidor_stub()
+    monkeypatch.setattr(rotas, "NOMINATIM_URL", f"{url_base}/search")
+    monkeypatch.setattr(rotas, "ROUTING_URL", f"{url_base}/route/v1/driving/")
+    monkeypatch.setattr(rotas, "CACHE_GEOCODIFICACAO", CacheDisco("geo", ttl=60, caminho=tmp_path / "c.sqlite"))
+    monkeypatch.setattr(rotas, "CACHE_ROTAS", CacheDisco("osrm", ttl=60, caminho=tmp_path / "c.sqlite"))
+    yield servidor
+    servidor.shutdown()
@@ -0,0 +1,93 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from core.amostra import amostra_estratificada, estimar_previa, variantes_amostra
+from core.cubo import CuboContagens
+
+
+def test_amostra_proporcional_por_uf_e_ano():
+    rng = np.random.default_rng(1)
+    n = 20000
+    df = pd.DataFrame({
+        "uf": rng.choice(["sp", "mg", "rj"], n, p=[0.6, 0.3, 0.1]),
+        "data_inversa": pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D"),
+    })
+    df = pd.concat([df, pd.DataFrame({"uf": ["ac"] * 5, "data_inversa": pd.to_datetime(["2020-02-02"] * 5)})], ignore_index=True)
+    amostra = amostra_estratificada(df, fracao=0.05, minimo=20, semente=3)
+
+    chave = [df["uf"], df["data_inversa"].dt.year]
+    chave_amostra = [amostra["uf"], amostra["data_inversa"].dt.year]
+    proporcao = amostra.groupby(chave_amostra).size() / df.groupby(chave).size()
+    assert proporcao.drop(("ac", 2020)).between(0.05, 0.06).all()
+    assert proporcao[("ac", 2020)] == 1.0  # estrato com cota menor que o mínimo entra inteiro
+    assert amostra.index.is_monotonic_increasing and not amostra.index.has_duplicates
+    assert amostra.equals(amostra_estratificada(df, fracao=0.05, minimo=20, semente=3))
+
+
+def _previa(codigo, df, **kwargs):
+    variantes = variantes_amostra(*amostra_estratificada(df, com_pesos=True, **kwargs))
+
+    def executar(nome):
+        quadro, pesos = variantes[nome]
+        variaveis = {"df": quadro, "cubo": CuboContagens(quadro, pesos), "pd": pd}
+        exec(codigo, variaveis)
+        return variaveis["final_result"]
+
+    return estimar_previa(executar, variantes["amostra"][1])
+
+
+def test_previa_expande_contagens_e_somas():
+    rng = np.random.default_rng(2)
+    n = 200_000
+    df = pd.DataFrame({
+        "uf": rng.choice(["sp", "mg", "rj", "ac"], n, p=[0.6, 0.3, 0.0995, 0.0005]),
+        "data_inversa": pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D"),
+        "tipo_acidente": rng.choice(["colisao traseira", "capotamento"], n, p=[0.8, 0.2]),
+        "mortos": rng.poisson(0.1, n),
+    })
+    exato = int((df["tipo_acidente"] == "capotamento").sum())
+    previa = _previa("final_result = int((df['tipo_acidente'] == 'capotamento').sum())", df)
+    assert isinstance(previa, int) and abs(previa - exato) <= 0.05 * exato
+    assert _previa("final_result = int(df['mortos'].sum())", df) == pytest.approx(df["mortos"].sum(), rel=0.05)
+    por_uf = _previa("final_result = df['uf'].value_counts()", df)
+    assert (por_uf / df["uf"].value_counts()).between(0.95, 1.05).all()
+    assert por_uf["ac"] == (df["uf"] == "ac").sum()  # estratos inteiros têm peso 1
+    assert _previa("final_result = int(cubo.contagem([], uf='sp'))", df) == pytest.approx((df["uf"] == "sp").sum(), rel=0.05)
+
+
+def test_previa_mantem_razoes():
+    df = pd.DataFrame({"uf": ["sp"] * 3000 + ["mg"] * 1000})
+    assert _previa("final_result = df['uf'].value_counts().idxmax()", df) == "sp"
+    assert _previa("final_result = float((df['uf'] == 'sp').mean())", df) == pytest.approx(0.75, abs=0.02)
+
+
+def test_previa_expande_os_numeros_de_textos_formatados():
+    rng = np.random.default_rng(5)
+    n = 100_000
+    df = pd.DataFrame({
+        "uf": rng.choice(["sp", "mg", "ac"], n, p=[0.7, 0.2998, 0.0002]),
+        "hora": rng.integers(0, 24, n),
+    })
+    # Como pede o prompt: final_result é um texto em português com a contagem e a proporção
+    codigo = (
+        "sp = df[df['uf'] == 'sp']\n"
+        "final_result = f\"Em 2023 foram {len(sp):,} acidentes em São Paulo ({len(sp) / len(df):.1%} do total).\""
+        ".replace(',', '.')\n"
+    )
+    previa = _previa(codigo, df)
+    exato = int((df["uf"] == "sp").sum())
+    numeros = re.fullmatch(r"Em 2023 foram ([\d.]+) acidentes em São Paulo \((\d+)\.(\d)% do total\)\.", previa)
+    assert numeros is not None, previa
+    assert abs(int(numeros[1].replace(".", "")) - exato) <= 0.05 * exato
+    assert abs(float(f"{numeros[2]}.{numeros[3]}") - 70) <= 1  # a proporção não é expandida
+    # O estrato inteiro (ac) entra com peso 1
+    assert _previa("final_result = f\"Acre: {int((df['uf'] == 'ac').sum())} acidentes\"", df) == f"Acre: {(df['uf'] == 'ac').sum()} acidentes"
+    # Textos que mudam entre as variantes da amostra ficam sem prévia
+    assert _previa("final_result = f\"{len(df)} acidentes\" + '!' * (len(df) // 1000)", df) is None
+
+
+def test_previa_interrompida_fica_sem_estimativa():
+    pesos = np.array([1.0, 20.0, 20.0])
+    assert estimar_previa(lambda nome: "3 acidentes" if nome == "amostra" else None, pesos) is None
+    assert estimar_previa(lambda nome: 3 if nome == "amostra" else None, pesos) is None
@@ -0,0 +1,157 @@
+import functools
+import re
+import threading
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+import core.chatbot as chatbot
+
+CODIGO = "final_result = f\"{len(df)} acidentes\""
+
+
+class ClienteFalso:
+    """Imita client.models.generate_content_stream contando as chamadas."""
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.chamadas = 0
+        self.models = self
+
+    def generate_content_stream(self, **kwargs):
+        self.chamadas += 1
+        return (SimpleNamespace(text=self.texto[i:i + 7]) for i in range(0, len(self.texto), 7))
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    cliente = ClienteFalso(f"Aqui está:\n```python\n{CODIGO}\n```")
+    monkeypatch.setattr(chatbot, "client", cliente)
+    chatbot.invalidar_cache_chatbot()
+    yield cliente
+    chatbot.invalidar_cache_chatbot()
+
+
+def _df(n):
+    return pd.DataFrame({"uf": ["sp"] * n, "hora": list(range(n))})
+
+
+def test_pergunta_repetida_nao_chama_o_gemini(cliente):
+    df = _df(3)
+    assert chatbot.generate_and_execute_code_gemini(df, "Quantos acidentes?") == "3 acidentes"
+    assert chatbot.generate_and_execute_code_gemini(df, "  quantos   ACIDENTES ") == "3 acidentes"
+    assert cliente.chamadas == 1
+    assert chatbot.CACHE_RESULTADOS.estatisticas()["hits"] == 1
+
+
+def test_novo_snapshot_invalida_o_cache(cliente):
+    assert chatbot.generate_and_execute_code_gemini(_df(3), "Quantos acidentes?") == "3 acidentes"
+    novo = _df(5)
+    assert chatbot.versao_dados(novo) != chatbot.versao_dados(_df(3))
+    assert chatbot.generate_and_execute_code_gemini(novo, "Quantos acidentes?") == "5 acidentes"
+    assert cliente.chamadas == 2
+
+
+def test_versao_cobre_todas_as_linhas_e_nao_passa_para_derivados():
+    df = pd.DataFrame({"uf": ["sp"] * 50_000, "hora": [1] * 50_000})
+    alterado = df.copy()
+    alterado.loc[12_345, "hora"] = 2
+    assert chatbot.versao_dados(alterado) != chatbot.versao_dados(df)
+    assert chatbot.versao_dados(df[df["hora"] == 1].head(10)) != chatbot.versao_dados(df)
+
+
+def test_codigo_com_erro_nao_fica_em_cache(cliente):
+    cliente.texto = "```python\nfinal_result = df['inexistente'].sum()\n```"
+    resposta = chatbot.generate_and_execute_code_gemini(_df(3), "Soma?")
+    assert resposta.startswith("Erro")
+    cliente.texto = f"```python\n{CODIGO}\n```"
+    assert chatbot.generate_and_execute_code_gemini(_df(3), "Soma?") == "3 acidentes"
+    assert cliente.chamadas == 2
+
+
+def test_codigo_gerado_acessa_o_cubo(cliente):
+    cliente.texto = "```python\nfinal_result = f\"{cubo.contagem('uf').idxmax()}: {cubo.total}\"\n```"
+    df = pd.DataFrame({"uf": ["sp", "mg", "sp"], "hora": [1, 2, 3]})
+    assert chatbot.generate_and_execute_code_gemini(df, "Qual UF tem mais acidentes?") == "sp: 3"
+
+
+@pytest.mark.skipif(not chatbot.sql_disponivel(), reason="requer duckdb")
+def test_modo_sql(cliente, monkeypatch, tmp_path):
+    monkeypatch.setattr(chatbot, "ConsultaSQL", functools.partial(chatbot.ConsultaSQL, diretorio=tmp_path))
+    cliente.texto = (
+        "```python\nr = sql(\"SELECT uf, COUNT(*) AS n FROM acidentes GROUP BY uf ORDER BY n DESC LIMIT 1\")\n"
+        "final_result = f\"{r['uf'].iloc[0]}: {r['n'].iloc[0]}\"\n```"
+    )
+    df = pd.DataFrame({"uf": ["sp", "mg", "sp"], "hora": [1, 2, 3]})
+    assert chatbot.generate_and_execute_code_gemini(df, "Qual UF tem mais acidentes?", modo="sql") == "sp: 2"
+    # O código do modo SQL não é reaproveitado para a mesma pergunta no modo pandas
+    cliente.texto = f"```python\n{CODIGO}\n```"
+    assert chatbot.generate_and_execute_code_gemini(df, "Qual UF tem mais acidentes?", modo="pandas") == "3 acidentes"
+    assert cliente.chamadas == 2
+
+
+def test_previa_na_amostra_e_resposta_exata_em_segundo_plano(cliente, monkeypatch):
+    # A resposta exata só começa depois da prévia (a prévia para quando ela fica pronta)
+    liberar = threading.Event()
+    responder = chatbot._responder
+    monkeypatch.setattr(chatbot, "_responder", lambda *args: liberar.wait(10) and responder(*args))
+    cliente.texto = "```python\nfinal_result = f\"Foram {len(df)} acidentes.\"\n```"
+    df = pd.DataFrame({
+        "uf": ["sp"] * 900 + ["ac"] * 10,
+        "data_inversa": pd.to_datetime(["2020-01-01"] * 450 + ["2021-01-01"] * 450 + ["2020-06-01"] * 10),
+    })
+    previa, futuro = chatbot.responder_com_previa(df, "Quantas linhas?")
+    # A contagem dentro do texto é expandida pelos pesos
+    assert abs(int(re.fullmatch(r"Foram (\d+) acidentes\.", previa)[1]) - len(df)) <= 0.05 * len(df)
+    liberar.set()
+    assert futuro.result(timeout=10) == f"Foram {len(df)} acidentes."
+    # Com a resposta exata em cache, não há prévia
+    previa, futuro = chatbot.responder_com_previa(df, "Quantas linhas?")
+    assert previa is None and futuro.result() == f"Foram {len(df)} acidentes."
+    assert cliente.chamadas == 1
+
+
+def test_stream_para_no_fim_do_bloco_de_codigo():
+    lidas = []
+
+    def partes():
+        for parte in ["Aqui:\n```pyt", "hon\nfinal_result = 1\n``", "`\n\nExplicação", " longa..."]:
+            lidas.append(parte)
+            yield parte
+
+    progresso = []
+    codigo, texto = chatbot.extrair_codigo_stream(partes(), progresso.append)
+    assert codigo == "final_result = 1"
+    # A última parte (" longa...") nunca é lida
+    assert len(lidas) == 3 and "longa" not in texto
+    assert progresso[-1] == texto
+
+
+def test_backend_stub_com_gravacoes(tmp_path, monkeypatch):
+    from core.llm import BackendHTTP, gravar_resposta
+    from core.stub_server import iniciar_servidor_stub
+
+    arquivo = tmp_path / "gravacoes.jsonl"
+    prompt, _ = chatbot._montar_prompt("Quantos acidentes?")
+    gravar_resposta(prompt, f"```python\n{CODIGO}\n```\n" + "explicação " * 50, pergunta="Quantos acidentes?", arquivo=arquivo)
+    servidor, url_base = iniciar_servidor_stub(latencia_token=0.01, gravacoes=arquivo)
+    try:
+        monkeypatch.setattr(chatbot, "BACKEND_LLM", BackendHTTP(f"{url_base}/llm/generate"))
+        chatbot.invalidar_cache_chatbot()
+        assert chatbot.generate_and_execute_code_gemini(_df(4), "Quantos acidentes?") == "4 acidentes"
+        # Pergunta sem gravação recebe a resposta padrão do stub
+        assert "acidentes" in chatbot.generate_and_execute_code_gemini(_df(4), "Outra pergunta")
+        assert servidor.contagem["llm"] == 2
+    finally:
+        servidor.shutdown()
+        chatbot.invalidar_cache_chatbot()
+
+
+def test_prompt_inclui_resumo_dos_dados(cliente):
+    df = pd.DataFrame({"uf": ["mg", "sp", "mg"], "hora": [1, 2, 3]})
+    chatbot.generate_and_execute_code_gemini(df, "Quantos acidentes?")
+    chatbot.generate_and_execute_code_gemini(df, "Qual hora?")
+    relatorio = chatbot.estatisticas_prompt()["ultimo"]
+    assert relatorio["pergunta"] == "Qual hora?" and relatorio["colunas"] == 2
+    assert relatorio["tokens"] <= relatorio["orcamento"]
+    # O resumo é calculado uma vez por versão dos dados
+    assert chatbot.CACHE_RESUMOS.get(chatbot.versao_dados(df)) is chatbot.obter_resumo(df)
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+import os
+from core.consulta_sql import ConsultaSQL, gravar_snapshot, sql_disponivel
+
+pytestmark = pytest.mark.skipif(not sql_disponivel(), reason="requer duckdb")
+
+
+def test_consulta_sobre_snapshot(tmp_path):
+    df = pd.DataFrame({
+        "uf": ["sp", "mg", "sp", "sp"],
+        "hora": [18, 7, 18, 9],
+        "km": ["10", 12.5, None, "x"],  # coluna object com tipos misturados, como vem do Mongo
+    })
+    sql = ConsultaSQL(df, "v1", diretorio=tmp_path)
+    resultado = sql("SELECT uf, COUNT(*) AS total FROM acidentes GROUP BY uf ORDER BY total DESC")
+    assert resultado.to_dict("list") == {"uf": ["sp", "mg"], "total": [3, 1]}
+    assert sql("SELECT COUNT(*) AS n FROM acidentes WHERE hora = ?", [18])["n"].iloc[0] == 2
+    assert (tmp_path / "acidentes_v1.parquet").exists()
+
+
+def test_snapshots_antigos_sao_apagados(tmp_path):
+    df = pd.DataFrame({"uf": ["sp"], "hora": [1]})
+    for i, versao in enumerate(["v1", "v1-amostra", "v2", "v2-amostra", "v3", "v3-amostra"]):
+        caminho = gravar_snapshot(df, versao, tmp_path)
+        os.utime(caminho, (i, i))  # ordem de gravação explícita
+    assert sorted(c.stem for c in tmp_path.glob("*.parquet")) == ["acidentes_v2", "acidentes_v2-amostra", "acidentes_v3", "acidentes_v3-amostra"]
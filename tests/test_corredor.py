@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.corredor import IndiceAcidentes, METROS_POR_GRAU
+
+
+def _acidentes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "latitude": rng.uniform(-24.0, -23.0, n),
+        "longitude": rng.uniform(-47.0, -46.0, n),
+        "hora": rng.integers(0, 24, n),
+        "tipo_acidente": rng.choice(["Colisao traseira", "Capotamento", "Tombamento"], n),
+    })
+
+
+def test_corredor_contem_todos_os_acidentes_dentro_do_raio():
+    acidentes = _acidentes(200_000)
+    indice = IndiceAcidentes(acidentes)
+    # Rota em linha reta ao longo da latitude -23.5 (trecho leste-oeste de ~80 km)
+    rota = np.column_stack([np.full(50, -23.5), np.linspace(-46.9, -46.1, 50)])
+    raio = 300.0
+
+    inicio = time.perf_counter()
+    resultado = indice.corredor(rota, raio)
+    duracao = time.perf_counter() - inicio
+
+    lon_dentro = acidentes["longitude"].between(-46.9, -46.1)
+    distancia = (acidentes["latitude"] + 23.5).abs() * METROS_POR_GRAU
+    esperados = set(acidentes.index[lon_dentro & (distancia <= raio)])
+    encontrados = set(resultado["acidentes"].index)
+    assert esperados <= encontrados
+    assert (distancia[list(encontrados)] <= raio).all()
+    assert resultado["total"] == len(encontrados)
+    assert resultado["por_hora"].sum() == resultado["total"]
+    assert resultado["por_tipo"].sum() == resultado["total"]
+    assert duracao < 0.5
+
+
+def test_corredor_vazio_longe_dos_acidentes():
+    indice = IndiceAcidentes(_acidentes(1000))
+    resultado = indice.corredor(np.array([[-10.0, -40.0], [-10.1, -40.1]]), 500)
+    assert resultado["total"] == 0
+    assert resultado["por_hora"].sum() == 0
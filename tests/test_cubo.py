@@ -0,0 +1,48 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+import pandas as pd
+import pytest
+from core.cubo import CuboContagens
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "data_inversa": pd.to_datetime(["2020-01-05", "2020-03-01", "2021-07-10", "2021-07-11", "2021-08-01", "2022-02-02"]),
+        "dia_semana": ["domingo", "domingo", "sabado", "domingo", "domingo", "quarta-feira"],
+        "uf": ["mg", "mg", "sp", "mg", "sp", "mg"],
+        "municipio": ["belo horizonte", "contagem", "santos", "belo horizonte", "campinas", "contagem"],
+        "tipo_acidente": ["colisao traseira", "capotamento", "colisao traseira", "colisao traseira", "capotamento", "colisao traseira"],
+        "condicao_metereologica": ["chuva", "sol", "sol", "chuva", "sol", "sol"],
+        "hora": [18, 7, 18, 19, 18, 7],
+    })
+
+
+def test_contagens_batem_com_o_df(df):
+    cubo = CuboContagens(df)
+    assert cubo.total == len(df)
+    assert cubo.contagem("uf").to_dict() == df["uf"].value_counts().to_dict()
+    assert cubo.contagem("tipo_acidente", uf="mg").to_dict() == {"colisao traseira": 3, "capotamento": 1}
+    assert cubo.contagem("ano", uf="mg", hora=[18, 19]).to_dict() == {2020: 1, 2021: 1}
+    assert cubo.contagem([], uf="sp", condicao_metereologica="sol") == 2
+    por_dia_hora = cubo.contagem(["dia_semana", "hora"], uf="mg")
+    assert por_dia_hora.iloc[0] == 1 and por_dia_hora.sum() == 4
+
+
+def test_subcubo_usa_a_menor_tabela(df):
+    cubo = CuboContagens(df)
+    assert set(cubo.subcubo(["uf"]).columns) == {"uf", "acidentes"}
+    tres = cubo.subcubo(["uf", "hora", "tipo_acidente"])
+    assert tres["acidentes"].sum() == len(df) and len(tres) <= len(cubo)
+    with pytest.raises(KeyError):
+        cubo.subcubo(["latitude"])
+
+
+def test_subcubos_sob_demanda_concorrentes(df):
+    cubo = CuboContagens(df)
+    trios = list(combinations(cubo.dimensoes, 3))
+    with ThreadPoolExecutor(8) as executor:
+        totais = list(executor.map(lambda dims: int(cubo.subcubo(dims)["acidentes"].sum()), trios * 4))
+    assert totais == [len(df)] * len(trios) * 4
+    assert pickle.loads(pickle.dumps(cubo)).contagem("uf").to_dict() == cubo.contagem("uf").to_dict()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+import preditor_rotas
+from core.acidentes import carregar_acidentes
+from core.datatran_sintetico import DIAS_SEMANA, carregar_dominios, carregar_mongo, escrever_arquivo, gerar_lotes, gerar_registros
+from core.mongo_local import conectar_mongo
+
+
+def test_registros_no_formato_da_colecao():
+    df = pd.concat(gerar_lotes(5000, semente=1))
+    dominios = carregar_dominios()
+    assert set(df["condicao_metereologica"]) <= set(dominios["condicoes"])
+    assert set(zip(df["uf"], df["municipio"])) <= set(zip(dominios["ufs"], dominios["municipios"]))
+    assert df["latitude"].str.contains(",").all() and not df["latitude"].str.contains(r"\.").any()
+    datas = pd.to_datetime(df["data_inversa"], format="%d/%m/%Y")
+    assert (np.array(DIAS_SEMANA)[datas.dt.weekday] == df["dia_semana"]).all()
+    horas = pd.to_datetime(df["horario"], format="%H:%M:%S").dt.hour
+    assert horas.between(17, 18).mean() > horas.between(2, 3).mean() * 2  # pico no fim da tarde
+    assert df["condicao_metereologica"].value_counts().index[0] == "Ceu Claro"
+
+
+def test_semente_fixa_os_registros():
+    assert list(gerar_registros(50, semente=3)) == list(gerar_registros(50, semente=3))
+    assert list(gerar_registros(50, semente=3)) != list(gerar_registros(50, semente=4))
+    assert [r["id"] for r in gerar_registros(25, tamanho_lote=10)] == list(range(25))
+
+
+@pytest.mark.parametrize("extensao", ["jsonl", "json", "csv", "parquet"])
+def test_arquivos(tmp_path, extensao):
+    caminho = tmp_path / f"datatran.{extensao}"
+    escrever_arquivo(caminho, 250, tamanho_lote=100)
+    leitura = {
+        "jsonl": lambda: pd.read_json(caminho, lines=True),
+        "json": lambda: pd.read_json(caminho),
+        "csv": lambda: pd.read_csv(caminho, sep=";"),
+        "parquet": lambda: pd.read_parquet(caminho),
+    }[extensao]()
+    assert len(leitura) == 250 and list(leitura["id"]) == list(range(250))
+    if extensao == "json":
+        assert len(carregar_acidentes(caminho)) == 250
+
+
+def test_substituto_do_mongo_em_arquivo(tmp_path):
+    uri = f"arquivo://{tmp_path}"
+    carregar_mongo(uri, "datatran", "acidentes", 300, tamanho_lote=100)
+    colecao = conectar_mongo(uri)["datatran"]["acidentes"]
+    assert colecao.count_documents({}) == 300
+    mg = list(colecao.find({"uf": "MG"}, {"uf": 1, "_id": 0}))
+    assert mg and all(d == {"uf": "MG"} for d in mg)
+    with pytest.raises(ValueError, match="igualdade"):
+        list(colecao.find({"id": {"$gt": 10}}))
+    carregar_mongo(uri, "datatran", "acidentes", 10)  # substitui a coleção
+    assert colecao.count_documents({}) == 10
+
+
+def test_preparar_dados_com_mongo_local(monkeypatch):
+    carregar_mongo("memoria://", "teste", "acidentes", 2000)
+    monkeypatch.setenv("MONGO_URI", "memoria://")
+    monkeypatch.setenv("DB_NAME", "teste")
+    monkeypatch.setenv("COLLECTION_NAME", "acidentes")
+    df_ml = preditor_rotas.preparar_dados()
+    assert len(df_ml) == 2000 and 0 < df_ml["alto_risco"].mean() < 1
@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core.rotas as rotas
+from core.frota import matriz_risco
+
+
+class ModeloContador:
+    chamadas = 0
+
+    def predict_proba(self, dados):
+        ModeloContador.chamadas += 1
+        return np.tile([0.8, 0.2], (len(dados), 1))
+
+
+def test_matriz_deduplica_e_agrupa_chamadas(stub, monkeypatch):
+    monkeypatch.setattr(rotas, "MODELO_RISCO", ModeloContador())
+    ModeloContador.chamadas = 0
+    origens = ["Campinas, SP", "Recife, PE", "Hogwarts"]
+    destinos = ["Recife, PE", "Olinda, PE", "Cidade Ficticia, MG", "Campinas, SP"]
+
+    linhas = list(matriz_risco(origens, destinos, "Sol", max_concorrencia=4))
+
+    assert len(linhas) == len(origens) * len(destinos)
+    assert stub.contagem["nominatim"] == 5
+    assert stub.contagem["osrm"] == 8
+    assert ModeloContador.chamadas == 1
+    erros = [l for l in linhas if l.get("erro")]
+    assert {l["origem"] for l in erros} == {"Hogwarts"}
+    ok = [l for l in linhas if not l.get("erro")]
+    assert all(l["risco_medio"] == np.float64(0.2) for l in ok)
+    assert all(l["custo_ajustado"] == l["tempo_min"] + 0.2 * 50 for l in ok)
+
+
+def test_consumidor_que_para_cedo_cancela_as_rotas_pendentes(stub, monkeypatch):
+    monkeypatch.setattr(rotas, "MODELO_RISCO", ModeloContador())
+    stub.latencia = 0.05
+    origens = ["Campinas, SP", "Recife, PE"]
+    destinos = [f"Cidade {k}, MG" for k in range(30)]
+
+    linhas = matriz_risco(origens, destinos, "Sol", max_concorrencia=2)
+    next(linhas)
+    inicio = time.perf_counter()
+    linhas.close()
+    assert time.perf_counter() - inicio < 0.5  # não espera as requisições em andamento
+    time.sleep(0.3)
+    assert stub.contagem["osrm"] < len(origens) * len(destinos) // 2
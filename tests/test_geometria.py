@@ -0,0 +1,38 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.geometria import para_array, douglas_peucker, simplificar_para_zoom
+
+
+def test_para_array_inverte_para_lat_lon():
+    pontos = para_array([[-46.6, -23.5], [-43.1, -22.9]])
+    assert pontos.dtype == np.float32
+    assert pontos[0].tolist() == [np.float32(-23.5), np.float32(-46.6)]
+
+
+def test_linha_reta_mantem_apenas_extremos():
+    pontos = np.column_stack([np.linspace(-23, -22, 1000), np.linspace(-46, -45, 1000)]).astype(np.float32)
+    simplificada = douglas_peucker(pontos, 1e-4)
+    assert simplificada.tolist() == pontos[[0, -1]].tolist()
+
+
+def test_mantem_vertices_relevantes():
+    # Trajeto em "L": o canto é mantido, pontos quase colineares são descartados
+    pontos = np.array([[0, 0], [1, 1e-4], [2, 0], [2, 1], [2, 2]], dtype=np.float32)
+    simplificada = douglas_peucker(pontos, 1e-3)
+    assert simplificada.tolist() == pontos[[0, 2, 4]].tolist()
+
+
+def test_rota_longa_reduz_uma_ordem_de_grandeza():
+    # Rota interestadual com ~20 mil pontos e pequenas oscilações (ruído de ~1 m)
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, 20000)
+    lat = -23.5 + 14 * t + 0.3 * np.sin(6 * np.pi * t) + rng.normal(0, 1e-5, t.size)
+    lon = -46.6 + 11 * t + rng.normal(0, 1e-5, t.size)
+    pontos = np.column_stack([lat, lon]).astype(np.float32)
+    simplificada = simplificar_para_zoom(pontos, 6)
+    assert len(simplificada) * 10 < len(pontos)
+    assert len(pontos) == 20000
@@ -0,0 +1,61 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.grade_risco import GradeRisco, construir_grade, imagem_camada
+from core.mapa import NIVEIS_ZOOM_ROTAS, html_mapa_rotas
+
+
+class ModeloPorHora:
+    """Risco proporcional à hora; conta as chamadas."""
+    chamadas = 0
+
+    def predict_proba(self, dados):
+        ModeloPorHora.chamadas += 1
+        risco = dados["hora_do_dia"].to_numpy() / 23.0
+        return np.column_stack([1 - risco, risco])
+
+
+def _acidentes():
+    return pd.DataFrame({
+        "latitude": [-23.55, -23.55, -23.54, -8.05],
+        "longitude": [-46.63, -46.63, -46.64, -34.88],
+        "hora": [18, 18, 7, 18],
+        "uf": ["SP", "SP", "SP", "PE"],
+        "municipio": ["SAO PAULO", "SAO PAULO", "SAO PAULO", "RECIFE"],
+    })
+
+
+def test_grade_rasteriza_densidade_e_risco():
+    ModeloPorHora.chamadas = 0
+    grade = construir_grade(_acidentes(), modelo=ModeloPorHora(), resolucao=0.5)
+    assert ModeloPorHora.chamadas == 1
+    assert grade.risco.dtype == np.float16
+    assert grade.valor(-23.55, -46.63, 18, "densidade") == 1.0
+    assert grade.valor(-8.05, -34.88, 18, "densidade") == 0.5
+    assert grade.valor(-23.55, -46.63, 23, "risco") == 1.0
+    assert grade.valor(-15.0, -50.0, 23, "risco") == 0.0
+    assert grade.camada(18, "densidade").shape == (80, 80)
+
+
+def test_salvar_carregar_e_imagem(tmp_path):
+    grade = construir_grade(_acidentes(), modelo=ModeloPorHora(), resolucao=0.5)
+    grade.salvar(tmp_path / "g.npz")
+    carregada = GradeRisco.carregar(tmp_path / "g.npz")
+    assert np.array_equal(carregada.densidade, grade.densidade)
+    imagem = imagem_camada(carregada, 18, "densidade")
+    assert imagem.shape == (80, 80, 4)
+    assert (imagem[..., 3] > 0).sum() == 2
+
+
+def test_mapa_com_camada():
+    grade = construir_grade(_acidentes(), modelo=ModeloPorHora(), resolucao=0.5)
+    pontos = np.array([[-23.5, -46.6], [-8.0, -34.9]], dtype=np.float32)
+    rotas = [{"resumo": "Rota 1", "coordenadas_mapa": (pontos,) * len(NIVEIS_ZOOM_ROTAS)}]
+    camada = ("densidade 18h", imagem_camada(grade, 18, "densidade"), grade.bounds)
+    html = html_mapa_rotas((-23.5, -46.6, "A"), (-8.0, -34.9, "B"), rotas, camada)
+    assert "L.imageOverlay" in html
+    assert html is not html_mapa_rotas((-23.5, -46.6, "A"), (-8.0, -34.9, "B"), rotas)
@@ -0,0 +1,81 @@
+import sys
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.grafo import GrafoRodoviario
+
+
+def _grade(n, acidentes=None, passo=0.001, tempos=None):
+    """Grade n x n com arestas nos dois sentidos (~110 m, 10 s cada, a não ser que `tempos` seja dado)."""
+    lat, lon = np.meshgrid(-23.0 + np.arange(n) * passo, -46.0 + np.arange(n) * passo, indexing="ij")
+    ids = np.arange(n * n).reshape(n, n)
+    pares = [(ids[:, :-1], ids[:, 1:]), (ids[:-1, :], ids[1:, :])]
+    u = np.concatenate([a.ravel() for a, b in pares] + [b.ravel() for a, b in pares])
+    v = np.concatenate([b.ravel() for a, b in pares] + [a.ravel() for a, b in pares])
+    return GrafoRodoviario.de_arestas(lat.ravel(), lon.ravel(), u, v, np.full(len(u), 110.0), np.full(len(u), 10.0) if tempos is None else tempos, acidentes)
+
+
+class ModeloFalso:
+    """Risco 1.0 para a localização perigosa, 0.0 para as demais."""
+    def predict_proba(self, dados):
+        risco = (dados["localizacao"] == "SP_PERIGO").to_numpy(dtype=float)
+        return np.column_stack([1 - risco, risco])
+
+
+def test_menor_caminho_igual_dijkstra_sem_risco():
+    grafo = _grade(20)
+    matriz = csr_matrix((grafo.tempos, grafo.destinos, grafo.indptr), shape=(grafo.n_nos, grafo.n_nos))
+    esperado = dijkstra(matriz, indices=0)[grafo.n_nos - 1]
+    caminho = grafo.menor_caminho(0, grafo.n_nos - 1, [[0.0]] * 24)
+    assert sum(grafo.tempos[caminho]) == esperado
+
+
+def test_rota_desvia_de_area_de_risco():
+    # Faixa central (linhas 3 a 6) perigosa, exceto pela coluna 9
+    n = 10
+    lat, lon = np.meshgrid(-23.0 + np.arange(n) * 0.001, -46.0 + np.arange(n) * 0.001, indexing="ij")
+    perigo = (lat > -23.0 + 2.5 * 0.001) & (lat < -23.0 + 6.5 * 0.001) & (lon < -46.0 + 8.5 * 0.001)
+    acidentes = pd.DataFrame({
+        "latitude": lat.ravel(), "longitude": lon.ravel(), "uf": "SP",
+        "municipio": np.where(perigo.ravel(), "PERIGO", "SEGURO"),
+    })
+    grafo = _grade(n, acidentes)
+    momento = datetime(2025, 1, 6, 8)
+    direta = grafo.rota(-23.0, -46.0, -22.991, -46.0, "Sol", peso_risco=0, momento=momento, modelo=ModeloFalso())
+    segura = grafo.rota(-23.0, -46.0, -22.991, -46.0, "Sol", peso_risco=600, momento=momento, modelo=ModeloFalso())
+    assert direta["risco_medio"] > 0
+    assert segura["risco_medio"] == 0
+    assert segura["tempo_min"] > direta["tempo_min"]
+
+
+def test_salvar_e_carregar(tmp_path):
+    grafo = _grade(5)
+    grafo.salvar(tmp_path / "g.npz")
+    carregado = GrafoRodoviario.carregar(tmp_path / "g.npz")
+    assert carregado.n_arestas == grafo.n_arestas
+    assert np.array_equal(carregado.indptr, grafo.indptr)
+    assert carregado.localizacoes == grafo.localizacoes
+
+
+def test_busca_limitada_igual_a_busca_sem_limite(monkeypatch):
+    # Tempos e riscos aleatórios: sem empates, o caminho de menor custo é único
+    rng = np.random.default_rng(4)
+    grafo = _grade(30, tempos=rng.uniform(5, 60, 4 * 30 * 29))
+    tabela = rng.random((24, 1))
+    limitado = grafo.menor_caminho(0, 30 * 15 + 20, tabela, hora_partida_s=7 * 3600, peso_risco=300)
+    custo_limitado = grafo._custos(limitado, grafo._tempos_de_chegada(0, 30 * 15 + 20)[0], tabela, 7 * 3600, 5.0).sum()
+
+    import core.grafo
+    monkeypatch.setattr(core.grafo, "dijkstra", lambda *args, limit=None, **kwargs: dijkstra(*args, **kwargs))
+    grafo._matriz_tempos = None
+    sem_limite = grafo.menor_caminho(0, 30 * 15 + 20, tabela, hora_partida_s=7 * 3600, peso_risco=300)
+    custo_sem_limite = grafo._custos(sem_limite, grafo._tempos_de_chegada(0, 30 * 15 + 20)[0], tabela, 7 * 3600, 5.0).sum()
+    assert limitado == sem_limite
+    assert custo_limitado == pytest.approx(custo_sem_limite)
@@ -0,0 +1,53 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import CacheLRU
+from core.geometria import simplificar_por_nivel
+import core.mapa as mapa
+
+
+def _rotas(deslocamento=0.0):
+    pontos = np.array([[-23.5, -46.6], [-22.9 + deslocamento, -43.2]], dtype=np.float32)
+    return [{"resumo": "Rota 1", "coordenadas_mapa": (pontos,) * len(mapa.NIVEIS_ZOOM_ROTAS)}]
+
+
+def test_mapa_reaproveitado_enquanto_rotas_nao_mudam(monkeypatch):
+    monkeypatch.setattr(mapa, "CACHE_MAPAS", CacheLRU(4))
+    origem, destino = (-23.5, -46.6, "Origem"), (-22.9, -43.2, "Destino")
+    primeiro = mapa.html_mapa_rotas(origem, destino, _rotas())
+    segundo = mapa.html_mapa_rotas(origem, destino, _rotas())
+    assert primeiro is segundo
+    assert "L.polyline" in primeiro
+    outro = mapa.html_mapa_rotas(origem, destino, _rotas(0.1))
+    assert outro is not primeiro
+    assert mapa.CACHE_MAPAS.estatisticas()["hits"] == 1
+
+
+def test_cache_lru_limita_entradas():
+    cache = CacheLRU(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2 and cache.estatisticas()["removidos"] == 1
+
+
+def test_chave_considera_conteudo_completo_dos_arrays():
+    grande = np.zeros((5000, 2), dtype=np.float32)
+    alterado = grande.copy()
+    alterado[2500, 0] = 1.0
+    assert mapa.chave_mapa(grande) != mapa.chave_mapa(alterado)
+
+
+def test_mapa_troca_o_nivel_de_detalhe_com_o_zoom():
+    t = np.linspace(0, 1, 5000)
+    pontos = np.column_stack([-23.5 + 0.5 * t + 0.01 * np.sin(400 * t), -46.6 + 0.5 * t]).astype(np.float32)
+    niveis = simplificar_por_nivel(pontos, mapa.NIVEIS_ZOOM_ROTAS)
+    assert len(niveis[0]) < len(niveis[1]) < len(niveis[2])
+    html = mapa.construir_mapa_rotas((-23.5, -46.6, "A"), (-23.0, -46.1, "B"), [{"resumo": "Rota 1", "coordenadas_mapa": niveis}]).get_root().render()
+    assert html.count("L.polyline") == len(mapa.NIVEIS_ZOOM_ROTAS)
+    assert 'on("zoomend", trocarNivel)' in html
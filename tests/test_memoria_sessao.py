@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+from core.cache import CacheDisco
+from core.memoria_sessao import MemoriaSessoes, id_sessao, tamanho_aproximado
+
+MB = 1024 * 1024
+
+
+def _memoria(tmp_path, sessao_mb=1, global_mb=2):
+    disco = CacheDisco("memoria_sessoes", ttl=60, caminho=tmp_path / "c.sqlite", serializacao="pickle")
+    return MemoriaSessoes(sessao_mb, global_mb, disco=disco)
+
+
+def _rota(kb):
+    return {"resumo": "BR-116", "coordenadas": np.zeros((kb * 1024 // 8, 2), dtype=np.float32)}
+
+
+def test_tamanho_aproximado():
+    assert tamanho_aproximado(np.zeros(1000, dtype=np.float64)) == 8000
+    rota = _rota(400)
+    assert 400 * 1024 <= tamanho_aproximado([rota, rota]) < 401 * 1024  # objeto repetido conta uma vez
+    lista = [(float(i), float(i)) for i in range(10000)]
+    assert abs(tamanho_aproximado(lista) - tamanho_aproximado(lista[:100]) * 100) < 0.05 * tamanho_aproximado(lista)
+
+
+def test_orcamento_por_sessao_despeja_para_o_disco(tmp_path):
+    memoria = _memoria(tmp_path)
+    for chave in ("a", "b", "c"):
+        memoria.guardar("s1", chave, _rota(400))
+    estatisticas = memoria.estatisticas()
+    assert estatisticas["bytes"] <= MB and estatisticas["entradas"] == 2 and estatisticas["despejadas"] == 1
+    # A entrada despejada volta do disco igual à original
+    rota = memoria.obter("s1", "a")
+    assert rota["resumo"] == "BR-116" and rota["coordenadas"].shape == _rota(400)["coordenadas"].shape
+    assert memoria.estatisticas()["recarregadas"] == 1 and memoria.estatisticas()["bytes"] <= MB
+    assert memoria.obter("s1", "inexistente", []) == []
+
+
+def test_orcamento_global_despeja_a_sessao_menos_recente(tmp_path):
+    memoria = _memoria(tmp_path, sessao_mb=1, global_mb=1)
+    memoria.guardar("s1", "rotas", _rota(400))
+    memoria.guardar("s2", "rotas", _rota(400))
+    memoria.obter("s1", "rotas")  # s1 passa a ser a mais recente
+    memoria.guardar("s3", "rotas", _rota(400))
+    estatisticas = memoria.estatisticas()
+    assert estatisticas["sessoes"] == 2 and estatisticas["despejadas"] == 1
+    assert ("s2", "rotas") not in memoria._entradas
+    memoria.encerrar_sessao("s1")
+    assert memoria.estatisticas()["sessoes"] == 1
+
+
+def test_valor_novo_substitui_a_copia_em_disco(tmp_path):
+    memoria = _memoria(tmp_path, sessao_mb=0.5)
+    memoria.guardar("s1", "rotas", _rota(400))
+    memoria.guardar("s1", "outra", _rota(400))  # despeja "rotas"
+    memoria.guardar("s1", "rotas", [])
+    memoria.remover("s1", "rotas")
+    assert memoria.obter("s1", "rotas") is None
+
+
+def test_valor_nao_serializavel_e_descartado(tmp_path):
+    memoria = _memoria(tmp_path, sessao_mb=0.001)
+    memoria.guardar("s1", "trava", [threading.Lock() for _ in range(50)])
+    assert memoria.estatisticas()["descartadas"] == 1 and memoria.obter("s1", "trava") is None
+
+
+def test_id_sessao_fica_no_estado():
+    estado = {}
+    assert id_sessao(estado) == id_sessao(estado) != id_sessao({})
+
+
+def test_despejo_grava_no_disco_fora_do_lock(tmp_path):
+    memoria = _memoria(tmp_path, sessao_mb=0.5)
+    gravar = memoria.disco.set
+    lidas = []
+
+    def set_verificando(chave, valor):
+        # Com o lock do armazém preso, obter() travaria aqui; a entrada segue visível durante a gravação
+        assert not memoria._lock.locked()
+        lidas.append(memoria.obter("s1", "rotas"))
+        gravar(chave, valor)
+
+    memoria.disco.set = set_verificando
+    rota = _rota(400)
+    memoria.guardar("s1", "rotas", rota)
+    memoria.guardar("s1", "outra", _rota(400))  # despeja "rotas"
+    assert lidas == [rota] and memoria.estatisticas()["despejadas"] == 1
+    assert memoria.obter("s1", "rotas")["resumo"] == "BR-116"
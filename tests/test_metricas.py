@@ -0,0 +1,79 @@
+import pytest
+import requests
+from core import http_client
+from core.metricas import Metricas, servir_prometheus
+
+
+def test_span_registra_duracao_e_erros():
+    metricas = Metricas(ativas=True)
+    for _ in range(3):
+        with metricas.span("mongo.carregar"):
+            pass
+    with pytest.raises(ValueError):
+        with metricas.span("mongo.carregar"):
+            raise ValueError("falhou")
+    metricas.registrar("pagina.rotas", 0.2)
+    linhas = {linha["operacao"]: linha for linha in metricas.resumo()}
+    assert linhas["mongo.carregar"]["chamadas"] == 4 and linhas["mongo.carregar"]["erros"] == 1
+    assert linhas["pagina.rotas"]["p50_ms"] == pytest.approx(200)
+
+
+def test_cronometro_nao_conta_interrupcoes_da_pagina_como_erro():
+    from streamlit.runtime.scriptrunner_utils.exceptions import StopException
+    metricas = Metricas(ativas=True)
+    with pytest.raises(StopException):
+        with metricas.cronometro("pagina.interface"):
+            raise StopException()
+    with pytest.raises(ValueError):
+        with metricas.cronometro("pagina.interface"):
+            raise ValueError("falhou")
+    linha, = metricas.resumo()
+    assert linha["chamadas"] == 2 and linha["erros"] == 1
+
+
+def test_desligada_nao_registra():
+    metricas = Metricas(ativas=False)
+    with metricas.span("modelo.predict"):
+        pass
+    metricas.contar("cache.rotas.acerto")
+    assert metricas.resumo() == [] and metricas.contadores() == {}
+
+
+def test_exportacao_prometheus(tmp_path):
+    metricas = Metricas(ativas=True)
+    metricas.registrar("http.osrm", 0.003)
+    metricas.registrar("http.osrm", 0.3)
+    metricas.contar("cache.rotas.acerto", 2)
+    metricas.medidor("memoria_sessoes", lambda: {"bytes": 1024, "ultimo": {"ignorado": 1}})
+    metricas.medidor("quebrado", lambda: 1 / 0)
+    texto = metricas.exportar_prometheus()
+    assert 'app_operacao_segundos_bucket{operacao="http.osrm",le="0.005"} 1' in texto
+    assert 'app_operacao_segundos_bucket{operacao="http.osrm",le="+Inf"} 2' in texto
+    assert 'app_operacao_segundos_count{operacao="http.osrm"} 2' in texto
+    assert 'app_eventos_total{evento="cache.rotas.acerto"} 2' in texto
+    assert 'app_medidor{medidor="memoria_sessoes",campo="bytes"} 1024' in texto
+    assert "quebrado" not in texto and "ignorado" not in texto
+
+    metricas.gravar_prometheus(tmp_path / "app.prom")
+    assert (tmp_path / "app.prom").read_text(encoding="utf-8") == texto
+
+
+def test_endpoint_metrics():
+    metricas = Metricas(ativas=True)
+    metricas.contar("auth.login")
+    servidor = servir_prometheus(metricas, 0)
+    try:
+        assert servidor.server_address[0] == "127.0.0.1"  # sem autenticação: só local por padrão
+        url = f"http://127.0.0.1:{servidor.server_address[1]}"
+        assert 'app_eventos_total{evento="auth.login"} 1' in requests.get(f"{url}/metrics", timeout=5).text
+        assert requests.get(f"{url}/outra", timeout=5).status_code == 404
+    finally:
+        servidor.shutdown()
+
+
+def test_http_get_instrumentado(stub, monkeypatch):
+    metricas = Metricas(ativas=True)
+    monkeypatch.setattr(http_client, "METRICAS", metricas)
+    from core import rotas
+    http_client.http_get("osrm", f"{rotas.ROUTING_URL}-47.06,-22.9;-43.2,-22.9", params={"alternatives": "true"})
+    assert [linha["operacao"] for linha in metricas.resumo()] == ["http.osrm"]
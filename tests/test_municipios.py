@@ -0,0 +1,38 @@
+import json
+import pytest
+from core.municipios import IndiceMunicipios, carregar_municipios
+
+
+@pytest.fixture
+def indice():
+    return IndiceMunicipios({
+        "SP": ["SAO PAULO", "SANTOS", "CAMPINAS", "SAO CARLOS"],
+        "MG": ["SANTOS DUMONT", "BELO HORIZONTE"],
+        "PA": ["SANTAREM", "SAO FELIX DO XINGU"],
+    })
+
+
+def test_municipios_por_uf(indice):
+    assert indice.ufs == ["MG", "PA", "SP"]
+    assert indice.municipios("SP") == ["CAMPINAS", "SANTOS", "SAO CARLOS", "SAO PAULO"]
+    assert indice.municipios("XX") == []
+    assert indice.valido("MG", "SANTOS DUMONT")
+    assert not indice.valido("SP", "SANTOS DUMONT")
+
+
+def test_busca_por_prefixo_sem_acentos(indice):
+    assert indice.buscar("São") == [("SP", "SAO CARLOS"), ("PA", "SAO FELIX DO XINGU"), ("SP", "SAO PAULO")]
+    assert indice.buscar("sant", uf="MG") == [("MG", "SANTOS DUMONT")]
+    assert indice.buscar("san", limite=2) == [("PA", "SANTAREM"), ("SP", "SANTOS")]
+    assert indice.buscar("xyz") == []
+    assert indice.opcoes("SP", "") == indice.municipios("SP")
+    assert indice.opcoes("SP", "  sao ") == ["SAO CARLOS", "SAO PAULO"]
+
+
+def test_indice_cobre_o_mapa_do_projeto():
+    with open("uf_municipio_map.json", encoding="utf-8") as f:
+        mapa = json.load(f)
+    indice = carregar_municipios()
+    assert indice.ufs == sorted(mapa)
+    assert all(indice.valido(uf, m) for uf, municipios in mapa.items() for m in municipios)
+    assert set(indice.opcoes("SP", "campi")) <= set(mapa["SP"])
@@ -0,0 +1,35 @@
+import pandas as pd
+from core.prompt import estimar_tokens, montar_prompt, resumo_esquema
+
+
+def _df():
+    return pd.DataFrame({
+        "id": range(100),
+        "uf": ["mg"] * 60 + ["sp"] * 30 + ["rj"] * 10,
+        "municipio": [f"cidade {i % 40}" for i in range(100)],
+        "hora": [i % 24 for i in range(100)],
+        "data_inversa": pd.to_datetime("2020-01-01") + pd.to_timedelta(range(100), unit="D"),
+    })
+
+
+def test_resumo_do_esquema():
+    resumo = resumo_esquema(_df(), prioridade=["uf", "hora"], top=2)
+    assert resumo["linhas"] == 100
+    colunas = {c["nome"]: c for c in resumo["colunas"]}
+    assert [c["nome"] for c in resumo["colunas"]][:2] == ["uf", "hora"]
+    assert colunas["uf"]["valores"] == ["mg", "sp"] and colunas["uf"]["distintos"] == 3
+    assert colunas["hora"]["faixa"] == (0, 23)
+    assert colunas["data_inversa"]["faixa"] == ("2020-01-01", "2020-04-09")
+    assert "valores" not in colunas["id"]  # identificador: um valor por linha
+
+
+def test_orcamento_de_tokens_corta_o_resumo():
+    resumo = resumo_esquema(_df(), prioridade=["uf"])
+    prompt, relatorio = montar_prompt("Gere código.", "Quantos acidentes em MG?", resumo)
+    assert "'cidade 0'" in prompt and relatorio["top_valores"] == 12
+    assert relatorio["tokens"] == estimar_tokens(prompt)
+
+    prompt, relatorio = montar_prompt("Gere código.", "Quantos acidentes em MG?", resumo, orcamento=60)
+    assert relatorio["tokens"] <= 60
+    assert relatorio["colunas"] < len(resumo["colunas"]) and "- uf" in prompt
+    assert prompt.endswith('Pergunta: "Quantos acidentes em MG?"')
@@ -0,0 +1,95 @@
+import pytest
+import sys
+import os
+import time
+from datetime import datetime
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import CacheDisco, normalizar_texto
+import core.rotas as rotas
+
+
+def test_normalizar_texto():
+    assert normalizar_texto("  São  Paulo ,SP ") == "sao paulo, sp"
+    assert normalizar_texto("SAO PAULO, sp") == normalizar_texto("São Paulo,SP")
+
+
+def test_cache_ttl_expira(tmp_path):
+    cache = CacheDisco("t", ttl=0.05, caminho=tmp_path / "c.sqlite")
+    cache.set("a", [1, 2])
+    assert cache.get("a") == [1, 2]
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.estatisticas()["expirados"] == 1
+
+
+def test_cache_remove_menos_usados(tmp_path):
+    cache = CacheDisco("t", ttl=60, max_entradas=2, caminho=tmp_path / "c.sqlite")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.estatisticas()
+    assert stats["entradas"] == 2
+    assert stats["taxa_acerto"] == pytest.approx(3 / 4)
+
+
+def test_geocodificacao_usa_cache(stub):
+    primeira = rotas.geocodificar_cidade("Campinas, SP")
+    segunda = rotas.geocodificar_cidade("campinas,  sp")
+    assert primeira == segunda
+    assert primeira[2] == "CAMPINAS" and primeira[3] == "SP"
+    assert stub.contagem["nominatim"] == 1
+
+
+def test_cidade_inexistente(stub):
+    assert rotas.geocodificar_cidade("Hogwarts") == (None, None, None, None)
+
+
+def test_rota_usa_cache(stub):
+    latA, lonA, municipioA, ufA = rotas.geocodificar_cidade("Recife, PE")
+    latB, lonB, municipioB, ufB = rotas.geocodificar_cidade("Olinda, PE")
+    args = (latA, lonA, latB, lonB, municipioA, ufA, municipioB, ufB, "Sol")
+    primeira = rotas.calcular_rota(*args)
+    segunda = rotas.calcular_rota(*args)
+    assert len(primeira) == 2
+    assert [r["custo_ajustado"] for r in primeira] == [r["custo_ajustado"] for r in segunda]
+    assert primeira[0]["coordenadas"].dtype == np.float32
+    assert primeira[0]["custo_ajustado"] <= primeira[1]["custo_ajustado"]
+    assert stub.contagem["osrm"] == 1
+
+
+def test_geocodificacao_paralela(stub):
+    stub.latencia = 0.3
+    inicio = time.perf_counter()
+    origem, destino = rotas.geocodificar_cidades("Recife, PE", "Olinda, PE")
+    assert time.perf_counter() - inicio < 0.55
+    assert origem[2] == "RECIFE" and destino[2] == "OLINDA"
+
+
+class ModeloNoturno:
+    """Risco alto entre 22h e 5h; conta as chamadas ao modelo."""
+    chamadas = 0
+
+    def predict_proba(self, dados):
+        ModeloNoturno.chamadas += 1
+        noite = dados["hora_do_dia"].isin([22, 23, 0, 1, 2, 3, 4, 5]).to_numpy(dtype=float)
+        risco = 0.1 + 0.8 * noite
+        return np.column_stack([1 - risco, risco])
+
+
+def test_planejar_partida_vetorizado(monkeypatch):
+    monkeypatch.setattr(rotas, "MODELO_RISCO", ModeloNoturno())
+    ModeloNoturno.chamadas = 0
+    rota = {"tempo_min": 120.0}
+    plano = rotas.planejar_partida(rota, "PE", "RECIFE", "PE", "OLINDA", "Sol", horas=48, inicio=datetime(2025, 1, 6, 18))
+    assert len(plano) == 48
+    assert ModeloNoturno.chamadas == 1
+    melhores = rotas.melhores_partidas(plano, n=3)
+    assert all(6 <= p.hour <= 19 for p in melhores["partida"])
+    # Partida às 21h chega às 23h: metade dos segmentos no período noturno
+    assert plano.loc[plano["partida"].dt.hour == 21, "risco_medio"].iloc[0] == np.float64(0.5)
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+import pandas as pd
+import pytest
+from core.sandbox import ErroSandbox, PoolSandbox, sandbox_disponivel, usar_pool
+
+pytestmark = pytest.mark.skipif(not sandbox_disponivel(), reason="requer forkserver")
+
+
+@pytest.fixture
+def pool():
+    df = pd.DataFrame({"uf": ["sp", "rj", "sp"], "hora": [1, 2, 3]})
+    pool = PoolSandbox(df, n_workers=2, timeout=2, limite_cpu_s=1, limite_memoria_mb=256)
+    yield pool
+    pool.encerrar()
+
+
+def test_executa_com_o_df_do_worker(pool):
+    assert pool.executar("final_result = df['uf'].value_counts().idxmax()") == "sp"
+    with pytest.raises(ErroSandbox, match="inexistente"):
+        pool.executar("final_result = df['inexistente']")
+
+
+def test_consultas_concorrentes(pool):
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda k=k: resultados.append(pool.executar(f"final_result = int(df['hora'].sum()) + {k}")))
+        for k in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(resultados) == [6 + k for k in range(6)]
+
+
+def test_limites_substituem_o_worker(pool):
+    with pytest.raises(ErroSandbox):
+        pool.executar("while True:\n    pass")
+    with pytest.raises(ErroSandbox, match="memória"):
+        pool.executar("x = bytearray(1024 * 1024 * 1024)")
+    assert pool.reiniciados >= 1
+    assert pool.executar("final_result = len(df)") == 3
+    # Os substitutos nascem em segundo plano
+    limite = time.monotonic() + 10
+    while pool.n_workers < 2 and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert pool.n_workers == 2
+
+
+def test_dataframes_grandes_vao_por_arquivo_mapeado(monkeypatch):
+    monkeypatch.setattr("core.sandbox._MINIMO_ARQUIVO", 0)
+    df = pd.DataFrame({"uf": ["sp", "rj", "sp"], "hora": [1, 2, 3]})
+    pool = PoolSandbox(df, n_workers=1, variaveis={"mesmo_df": df}, contextos={"amostra": {"df": df.head(2)}})
+    try:
+        # Cada DataFrame é gravado uma vez, mesmo referenciado em mais de um lugar
+        assert sorted(os.listdir(pool.diretorio)) == ["0.arrow", "1.arrow"]
+        assert pool.executar("final_result = (df is mesmo_df, df['uf'].tolist())") == (True, ["sp", "rj", "sp"])
+        assert pool.executar("final_result = len(df)", "amostra") == 2
+    finally:
+        pool.encerrar()
+    assert not os.path.exists(pool.diretorio)
+
+
+def test_pool_antigo_termina_as_consultas_antes_de_encerrar():
+    antigo = pd.DataFrame({"hora": [1, 2]})
+    with usar_pool(antigo, "v1") as pool_antigo:
+        with usar_pool(pd.DataFrame({"hora": [1]}), "v2") as pool_novo:
+            assert pool_novo is not pool_antigo
+            assert pool_antigo.executar("final_result = len(df)") == 2
+        assert pool_antigo.n_workers > 0
+    assert pool_antigo.n_workers == 0
+    with usar_pool(None, "v2") as pool:
+        assert pool is pool_novo
+        pool.aposentar()
@@ -0,0 +1,59 @@
+import bcrypt
+import pytest
+import core.auth as auth
+import core.senhas as senhas
+from core.metricas import METRICAS
+from core.senhas import EXECUTOR_REHASH
+from core.usuarios import UsuariosSQLite
+
+
+def test_calibracao_respeita_alvo_e_limites():
+    assert senhas.calibrar_rounds(alvo_ms=0.001, minimo=4) == 4
+    assert senhas.calibrar_rounds(alvo_ms=10 ** 9, maximo=14) == 14
+    baixo = senhas.calibrar_rounds(alvo_ms=5, minimo=4)
+    assert 4 <= baixo <= senhas.calibrar_rounds(alvo_ms=200, minimo=4)
+
+
+def test_hash_e_verificacao_no_pool(monkeypatch):
+    monkeypatch.setattr(senhas, "rounds_alvo", lambda: 4)
+    senha_hash = senhas.gerar_hash("segredo123")
+    assert senhas.rounds_do_hash(senha_hash) == 4
+    assert senhas.verificar_senha("segredo123", senha_hash)
+    assert not senhas.verificar_senha("errada", senha_hash)
+    assert not senhas.verificar_senha("segredo123", "hash invalido")
+    assert senhas.rounds_do_hash("hash invalido") is None
+
+
+def test_login_refaz_hash_com_custo_antigo(tmp_path, monkeypatch):
+    usuarios = UsuariosSQLite(tmp_path / "users.sqlite")
+    monkeypatch.setattr(auth, "USUARIOS", usuarios)
+    monkeypatch.setattr(senhas, "rounds_alvo", lambda: 5)
+    usuarios.cadastrar("ana@x.com", bcrypt.hashpw(b"segredo123", bcrypt.gensalt(4)).decode())
+    auth.init_session()
+
+    futuros = []
+    original = senhas.rehash_em_segundo_plano
+    monkeypatch.setattr(auth, "rehash_em_segundo_plano", lambda *a: futuros.append(original(*a)) or futuros[-1])
+    assert auth.authenticate_email_password("ana@x.com", "segredo123")
+    futuros[0].result(timeout=10)
+    novo = usuarios.por_email("ana@x.com")["password"]
+    assert senhas.rounds_do_hash(novo) == 5 and senhas.verificar_senha("segredo123", novo)
+
+    # Com o custo atualizado, o próximo login não refaz o hash
+    assert auth.authenticate_email_password("ana@x.com", "segredo123")
+    assert len(futuros) == 1
+    assert not auth.authenticate_email_password("ana@x.com", "errada")
+
+
+def test_falha_no_rehash_e_contada(monkeypatch):
+    monkeypatch.setattr(senhas, "rounds_alvo", lambda: 4)
+    antes = METRICAS.contadores().get("senha.rehash_falha", 0)
+
+    def gravar(novo):
+        raise RuntimeError("banco indisponível")
+
+    futuro = senhas.rehash_em_segundo_plano("segredo123", gravar)
+    with pytest.raises(RuntimeError):
+        futuro.result(timeout=10)
+    EXECUTOR_REHASH.submit(lambda: None).result(timeout=10)  # o callback roda antes da próxima tarefa
+    assert METRICAS.contadores().get("senha.rehash_falha", 0) == antes + 1
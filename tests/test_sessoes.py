@@ -0,0 +1,107 @@
+import multiprocessing as mp
+from types import SimpleNamespace
+import pytest
+import streamlit as st
+import core.auth as auth
+import core.sessoes as sessoes
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def time(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(sessoes, "time", SimpleNamespace(time=relogio.time))
+    return relogio
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def armazem(request, tmp_path):
+    if request.param == "sqlite":
+        return sessoes.ArmazemSQLite(tmp_path / "sessoes.sqlite", max_entradas=3)
+    return sessoes.ArmazemMemoria(max_entradas=3)
+
+
+def test_expiracao_e_renovacao(armazem, relogio):
+    armazem.set("a", {"email": "ana@x.com"}, ttl=10)
+    relogio.agora += 8
+    assert armazem.get("a") == {"email": "ana@x.com"}
+    assert armazem.tocar("a", ttl=10)
+    relogio.agora += 8
+    assert armazem.get("a") is not None
+    relogio.agora += 3
+    assert armazem.get("a") is None and not armazem.tocar("a", ttl=10)
+
+
+def test_contador_com_janela(armazem, relogio):
+    assert [armazem.incrementar("t", ttl=60) for _ in range(3)] == [1, 2, 3]
+    relogio.agora += 30
+    assert armazem.incrementar("t", ttl=60) == 4  # a janela conta do primeiro incremento
+    relogio.agora += 31
+    assert armazem.get("t") is None and armazem.incrementar("t", ttl=60) == 1
+
+
+def test_limite_de_entradas(armazem, relogio):
+    armazem.set("curta", 1, ttl=5)
+    armazem.set("longa", 2, ttl=100)
+    armazem.set("media", 3, ttl=50)
+    armazem.set("nova", 4, ttl=100)  # cheio: sai a que venceria antes
+    assert armazem.get("curta") is None and len(armazem) == 3
+    relogio.agora += 60
+    armazem.set("outra", 5, ttl=100)  # expiradas saem primeiro
+    assert armazem.get("longa") == 2 and armazem.get("nova") == 4 and armazem.get("outra") == 5
+
+
+def _incrementar_varios(caminho):
+    armazem = sessoes.ArmazemSQLite(caminho)
+    for _ in range(25):
+        armazem.incrementar("tentativas:ana@x.com", ttl=60)
+
+
+def test_contador_compartilhado_entre_processos(tmp_path):
+    contexto = mp.get_context("fork")
+    processos = [contexto.Process(target=_incrementar_varios, args=(tmp_path / "s.sqlite",)) for _ in range(4)]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join(timeout=30)
+    assert sessoes.ArmazemSQLite(tmp_path / "s.sqlite").get("tentativas:ana@x.com") == 100
+
+
+def _nova_sessao_do_navegador():
+    for chave in list(st.session_state.keys()):
+        del st.session_state[chave]
+    auth.init_session()
+
+
+def test_tentativas_por_email_valem_para_todas_as_sessoes(monkeypatch):
+    monkeypatch.setattr(auth, "SESSOES", sessoes.ArmazemMemoria())
+    _nova_sessao_do_navegador()
+    for _ in range(auth.LOGIN_ATTEMPTS_LIMIT - 1):
+        auth.increment_login_attempts("Ana@x.com")
+    _nova_sessao_do_navegador()
+    assert not auth.is_login_attempts_exceeded("ana@x.com")
+    auth.increment_login_attempts("ana@x.com ")
+    assert auth.is_login_attempts_exceeded("ana@x.com")
+    assert not auth.is_login_attempts_exceeded("bia@x.com")
+
+
+def test_sessao_expira_no_armazem(monkeypatch, relogio):
+    monkeypatch.setattr(auth, "SESSOES", sessoes.ArmazemMemoria())
+    _nova_sessao_do_navegador()
+    auth.increment_login_attempts("ana@x.com")
+    auth.login_user({"email": "ana@x.com"})
+    assert auth.SESSOES.get("tentativas:ana@x.com") is None  # login bem-sucedido zera as tentativas
+    relogio.agora += auth.SESSION_EXPIRY - 1
+    assert not auth.check_session_expiry()  # atividade renova a expiração
+    relogio.agora += auth.SESSION_EXPIRY - 1
+    assert not auth.check_session_expiry()
+    relogio.agora += auth.SESSION_EXPIRY + 1
+    assert auth.check_session_expiry() and not st.session_state.auth
+    assert len(auth.SESSOES) == 0
@@ -0,0 +1,62 @@
+import threading
+import time
+import pytest
+import core.rotas as rotas
+from core.singleflight import SingleFlight, coalescer
+
+
+def _em_paralelo(funcao, n):
+    resultados, erros = [], []
+    barreira = threading.Barrier(n)
+
+    def alvo():
+        barreira.wait()
+        try:
+            resultados.append(funcao())
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=alvo) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados, erros
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    execucoes = []
+
+    @coalescer()
+    def carregar(x):
+        execucoes.append(x)
+        time.sleep(0.2)
+        return {"x": x}
+
+    resultados, _ = _em_paralelo(lambda: carregar(1), 8)
+    assert len(execucoes) == 1
+    assert len(resultados) == 8 and all(r is resultados[0] for r in resultados)
+    assert carregar.singleflight.estatisticas() == {"executadas": 1, "compartilhadas": 7}
+    # Depois de concluída, a próxima chamada executa de novo
+    carregar(1)
+    assert len(execucoes) == 2
+
+
+def test_excecao_compartilhada():
+    grupo = SingleFlight()
+
+    def falhar():
+        time.sleep(0.1)
+        raise ValueError("falhou")
+
+    _, erros = _em_paralelo(lambda: grupo.executar("k", falhar), 5)
+    assert len(erros) == 5 and all(isinstance(e, ValueError) for e in erros)
+    assert grupo.estatisticas()["executadas"] == 1
+
+
+def test_geocodificacao_e_osrm_simultaneos_fazem_uma_requisicao(stub):
+    stub.latencia = 0.2
+    _em_paralelo(lambda: rotas.geocodificar_cidade("Campinas, SP"), 6)
+    _em_paralelo(lambda: rotas._buscar_rotas_osrm(-22.9056, -47.0608, -22.9068, -43.1729), 6)
+    assert stub.contagem["nominatim"] == 1
+    assert stub.contagem["osrm"] == 1
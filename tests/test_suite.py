@@ -0,0 +1,34 @@
+import json
+from benchmarks.suite import comparar, executar, salvar_baseline, carregar_baseline
+from core.codificacao import CodificadorRotulos
+
+
+def test_codificador_segue_o_label_encoder():
+    codificador = CodificadorRotulos({"uf": ["MG", "SP", "MG"], "dia_semana": ["domingo", "segunda-feira"]})
+    assert codificador.codificar("uf", "SP") == 1
+    assert codificador.codificar("uf", "MG") == 0  # primeira ocorrência, como list.index
+    assert codificador.codificar("uf", "XX") is None
+    assert codificador.codificar("hora", 7) == 7  # feature numérica passa direto
+
+
+def test_regressao_exige_tolerancia_e_folga():
+    baseline = {"casos": {"lento": {"mediana_ms": 100.0}, "rapido": {"mediana_ms": 0.1}, "ajustado": {"mediana_ms": 10.0, "tolerancia": 2.0}}}
+    resultados = {"lento": {"mediana_ms": 160.0}, "rapido": {"mediana_ms": 0.4}, "ajustado": {"mediana_ms": 25.0}, "novo": {"mediana_ms": 1.0}}
+    regrediu = {nome: r for nome, _, _, _, r in comparar(resultados, baseline, tolerancia=0.5, folga_ms=0.5)}
+    assert regrediu == {"lento": True, "rapido": False, "ajustado": False, "novo": False}
+
+
+def test_baseline_mantem_tolerancias_ajustadas(tmp_path):
+    caminho = tmp_path / "baseline.json"
+    salvar_baseline({"a": {"mediana_ms": 1.0, "p95_ms": 2.0}}, 100, caminho)
+    dados = carregar_baseline(caminho)
+    dados["casos"]["a"]["tolerancia"] = 1.0
+    caminho.write_text(json.dumps(dados))
+    salvar_baseline({"a": {"mediana_ms": 3.0, "p95_ms": 4.0}}, 100, caminho)
+    assert carregar_baseline(caminho)["casos"]["a"] == {"mediana_ms": 3.0, "p95_ms": 4.0, "tolerancia": 1.0}
+
+
+def test_casos_rodam_com_poucos_dados():
+    resultados = executar(["encode_input", "preparar_dados", "load_data_chatbot"], linhas=500, fator_repeticoes=0.01)
+    assert set(resultados) == {"encode_input", "preparar_dados", "load_data_chatbot"}
+    assert all(r["mediana_ms"] > 0 for r in resultados.values())
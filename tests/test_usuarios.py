@@ -0,0 +1,63 @@
+import json
+import multiprocessing as mp
+import core.auth as auth
+from core.usuarios import UsuariosSQLite
+
+
+def _json_antigo(caminho):
+    usuarios = [
+        {"id": "1", "email": "ana@x.com", "name": "ana", "created_at": 1.0, "password": "hash"},
+        {"id": "2", "email": "bia@x.com", "name": "bia", "created_at": 2.0, "oauth_provider": "google", "oauth_id": "g2"},
+    ]
+    caminho.write_text(json.dumps({"users": usuarios}))
+    return caminho
+
+
+def test_migra_users_json_uma_vez(tmp_path):
+    arquivo = _json_antigo(tmp_path / "users.json")
+    usuarios = UsuariosSQLite(tmp_path / "users.sqlite", arquivo_json=arquivo)
+    assert usuarios.por_email("ana@x.com") == {"id": "1", "email": "ana@x.com", "name": "ana", "password": "hash", "created_at": 1.0}
+    assert usuarios.por_oauth("google", "g2")["email"] == "bia@x.com"
+    assert usuarios.por_email("outro@x.com") is None
+    usuarios.fechar()
+
+    # Reabrir o banco não importa o JSON de novo
+    arquivo.write_text(json.dumps({"users": [{"id": "3", "email": "novo@x.com"}]}))
+    assert len(UsuariosSQLite(tmp_path / "users.sqlite", arquivo_json=arquivo)) == 2
+
+
+def test_cadastro_e_vinculo_oauth(tmp_path):
+    usuarios = UsuariosSQLite(tmp_path / "users.sqlite")
+    assert usuarios.cadastrar("ana@x.com", "hash", "Ana")
+    assert not usuarios.cadastrar("ana@x.com", "outro")
+    assert usuarios.cadastrar("ana@x.com", provedor="google", id_provedor="g1")
+    ana = usuarios.por_oauth("google", "g1")
+    assert ana["name"] == "Ana" and ana["password"] == "hash"
+    assert usuarios.cadastrar("bia@x.com")
+    assert usuarios.por_email("bia@x.com")["name"] == "bia" and "password" not in usuarios.por_email("bia@x.com")
+
+
+def _cadastrar_varios(caminho, inicio):
+    usuarios = UsuariosSQLite(caminho)
+    for i in range(inicio, inicio + 25):
+        usuarios.cadastrar(f"u{i}@x.com", "hash")
+
+
+def test_cadastros_simultaneos_em_processos(tmp_path):
+    caminho = tmp_path / "users.sqlite"
+    contexto = mp.get_context("fork")
+    processos = [contexto.Process(target=_cadastrar_varios, args=(caminho, k * 25)) for k in range(4)]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join(timeout=30)
+    assert len(UsuariosSQLite(caminho)) == 100
+
+
+def test_register_user_usa_o_banco(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "USUARIOS", UsuariosSQLite(tmp_path / "users.sqlite"))
+    monkeypatch.setattr(auth, "hash_password", lambda senha: f"hash-{senha}")
+    assert auth.register_user("ana@x.com", "segredo123", "Ana")
+    assert not auth.register_user("ana@x.com", "outra")
+    assert auth.get_user_by_email("ana@x.com")["password"] == "hash-segredo123"
+    assert [u["email"] for u in auth.load_users()["users"]] == ["ana@x.com"]